@@ -4,10 +4,19 @@ Provides REST API endpoints for task management and email ingestion.
 """
 
 import os
-from flask import Flask, jsonify, request, send_from_directory
+import hmac
+import json
+import queue
+import threading
+import time
+from flask import Flask, Response, g, jsonify, request, send_from_directory, stream_with_context
 from dotenv import load_dotenv
-from task_store import TaskStore
-from task_extractor import TaskExtractor
+import components
+import metrics
+import profiler
+import tracing
+from ingest_index import IngestIndex
+from task_events import TaskEventBus, format_sse
 
 # Load environment variables
 load_dotenv()
@@ -16,11 +25,140 @@ load_dotenv()
 app = Flask(__name__, static_folder='static')
 
 # Initialize components
-task_store = TaskStore()
-task_extractor = TaskExtractor()
+task_store = components.get_store()
+task_extractor = components.get_extractor()
+task_events = TaskEventBus()
+# Message-ID / content / thread index checked before extraction (INGEST_DEDUP=false disables)
+ingest_index = IngestIndex() if os.getenv('INGEST_DEDUP', 'true').lower() != 'false' else None
 
 # Configuration
 PORT = int(os.getenv('FLASK_PORT', 8000))
+INGEST_WORKERS = int(os.getenv('INGEST_WORKERS', os.cpu_count() or 1))
+MAX_BATCH_EMAILS = int(os.getenv('MAX_BATCH_EMAILS', 5000))
+REQUIRED_EMAIL_FIELDS = ['subject', 'body', 'sender']
+SKIP_MESSAGES = {
+    "message_id": "already ingested (same Message-ID)",
+    "content_hash": "already ingested (same sender, subject, date and body)",
+    "in_progress": "the same email is being processed by another request",
+    "no_new_content": "reply only quotes earlier messages in the thread"
+}
+SSE_HEARTBEAT_SECONDS = 15
+SSE_DRAIN_CHECK_SECONDS = 1
+# /debug/* endpoints need this token in X-Debug-Token; they are disabled when it is unset
+# (behind ngrok or another local proxy every request looks like it comes from localhost)
+DEBUG_TOKEN = os.getenv('DEBUG_TOKEN', '')
+MAX_PROFILE_REQUESTS = 1000
+MAX_PROFILE_SECONDS = 300
+MAX_MEMORY_FRAMES = 100
+
+# Graceful shutdown: set when the server starts draining (SIGTERM under serve.py / gunicorn)
+INGEST_PATHS = ('/ingest-email', '/ingest-email/stream', '/ingest-emails')
+draining = threading.Event()
+_inflight_ingests = 0
+_inflight_lock = threading.Condition()
+
+HTTP_SECONDS = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route", "status"]
+)
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    if request.path in INGEST_PATHS:
+        if draining.is_set():
+            response = jsonify({
+                "success": False,
+                "error": "Server is shutting down, retry shortly"
+            })
+            response.headers['Retry-After'] = '5'
+            return response, 503
+        _track_ingest(1)
+        g.tracking_ingest = True
+    # Profile armed requests, but never the /debug/* calls used to drive the profiler
+    if not request.path.startswith('/debug/'):
+        g.profile = profiler.request_profiler.start_request()
+
+
+@app.after_request
+def record_request_metrics(response):
+    """Observe request latency labelled by route template (not raw path) to keep cardinality low."""
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profiler.request_profiler.finish_request(profile)
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        HTTP_SECONDS.observe(time.perf_counter() - start,
+                             method=request.method, route=route, status=response.status_code)
+    trace_id = g.pop('trace_id', None)
+    if trace_id:
+        response.headers['X-Trace-Id'] = trace_id
+    return response
+
+
+@app.teardown_request
+def release_profiler(error=None):
+    """after_request is skipped on unhandled errors; never leave the profiler attached."""
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profiler.request_profiler.finish_request(profile)
+    if g.pop('tracking_ingest', False):
+        _track_ingest(-1)
+
+
+def _track_ingest(delta: int) -> None:
+    global _inflight_ingests
+    with _inflight_lock:
+        _inflight_ingests += delta
+        _inflight_lock.notify_all()
+
+
+def begin_drain() -> None:
+    """Stop taking new ingests, fail health checks and close live event streams."""
+    if not draining.is_set():
+        print("Draining: refusing new ingests and closing event streams")
+    draining.set()
+
+
+def shutdown(timeout: float = 30) -> bool:
+    """
+    Graceful shutdown: drain, wait for in-flight ingests to finish writing
+    their tasks, then close shared components (extractor worker pools, LLM
+    connections) and flush trace exports.
+    Returns False if ingests were still running when the timeout expired.
+    """
+    begin_drain()
+    deadline = time.monotonic() + timeout
+    with _inflight_lock:
+        while _inflight_ingests > 0 and time.monotonic() < deadline:
+            _inflight_lock.wait(deadline - time.monotonic())
+        drained = _inflight_ingests == 0
+    if not drained:
+        print(f"✗ Shutdown timeout with {_inflight_ingests} ingest(s) still running")
+    components.shutdown()
+    tracing.tracer.flush(max(0.0, deadline - time.monotonic()) or 1)
+    print("✓ Shutdown complete" if drained else "✗ Shutdown forced")
+    return drained
+
+
+def debug_allowed() -> bool:
+    """Guard for /debug/* endpoints: only with DEBUG_TOKEN configured and sent in X-Debug-Token."""
+    if not DEBUG_TOKEN:
+        return False
+    return hmac.compare_digest(request.headers.get('X-Debug-Token', ''), DEBUG_TOKEN)
+
+
+def debug_forbidden():
+    if not DEBUG_TOKEN:
+        return jsonify({
+            "success": False,
+            "error": "Not found"
+        }), 404
+    return jsonify({
+        "success": False,
+        "error": "Debug endpoints require a valid X-Debug-Token"
+    }), 403
 
 
 @app.route('/')
@@ -59,6 +197,47 @@ def get_tasks():
         }), 500
 
 
+@app.route('/tasks/search', methods=['GET'])
+def search_tasks():
+    """Ranked full-text search over tasks (GET /tasks/search?q=&limit=&offset=)"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({
+            "success": False,
+            "error": "Missing required query parameter: q"
+        }), 400
+
+    try:
+        limit = int(request.args.get('limit', 20))
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({
+            "success": False,
+            "error": "limit and offset must be integers"
+        }), 400
+
+    limit = max(1, min(limit, 100))
+    offset = max(0, offset)
+
+    try:
+        tasks, total = task_store.search_tasks(query, limit=limit, offset=offset)
+        return jsonify({
+            "success": True,
+            "query": query,
+            "tasks": tasks,
+            "count": len(tasks),
+            "total": total,
+            "limit": limit,
+            "offset": offset
+        }), 200
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": "Failed to search tasks",
+            "details": str(e)
+        }), 500
+
+
 @app.route('/tasks/complete/<task_id>', methods=['POST'])
 def complete_task(task_id):
     """Mark task as done (POST /tasks/complete/<id>)"""
@@ -76,6 +255,7 @@ def complete_task(task_id):
         
         if success:
             updated_task = task_store.get_task_by_id(task_id)
+            task_events.publish("task_updated", updated_task)
             return jsonify({
                 "success": True,
                 "message": "Task marked as complete",
@@ -100,6 +280,8 @@ def ingest_email():
     """
     Process incoming email and extract tasks (POST /ingest-email)
     Expected payload: {"subject": str, "body": str, "sender": str}
+    Optional: "received_at" (ISO 8601 or RFC 2822) to anchor relative due dates,
+              "headers" (dict of raw email headers) for non-actionable mail triage
     """
     try:
         # Validate payload
@@ -112,8 +294,7 @@ def ingest_email():
             }), 400
         
         # Check required fields
-        required_fields = ['subject', 'body', 'sender']
-        missing_fields = [field for field in required_fields if field not in data]
+        missing_fields = [field for field in REQUIRED_EMAIL_FIELDS if field not in data]
         
         if missing_fields:
             return jsonify({
@@ -125,19 +306,66 @@ def ingest_email():
         body = data['body']
         sender = data['sender']
         
-        # Extract tasks using LLM
-        print(f"Processing email from {sender}: {subject}")
-        extracted_tasks = task_extractor.extract_tasks_from_email(subject, body, sender)
-        
-        # Store tasks (with duplicate checking)
-        added_tasks = []
-        duplicate_tasks = []
-        
-        for task in extracted_tasks:
-            if task_store.add_task(task):
-                added_tasks.append(task)
-            else:
-                duplicate_tasks.append(task.get('description', 'Unknown'))
+        with tracing.trace("ingest_email", request.headers.get('traceparent'),
+                           sender=sender, body_chars=len(body)) as span:
+            g.trace_id = span.trace_id
+            
+            # Skip mail that was already ingested; trim quoted thread history from replies
+            check = ingest_index.check(sender, body, data.get('headers'), subject,
+                                       data.get('received_at')) if ingest_index is not None else None
+            if check and check['skip'] == 'in_progress':
+                # A retry that arrived while the first delivery is still extracting: ask for a later retry
+                span.set_attribute("skipped", check['skip'])
+                return jsonify({
+                    "success": False,
+                    "error": f"Email not processed: {SKIP_MESSAGES[check['skip']]}",
+                    "skipped": check['skip']
+                }), 409
+            if check and check['skip']:
+                span.set_attribute("skipped", check['skip'])
+                ingest_index.record(check)
+                print(f"Skipping email from {sender}: {subject} ({check['skip']})")
+                return jsonify({
+                    "success": True,
+                    "message": f"Email skipped: {SKIP_MESSAGES[check['skip']]}",
+                    "skipped": check['skip'],
+                    "added": 0,
+                    "duplicates": 0,
+                    "tasks": [],
+                    "duplicate_descriptions": []
+                }), 200
+            if check and check['trimmed']:
+                span.set_attribute("trimmed_paragraphs", check['trimmed'])
+                body = check['body']
+            
+            try:
+                # Extract tasks using LLM
+                print(f"Processing email from {sender}: {subject}")
+                extracted_tasks = task_extractor.extract_tasks_from_email(
+                    subject, body, sender,
+                    received_at=data.get('received_at'),
+                    headers=data.get('headers')
+                )
+                
+                # Store tasks (with duplicate checking)
+                added_tasks = []
+                duplicate_tasks = []
+                
+                for task in extracted_tasks:
+                    if task_store.add_task(task):
+                        added_tasks.append(task)
+                        task_events.publish("task_added", task)
+                    else:
+                        duplicate_tasks.append(task.get('description', 'Unknown'))
+                # Only now is the email done: a failed store write must not mark it as ingested
+                if check:
+                    ingest_index.record(check)
+            finally:
+                if check:
+                    ingest_index.release(check)
+            
+            span.set_attributes(extracted=len(extracted_tasks), added=len(added_tasks),
+                                duplicates=len(duplicate_tasks))
         
         return jsonify({
             "success": True,
@@ -156,9 +384,210 @@ def ingest_email():
         }), 500
 
 
+@app.route('/ingest-email/stream', methods=['POST'])
+def ingest_email_stream():
+    """
+    Streaming ingestion (POST /ingest-email/stream)
+    Same payload as /ingest-email. Responds with NDJSON: one line per task as it
+    is extracted and stored, then a final {"event": "done"} summary line.
+    """
+    data = request.get_json(silent=True)
+    
+    if not data:
+        return jsonify({
+            "success": False,
+            "error": "No JSON payload provided"
+        }), 400
+    
+    missing_fields = [field for field in REQUIRED_EMAIL_FIELDS if field not in data]
+    if missing_fields:
+        return jsonify({
+            "success": False,
+            "error": f"Missing required fields: {', '.join(missing_fields)}"
+        }), 400
+    
+    def generate():
+        added = 0
+        duplicates = 0
+        check = None
+        try:
+            body = data['body']
+            check = ingest_index.check(data['sender'], body, data.get('headers'), data['subject'],
+                                       data.get('received_at')) if ingest_index is not None else None
+            if check and check['skip'] == 'in_progress':
+                yield json.dumps({"event": "error", "success": False, "skipped": check['skip'],
+                                  "error": f"Email not processed: {SKIP_MESSAGES[check['skip']]}",
+                                  "added": 0, "duplicates": 0}) + "\n"
+                return
+            if check and check['skip']:
+                ingest_index.record(check)
+                yield json.dumps({"event": "done", "success": True, "skipped": check['skip'],
+                                  "added": 0, "duplicates": 0}) + "\n"
+                return
+            if check:
+                body = check['body']
+            
+            print(f"Streaming email from {data['sender']}: {data['subject']}")
+            tasks = task_extractor.extract_tasks_streaming(
+                data['subject'], body, data['sender'],
+                received_at=data.get('received_at'),
+                headers=data.get('headers')
+            )
+            for task in tasks:
+                if task_store.add_task(task):
+                    added += 1
+                    task_events.publish("task_added", task)
+                    yield json.dumps({"event": "task", "task": task}, ensure_ascii=False) + "\n"
+                else:
+                    duplicates += 1
+                    yield json.dumps({"event": "duplicate", "description": task.get('description', '')},
+                                     ensure_ascii=False) + "\n"
+            if check:
+                ingest_index.record(check)
+            yield json.dumps({"event": "done", "success": True, "added": added, "duplicates": duplicates}) + "\n"
+        except Exception as e:
+            yield json.dumps({"event": "error", "success": False, "error": "Error processing email",
+                              "details": str(e), "added": added, "duplicates": duplicates}) + "\n"
+        finally:
+            # Also runs when the client disconnects mid-stream
+            if check:
+                ingest_index.release(check)
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+@app.route('/tasks/events', methods=['GET'])
+def task_event_stream():
+    """Push task_added / task_updated events to the dashboard (Server-Sent Events)"""
+    subscriber = task_events.subscribe()
+    
+    def generate():
+        try:
+            yield ": connected\n\n"
+            # End the stream when draining so it doesn't hold a worker until the kill timeout;
+            # EventSource reconnects to another worker on its own
+            idle = 0.0
+            while not draining.is_set():
+                try:
+                    yield format_sse(subscriber.get(timeout=SSE_DRAIN_CHECK_SECONDS))
+                    idle = 0.0
+                except queue.Empty:
+                    idle += SSE_DRAIN_CHECK_SECONDS
+                    if idle >= SSE_HEARTBEAT_SECONDS:
+                        yield ": keep-alive\n\n"
+                        idle = 0.0
+        finally:
+            task_events.unsubscribe(subscriber)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@app.route('/ingest-emails', methods=['POST'])
+def ingest_emails():
+    """
+    Bulk ingestion for backfills (POST /ingest-emails)
+    Expected payload: {"emails": [{"subject": str, "body": str, "sender": str}, ...]}
+    Extraction fans out across worker processes; tasks are stored in one write.
+    """
+    try:
+        data = request.get_json()
+        emails = data.get('emails') if isinstance(data, dict) else None
+        
+        if not isinstance(emails, list):
+            return jsonify({
+                "success": False,
+                "error": "Payload must be a JSON object with an 'emails' list"
+            }), 400
+        
+        if len(emails) > MAX_BATCH_EMAILS:
+            return jsonify({
+                "success": False,
+                "error": f"Too many emails in one batch (max {MAX_BATCH_EMAILS})"
+            }), 413
+        
+        # Validate each email, keeping the valid ones
+        valid_emails = []
+        errors = []
+        for index, email_data in enumerate(emails):
+            if not isinstance(email_data, dict):
+                errors.append({"index": index, "error": "Email must be a JSON object"})
+                continue
+            missing_fields = [field for field in REQUIRED_EMAIL_FIELDS if field not in email_data]
+            if missing_fields:
+                errors.append({
+                    "index": index,
+                    "error": f"Missing required fields: {', '.join(missing_fields)}"
+                })
+                continue
+            valid_emails.append(email_data)
+        
+        print(f"Processing batch of {len(valid_emails)} emails ({len(errors)} invalid)")
+        with tracing.trace("ingest_emails", request.headers.get('traceparent'),
+                           emails=len(valid_emails)) as span:
+            g.trace_id = span.trace_id
+            
+            # Drop already-ingested mail (also repeats within this batch) before extraction;
+            # the index reserves each email, so a repeat is skipped as in progress
+            to_extract = valid_emails
+            checks = []
+            skipped = 0
+            if ingest_index is not None:
+                to_extract = []
+                for email_data in valid_emails:
+                    check = ingest_index.check(email_data['sender'], email_data['body'], email_data.get('headers'),
+                                               email_data['subject'], email_data.get('received_at'))
+                    checks.append(check)
+                    if check['skip']:
+                        skipped += 1
+                        continue
+                    to_extract.append(dict(email_data, body=check['body']) if check['trimmed'] else email_data)
+                span.set_attribute("skipped", skipped)
+            
+            try:
+                with tracing.span("extract_many", workers=INGEST_WORKERS):
+                    results = task_extractor.extract_many(to_extract, workers=INGEST_WORKERS)
+                extracted_tasks = [task for tasks in results for task in tasks]
+                
+                added_tasks, duplicate_tasks = task_store.add_tasks(extracted_tasks)
+                for task in added_tasks:
+                    task_events.publish("task_added", task)
+                for check in checks:
+                    ingest_index.record(check)
+            finally:
+                for check in checks:
+                    ingest_index.release(check)
+        
+        return jsonify({
+            "success": True,
+            "message": f"Processed {len(valid_emails)} emails and extracted {len(extracted_tasks)} tasks",
+            "emails": len(valid_emails),
+            "skipped": skipped,
+            "added": len(added_tasks),
+            "duplicates": len(duplicate_tasks),
+            "errors": errors
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": "Error processing email batch",
+            "details": str(e)
+        }), 500
+
+
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (503 while draining, so load balancers stop routing here)"""
+    if draining.is_set():
+        return jsonify({
+            "status": "draining",
+            "service": "Email-to-Task Automation",
+            "version": "1.0.0"
+        }), 503
     return jsonify({
         "status": "healthy",
         "service": "Email-to-Task Automation",
@@ -166,6 +595,175 @@ def health_check():
     }), 200
 
 
+@app.route('/debug/traces', methods=['GET'])
+def list_traces():
+    """Recently sampled traces, newest first (GET /debug/traces)"""
+    if not debug_allowed():
+        return debug_forbidden()
+    return jsonify({
+        "success": True,
+        "sample_rate": tracing.tracer.sample_rate,
+        "traces": tracing.tracer.recent_traces()
+    }), 200
+
+
+@app.route('/debug/traces/<trace_id>', methods=['GET'])
+def get_trace(trace_id):
+    """All spans of one sampled trace (GET /debug/traces/<trace_id>)"""
+    if not debug_allowed():
+        return debug_forbidden()
+    spans = tracing.tracer.get_trace(trace_id)
+    if spans is None:
+        return jsonify({
+            "success": False,
+            "error": "Trace not found (not sampled or evicted from the buffer)"
+        }), 404
+    return jsonify({"success": True, "trace_id": trace_id, "spans": spans}), 200
+
+
+@app.route('/debug/profile', methods=['GET'])
+def profile_status():
+    """State of the request and sampling profilers (GET /debug/profile)"""
+    if not debug_allowed():
+        return debug_forbidden()
+    return jsonify({
+        "success": True,
+        "requests": profiler.request_profiler.status(),
+        "window": profiler.sampling_profiler.status()
+    }), 200
+
+
+@app.route('/debug/profile', methods=['POST'])
+def start_profile():
+    """
+    Start profiling (POST /debug/profile)
+    {"mode": "requests", "count": N}: cProfile the next N requests
+    {"mode": "window", "seconds": S, "interval_ms": 5}: sample all threads for S seconds
+    """
+    if not debug_allowed():
+        return debug_forbidden()
+    data = request.get_json(silent=True) or {}
+    mode = data.get('mode', 'requests')
+    try:
+        if mode == 'requests':
+            count = int(data.get('count', 10))
+            if not 1 <= count <= MAX_PROFILE_REQUESTS:
+                raise ValueError(f"count must be between 1 and {MAX_PROFILE_REQUESTS}")
+            profiler.request_profiler.arm(count)
+            message = f"Profiling the next {count} requests"
+        elif mode == 'window':
+            seconds = float(data.get('seconds', 10))
+            interval_ms = float(data.get('interval_ms', 5))
+            if not 0 < seconds <= MAX_PROFILE_SECONDS or interval_ms < 1:
+                raise ValueError(f"seconds must be in (0, {MAX_PROFILE_SECONDS}] and interval_ms >= 1")
+            if not profiler.sampling_profiler.start(seconds, interval_ms / 1000):
+                return jsonify({
+                    "success": False,
+                    "error": "A sampling window is already running"
+                }), 409
+            message = f"Sampling all threads every {interval_ms:g}ms for {seconds:g}s"
+        else:
+            raise ValueError("mode must be 'requests' or 'window'")
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            "success": False,
+            "error": "Invalid profile request",
+            "details": str(e)
+        }), 400
+    return jsonify({"success": True, "message": message}), 202
+
+
+@app.route('/debug/profile', methods=['DELETE'])
+def stop_profile():
+    """Stop both profilers early, keeping what was collected (DELETE /debug/profile)"""
+    if not debug_allowed():
+        return debug_forbidden()
+    profiler.request_profiler.cancel()
+    profiler.sampling_profiler.stop()
+    return jsonify({"success": True, "message": "Profiling stopped"}), 200
+
+
+@app.route('/debug/profile/report', methods=['GET'])
+def profile_report():
+    """
+    Profile output as plain text (GET /debug/profile/report)
+    ?mode=requests&sort=cumulative&limit=40: pstats table
+    ?mode=window[&idle=1]: collapsed stacks, e.g. for flamegraph.pl or speedscope
+    """
+    if not debug_allowed():
+        return debug_forbidden()
+    mode = request.args.get('mode', 'requests')
+    if mode == 'window':
+        output = profiler.sampling_profiler.collapsed(include_idle=request.args.get('idle') == '1')
+    else:
+        sort = request.args.get('sort', 'cumulative')
+        if sort not in profiler.sort_keys():
+            return jsonify({
+                "success": False,
+                "error": f"Unknown sort key (use one of: {', '.join(profiler.sort_keys())})"
+            }), 400
+        output = profiler.request_profiler.report(sort, request.args.get('limit', 40, type=int))
+    if not output:
+        return jsonify({
+            "success": False,
+            "error": "No profile data yet"
+        }), 404
+    return Response(output, mimetype='text/plain')
+
+
+@app.route('/debug/memory', methods=['POST'])
+def control_memory_tracking():
+    """Start or stop tracemalloc (POST /debug/memory {"action": "start"|"stop", "frames": 10})"""
+    if not debug_allowed():
+        return debug_forbidden()
+    data = request.get_json(silent=True) or {}
+    action = data.get('action', 'start')
+    if action == 'start':
+        try:
+            frames = int(data.get('frames', 10))
+            if not 1 <= frames <= MAX_MEMORY_FRAMES:
+                raise ValueError(f"frames must be between 1 and {MAX_MEMORY_FRAMES}")
+        except (TypeError, ValueError) as e:
+            return jsonify({
+                "success": False,
+                "error": "Invalid memory tracking request",
+                "details": str(e)
+            }), 400
+        profiler.memory_tracker.start(frames)
+    elif action == 'stop':
+        profiler.memory_tracker.stop()
+    else:
+        return jsonify({
+            "success": False,
+            "error": "action must be 'start' or 'stop'"
+        }), 400
+    return jsonify({"success": True, "tracing": action == 'start'}), 200
+
+
+@app.route('/debug/memory', methods=['GET'])
+def memory_snapshot():
+    """
+    tracemalloc snapshot (GET /debug/memory?top=25&key=lineno)
+    Each call also reports growth since the previous call.
+    """
+    if not debug_allowed():
+        return debug_forbidden()
+    key_type = request.args.get('key', 'lineno')
+    if key_type not in ('lineno', 'filename', 'traceback'):
+        return jsonify({
+            "success": False,
+            "error": "key must be lineno, filename or traceback"
+        }), 400
+    snapshot = profiler.memory_tracker.snapshot(request.args.get('top', 25, type=int), key_type)
+    return jsonify({"success": True, **snapshot}), 200
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus metrics (GET /metrics)"""
+    return Response(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
+
+
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors"""
@@ -192,8 +790,16 @@ if __name__ == '__main__':
     print(f"Dashboard: http://localhost:{PORT}")
     print(f"API Endpoints:")
     print(f"  GET  /tasks - List all tasks")
+    print(f"  GET  /tasks/search?q= - Search tasks")
     print(f"  POST /tasks/complete/<id> - Mark task complete")
     print(f"  POST /ingest-email - Process email")
+    print(f"  POST /ingest-email/stream - Process email, streaming tasks as NDJSON")
+    print(f"  POST /ingest-emails - Process a batch of emails")
+    print(f"  GET  /tasks/events - Live task updates (Server-Sent Events)")
+    print(f"  GET  /metrics - Prometheus metrics")
+    print(f"  GET  /debug/traces - Recently sampled request traces")
+    print(f"  POST /debug/profile - Profile the next N requests or a time window")
+    print("Development server (debug, reloader). For production: python serve.py")
     print("=" * 50)
     
     app.run(host='0.0.0.0', port=PORT, debug=True)
@@ -0,0 +1,101 @@
+"""
+Due-date extraction benchmark.
+Compares the original regex + dateutil fuzzy parsing path with date_resolver.
+
+Usage: python benchmarks/bench_due_dates.py [--rounds N]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from date_resolver import DateResolver, resolve_phrase  # noqa: E402
+
+
+SENTENCES = [
+    "Complete the Q4 financial analysis report by December 20th",
+    "URGENT: Review and approve the new client contract by end of day",
+    "Schedule a follow-up meeting with the design team next week",
+    "Update the project timeline and share with stakeholders",
+    "Prepare presentation slides for the board meeting on December 18th",
+    "Submit the research paper draft due Jan 15",
+    "Send the signed form back by 2025-12-10",
+    "Pay the invoice before 12/31/2025 please",
+    "Call the dentist tomorrow to reschedule",
+    "Finish the assignment by next Friday",
+    "Review the onboarding docs in 3 days",
+    "Discuss budget changes sometime next month",
+    "Thanks for your help with everything this quarter",
+    "Let me know if you have any questions",
+]
+
+
+def legacy_extract_due_date(task_text):
+    """The pre-date_resolver implementation, kept verbatim for comparison."""
+    from dateutil import parser as date_parser
+    try:
+        date_patterns = [
+            r'by (\w+ \d+)',
+            r'due (\w+ \d+)',
+            r'on (\w+ \d+)',
+            r'(\d{4}-\d{2}-\d{2})',
+            r'(\d{1,2}/\d{1,2}/\d{4})',
+            r'(tomorrow|today|next week|next month)'
+        ]
+        for pattern in date_patterns:
+            match = re.search(pattern, task_text, re.IGNORECASE)
+            if match:
+                date_str = match.group(1)
+                try:
+                    parsed_date = date_parser.parse(date_str, fuzzy=True)
+                    return parsed_date.strftime("%Y-%m-%d")
+                except Exception:
+                    continue
+        return None
+    except Exception:
+        return None
+
+
+def run(label, func, rounds):
+    """Time func over the sentence corpus and return calls per second."""
+    calls = rounds * len(SENTENCES)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for sentence in SENTENCES:
+            func(sentence)
+    elapsed = time.perf_counter() - start
+    rate = calls / elapsed
+    print(f"  {label:<28} {calls:>8} calls  {elapsed:8.3f}s  {rate:>12,.0f} calls/s")
+    return rate
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--rounds", type=int, default=2000)
+    args = arg_parser.parse_args()
+
+    resolver = DateResolver()
+    reference = datetime(2025, 12, 6, 9, 0)
+
+    print("Sample resolutions (anchored to 2025-12-06):")
+    for sentence in SENTENCES[:12]:
+        print(f"  {sentence[:52]:<52} legacy={legacy_extract_due_date(sentence)!s:<10} "
+              f"new={resolver.resolve(sentence, reference)}")
+    print()
+
+    print(f"Throughput over {len(SENTENCES)} sentences x {args.rounds} rounds:")
+    legacy = run("legacy (regex + dateutil)", legacy_extract_due_date, args.rounds)
+    resolve_phrase.cache_clear()
+    cold = run("date_resolver (cold cache)", lambda s: resolver.resolve(s, reference), 1)
+    warm = run("date_resolver", lambda s: resolver.resolve(s, reference), args.rounds)
+    print()
+    print(f"Speedup: {warm / legacy:.1f}x (first-call rate {cold:,.0f} calls/s)")
+
+
+if __name__ == "__main__":
+    main()
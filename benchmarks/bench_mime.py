@@ -0,0 +1,192 @@
+"""
+MIME body extraction benchmark.
+Compares the original get_email_body with mime_body.extract_body over a
+generated corpus of varied MIME messages (charsets, transfer encodings,
+HTML-only mail, attachments, forwarded messages, very large parts): how many
+bodies each recovers, throughput, and peak memory on the largest message.
+
+Usage: python benchmarks/bench_mime.py [--rounds N] [--large-mb 8]
+"""
+
+import argparse
+import email
+import email.encoders
+import os
+import sys
+import time
+import tracemalloc
+from email.mime.application import MIMEApplication
+from email.mime.message import MIMEMessage
+from email.mime.multipart import MIMEMultipart
+from email.mime.nonmultipart import MIMENonMultipart
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mime_body import extract_body  # noqa: E402
+
+# Every generated body contains this phrase; a body counts when it comes back as readable text
+MARKER = "Please review the budget by Friday"
+
+HTML_PAGE = (
+    "<html><head><style>p {{ color: red; }}</style><title>Weekly</title></head><body>"
+    "<div><p>Hi team,</p><p>{marker}.</p><ul><li>Send the slides</li><li>Book the room</li></ul>"
+    "<p>Thanks &amp; regards,<br>Dana</p></div><script>track();</script></body></html>"
+)
+
+
+def legacy_get_email_body(msg):
+    """The pre-mime_body implementation, kept verbatim for comparison."""
+    body = ""
+
+    if msg.is_multipart():
+        for part in msg.walk():
+            content_type = part.get_content_type()
+            if content_type == "text/plain":
+                try:
+                    body = part.get_payload(decode=True).decode()
+                    break
+                except:  # noqa: E722
+                    pass
+    else:
+        try:
+            body = msg.get_payload(decode=True).decode()
+        except:  # noqa: E722
+            body = str(msg.get_payload())
+
+    return body.strip()
+
+
+def _text(body, subtype="plain", charset="utf-8", encoding="quopri"):
+    """A text part with an explicit charset and transfer encoding (8bit, quopri or base64)."""
+    part = MIMENonMultipart("text", subtype, charset=charset)
+    payload = body.encode(charset)
+    if encoding == "8bit":
+        part.set_payload(payload.decode("ascii", "surrogateescape"))
+        part["Content-Transfer-Encoding"] = "8bit"
+    else:
+        part.set_payload(payload)
+        getattr(email.encoders, f"encode_{encoding}")(part)
+    return part
+
+
+def build_corpus(large_mb):
+    """(label, raw bytes) for each message shape."""
+    body = f"Hi team,\n\n{MARKER}. Café meeting moved to 10:00 — bring the numbers.\n\nThanks"
+    corpus = []
+
+    corpus.append(("plain utf-8 (quoted-printable)", _text(body)))
+    corpus.append(("plain utf-8 (base64)", _text(body, encoding="base64")))
+    corpus.append(("plain latin-1 (8bit)", _text(body.replace("—", "-"), charset="iso-8859-1",
+                                                                encoding="8bit")))
+    windows = _text(body + " “quoted”", charset="cp1252")
+    windows.set_param("charset", "iso-8859-1")
+    corpus.append(("windows-1252 labelled latin-1", windows))
+    mislabeled = _text(body, encoding="8bit")
+    mislabeled.set_param("charset", "us-ascii")
+    corpus.append(("utf-8 labelled us-ascii", mislabeled))
+    corpus.append(("plain shift_jis", _text(f"{MARKER}. 会議は金曜日です。", charset="shift_jis",
+                                            encoding="base64")))
+    corpus.append(("html only (base64)", _text(HTML_PAGE.format(marker=MARKER), "html", encoding="base64")))
+
+    alternative = MIMEMultipart("alternative")
+    alternative.attach(_text(body))
+    alternative.attach(_text(HTML_PAGE.format(marker=MARKER), "html"))
+    corpus.append(("multipart/alternative", alternative))
+
+    mixed = MIMEMultipart("mixed")
+    mixed.attach(_text(HTML_PAGE.format(marker=MARKER), "html"))
+    attachment = MIMEApplication(os.urandom(2 * 1024 * 1024), "pdf")
+    attachment.add_header("Content-Disposition", "attachment", filename="report.pdf")
+    mixed.attach(attachment)
+    notes = _text("attachment text, not the body")
+    notes.add_header("Content-Disposition", "attachment", filename="notes.txt")
+    mixed.attach(notes)
+    corpus.append(("html + 2MB pdf + .txt attachment", mixed))
+
+    forwarded = MIMEMultipart("mixed")
+    forwarded.attach(_text(""))
+    inner = MIMEMultipart("alternative")
+    inner.attach(_text(HTML_PAGE.format(marker=MARKER), "html", encoding="base64"))
+    forwarded.attach(MIMEMessage(inner))
+    corpus.append(("empty text + forwarded html", forwarded))
+
+    paragraph = f"<p>{MARKER}. " + "Status update line with some filler text. " * 20 + "</p>\n"
+    large_html = "<html><body>" + paragraph * (large_mb * 1024 * 1024 // len(paragraph)) + "</body></html>"
+    corpus.append((f"html only, {large_mb}MB (base64)", _text(large_html, "html", encoding="base64")))
+
+    large_text = (f"{MARKER}. " + "Plain status line with filler. " * 30 + "\n") * \
+        (large_mb * 1024 * 1024 // 1000)
+    corpus.append((f"plain, {large_mb}MB (quoted-printable)", _text(large_text)))
+
+    messages = []
+    for label, msg in corpus:
+        msg["Subject"] = label
+        msg["From"] = "dana@example.com"
+        messages.append((label, msg.as_bytes()))
+    return messages
+
+
+def recovered(body):
+    """The marker came through as readable text (not raw HTML)."""
+    return MARKER in body and "<p>" not in body
+
+
+def run(label, func, messages, rounds):
+    """Parse + extract every message rounds times; returns messages per second."""
+    count = rounds * len(messages)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for _, raw in messages:
+            func(email.message_from_bytes(raw))
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed
+    print(f"  {label:<22} {count:>6} messages  {elapsed:8.3f}s  {rate:>10,.1f} messages/s")
+    return rate
+
+
+def peak_memory(func, raw):
+    """Peak bytes allocated while extracting the body of an already-parsed message."""
+    msg = email.message_from_bytes(raw)
+    tracemalloc.start()
+    func(msg)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--rounds", type=int, default=5)
+    arg_parser.add_argument("--large-mb", type=int, default=8, help="size of the largest messages")
+    args = arg_parser.parse_args()
+
+    messages = build_corpus(args.large_mb)
+
+    print("Bodies recovered as readable text:")
+    legacy_total = new_total = 0
+    for label, raw in messages:
+        legacy = recovered(legacy_get_email_body(email.message_from_bytes(raw)))
+        new = recovered(extract_body(email.message_from_bytes(raw)))
+        legacy_total += legacy
+        new_total += new
+        print(f"  {label:<36} legacy={'✓' if legacy else '✗'}  mime_body={'✓' if new else '✗'}  "
+              f"({len(raw) / 1024:,.0f} KB)")
+    print(f"  {'total':<36} legacy={legacy_total}/{len(messages)}  mime_body={new_total}/{len(messages)}")
+    print()
+
+    print(f"Throughput over {len(messages)} messages x {args.rounds} rounds (parse + extract):")
+    legacy_rate = run("legacy get_email_body", legacy_get_email_body, messages, args.rounds)
+    new_rate = run("mime_body.extract_body", extract_body, messages, args.rounds)
+    print()
+
+    print("Peak memory extracting the largest messages:")
+    for label, raw in messages[-2:]:
+        legacy_peak = peak_memory(legacy_get_email_body, raw)
+        new_peak = peak_memory(extract_body, raw)
+        print(f"  {label:<36} legacy={legacy_peak / 2**20:7.1f} MB  mime_body={new_peak / 2**20:7.1f} MB")
+    print()
+    print(f"Speedup: {new_rate / legacy_rate:.1f}x, bodies recovered {legacy_total} -> {new_total}")
+
+
+if __name__ == "__main__":
+    main()
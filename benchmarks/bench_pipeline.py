@@ -0,0 +1,255 @@
+"""
+Pipeline replay benchmark.
+Replays a corpus (examples/ plus synthetic emails) through TaskExtractor in
+fallback and mocked-LLM modes, TaskStore, and POST /ingest-email, and reports
+throughput, latency percentiles, allocations and store-size scaling as JSON.
+
+Usage: python benchmarks/bench_pipeline.py [--emails N] [--llm-latency-ms MS]
+                                           [--output results.json] [--compare previous.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from corpus import build_corpus, synthetic_task  # noqa: E402
+from mock_llm import MockOpenAIClient  # noqa: E402
+from task_extractor import TaskExtractor  # noqa: E402
+from task_store import TaskStore  # noqa: E402
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize(latencies, elapsed, items=None):
+    """Throughput and latency percentiles (milliseconds) for one stage."""
+    count = len(latencies)
+    return {
+        "count": count,
+        "items": items if items is not None else count,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_per_s": round(count / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def timed(func, inputs):
+    """Call func on every input, returning per-call latencies, total time and results."""
+    latencies = []
+    results = []
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for item in inputs:
+            call_start = time.perf_counter()
+            results.append(func(item))
+            latencies.append(time.perf_counter() - call_start)
+    return latencies, time.perf_counter() - start, results
+
+
+def allocations(func, inputs):
+    """Separate tracemalloc pass (it slows everything down, so never mixed with timing)."""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for item in inputs:
+            func(item)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "peak_kb": round((peak - before) / 1024, 1),
+        "retained_kb": round((current - before) / 1024, 1),
+        "per_item_peak_kb": round((peak - before) / 1024 / max(1, len(inputs)), 2),
+    }
+
+
+def extract_with(extractor):
+    return lambda email: extractor.extract_tasks_from_email(
+        email["subject"], email["body"], email["sender"],
+        received_at=email.get("received_at"), headers=email.get("headers")
+    )
+
+
+def bench_fallback(emails):
+    extractor = TaskExtractor(use_llm=False, use_triage=False)
+    func = extract_with(extractor)
+    latencies, elapsed, results = timed(func, emails)
+    report = summarize(latencies, elapsed, items=sum(len(tasks) for tasks in results))
+    report["allocations"] = allocations(func, emails)
+    return report
+
+
+def bench_mock_llm(emails, latency_ms, jitter_ms):
+    client = MockOpenAIClient(latency_ms=latency_ms, jitter_ms=jitter_ms)
+    with contextlib.redirect_stdout(io.StringIO()):
+        extractor = TaskExtractor(use_triage=False, client=client)
+    func = extract_with(extractor)
+    latencies, elapsed, results = timed(func, emails)
+    report = summarize(latencies, elapsed, items=sum(len(tasks) for tasks in results))
+    report["llm_calls"] = client.chat.completions.calls
+    if extractor.router is not None:
+        report["routes"] = extractor.router.stats_snapshot()["routes"]
+    return report
+
+
+def bench_store_scaling(sizes, probe, workdir):
+    """add_task latency at growing store sizes (each add loads and rewrites the whole file)."""
+    rng = random.Random(11)
+    curve = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        store = TaskStore(os.path.join(workdir, "scaling", "tasks.json"))
+    index = 0
+    for size in sizes:
+        existing = store.load_tasks()
+        while len(existing) < size:
+            task = synthetic_task(rng, index)
+            store._prepare_task(task)
+            existing.append(task)
+            index += 1
+        with contextlib.redirect_stdout(io.StringIO()):
+            store.save_tasks(existing)
+
+        probe_tasks = [synthetic_task(rng, index + i) for i in range(probe)]
+        index += probe
+        latencies, elapsed, _ = timed(store.add_task, probe_tasks)
+        point = summarize(latencies, elapsed)
+        point["store_size"] = size
+        point["file_kb"] = round(os.path.getsize(store.file_path) / 1024, 1)
+        curve.append(point)
+    return curve
+
+
+def bench_ingest_endpoint(emails, workdir):
+    """POST /ingest-email through the Flask test client against a throwaway store."""
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            import app as app_module
+            app_module.task_store = TaskStore(os.path.join(workdir, "ingest", "tasks.json"))
+            app_module.task_extractor = TaskExtractor(use_llm=False, use_triage=False)
+        client = app_module.app.test_client()
+
+        def post(email):
+            response = client.post("/ingest-email", json=email)
+            if response.status_code != 200:
+                raise RuntimeError(f"/ingest-email returned {response.status_code}")
+            return response.get_json()["added"]
+
+        latencies, elapsed, results = timed(post, emails)
+        report = summarize(latencies, elapsed, items=sum(results))
+        report["store_size"] = len(app_module.task_store.load_tasks())
+        return report
+    finally:
+        os.chdir(previous_cwd)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(BENCH_DIR),
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def compare(current, previous):
+    """Print per-stage deltas for throughput and latency against an earlier run."""
+    print(f"\nCompared with {previous.get('commit')} ({previous.get('timestamp')}):")
+    for stage, report in current["stages"].items():
+        before = previous.get("stages", {}).get(stage)
+        if not isinstance(report, dict) or not isinstance(before, dict):
+            continue
+        parts = []
+        for key in ("throughput_per_s", "p50_ms", "p95_ms", "p99_ms"):
+            if before.get(key):
+                change = (report[key] - before[key]) / before[key] * 100
+                parts.append(f"{key} {change:+.1f}%")
+        print(f"  {stage:<14} " + ", ".join(parts))
+
+
+def print_report(result):
+    for stage, report in result["stages"].items():
+        if isinstance(report, list):
+            print(f"  {stage}:")
+            for point in report:
+                print(f"    {point['store_size']:>8} tasks  {point['file_kb']:>10} KB  "
+                      f"add_task p50 {point['p50_ms']:.2f}ms  p99 {point['p99_ms']:.2f}ms")
+            continue
+        print(f"  {stage:<14} {report['count']:>6} emails  {report['throughput_per_s']:>10,.1f}/s  "
+              f"p50 {report['p50_ms']:.2f}ms  p95 {report['p95_ms']:.2f}ms  p99 {report['p99_ms']:.2f}ms")
+        if "allocations" in report:
+            alloc = report["allocations"]
+            print(f"  {'':<14} peak {alloc['peak_kb']} KB, retained {alloc['retained_kb']} KB")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--emails", type=int, default=500)
+    arg_parser.add_argument("--llm-emails", type=int, default=50,
+                            help="emails replayed through the mocked LLM (each sleeps for the latency)")
+    arg_parser.add_argument("--llm-latency-ms", type=float, default=50)
+    arg_parser.add_argument("--llm-jitter-ms", type=float, default=10)
+    arg_parser.add_argument("--store-sizes", default="100,1000,5000,20000")
+    arg_parser.add_argument("--store-probe", type=int, default=20, help="add_task calls per store size")
+    arg_parser.add_argument("--seed", type=int, default=42)
+    arg_parser.add_argument("--output", help="write the JSON report here")
+    arg_parser.add_argument("--compare", help="earlier JSON report to diff against")
+    args = arg_parser.parse_args()
+
+    emails = build_corpus(args.emails, seed=args.seed)
+    sizes = [int(size) for size in args.store_sizes.split(",") if size]
+    result = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": vars(args),
+        "stages": {},
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        print("Running pipeline benchmark...")
+        result["stages"]["fallback"] = bench_fallback(emails)
+        result["stages"]["mock_llm"] = bench_mock_llm(
+            emails[:args.llm_emails], args.llm_latency_ms, args.llm_jitter_ms
+        )
+        result["stages"]["ingest_email"] = bench_ingest_endpoint(emails, workdir)
+        result["stages"]["store_scaling"] = bench_store_scaling(sizes, args.store_probe, workdir)
+
+    print_report(result)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"✓ Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(result, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
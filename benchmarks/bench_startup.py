@@ -0,0 +1,129 @@
+"""
+Startup benchmark.
+Measures cold import time of the app and the per-email hook with
+python -X importtime, enforces an import-time budget, and checks that heavy
+dependencies (openai, httpx, requests, multiprocessing) are not imported eagerly.
+Exits 1 when a budget or an eager-import rule is broken.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--scale 1.5] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import time budgets in milliseconds (flask alone is ~150ms of app)
+BUDGETS_MS = {
+    "app": 350,
+    "task_extractor": 120,
+    "task_store": 60,
+    "kiro_email_hook": 80,
+}
+
+# Modules that must only be imported on first use
+FORBIDDEN_EAGER_IMPORTS = {
+    "app": ["openai", "httpx", "requests", "multiprocessing"],
+    "task_extractor": ["openai", "httpx", "multiprocessing"],
+    "kiro_email_hook": ["requests"],
+}
+
+
+def run_importtime(module, workdir):
+    """One cold import; returns (cumulative ms per imported module, wall seconds)."""
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, PYTHONDONTWRITEBYTECODE="")
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=workdir, env=env, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            _, cumulative_us, name = line[len("import time:"):].split("|")
+            cumulative[name.strip()] = int(cumulative_us) / 1000
+        except ValueError:
+            continue  # header line
+    return cumulative, wall
+
+
+def bench_module(module, runs, workdir):
+    samples = []
+    walls = []
+    last = {}
+    for _ in range(runs):
+        last, wall = run_importtime(module, workdir)
+        samples.append(last.get(module, 0.0))
+        walls.append(wall)
+    heaviest = sorted(
+        ((name, ms) for name, ms in last.items() if name != module and "." not in name),
+        key=lambda item: -item[1]
+    )[:8]
+    return {
+        "import_ms": round(statistics.median(samples), 1),
+        "process_ms": round(statistics.median(walls) * 1000, 1),
+        "imported": sorted(last),
+        "heaviest": [{"module": name, "ms": round(ms, 1)} for name, ms in heaviest],
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--runs", type=int, default=5)
+    arg_parser.add_argument("--scale", type=float, default=1.0,
+                            help="multiply budgets (slow CI machines)")
+    arg_parser.add_argument("--output", help="write the JSON report here")
+    args = arg_parser.parse_args()
+
+    failures = []
+    report = {"budgets_ms": BUDGETS_MS, "scale": args.scale, "modules": {}}
+    # Run from an empty directory so importing app doesn't create data/ in the repo
+    with tempfile.TemporaryDirectory() as workdir:
+        baseline = statistics.median(run_importtime("sys", workdir)[1] for _ in range(args.runs))
+        report["interpreter_ms"] = round(baseline * 1000, 1)
+        print(f"Interpreter startup: {baseline * 1000:.0f}ms\n")
+        print(f"  {'module':<18} {'import':>9} {'budget':>9} {'process':>9}")
+
+        for module, budget in BUDGETS_MS.items():
+            result = bench_module(module, args.runs, workdir)
+            limit = budget * args.scale
+            eager = [name for name in FORBIDDEN_EAGER_IMPORTS.get(module, []) if name in result["imported"]]
+            ok = result["import_ms"] <= limit and not eager
+            print(f"  {module:<18} {result['import_ms']:>7.0f}ms {limit:>7.0f}ms "
+                  f"{result['process_ms']:>7.0f}ms  {'✓' if ok else '✗'}")
+            if result["import_ms"] > limit:
+                failures.append(f"{module}: {result['import_ms']:.0f}ms > budget {limit:.0f}ms")
+                heaviest = ", ".join(f"{item['module']} {item['ms']:.0f}ms" for item in result["heaviest"])
+                print(f"  {'':<18} heaviest: {heaviest}")
+            for name in eager:
+                failures.append(f"{module}: imports {name} eagerly")
+            del result["imported"]
+            result["eager_imports"] = eager
+            report["modules"][module] = result
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Wrote {args.output}")
+
+    if failures:
+        print("\n✗ Startup budget exceeded:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("\n✓ All startup budgets met")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+TaskStore scaling benchmark.
+Generates synthetic stores from 1k up to 1M tasks and times load_tasks,
+add_task, is_duplicate, get_task_by_id and update_task_status, plus the
+on-disk size, for every registered store backend.
+
+Usage: python benchmarks/bench_task_store.py [--sizes 1000,10000,100000,1000000]
+                                             [--repeat N] [--output results.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from corpus import synthetic_task  # noqa: E402
+from task_store import TaskStore  # noqa: E402
+
+
+def _json_writer(store, tasks):
+    store.save_tasks(tasks)
+
+
+# name -> (factory(directory) -> store, writer(store, tasks) that bulk-creates the store)
+BACKENDS = {
+    "json": (lambda directory: TaskStore(os.path.join(directory, "tasks.json")), _json_writer),
+}
+
+OPERATIONS = ["load_tasks", "add_task", "is_duplicate", "get_task_by_id", "update_task_status"]
+
+
+def generate_tasks(count, seed=3):
+    rng = random.Random(seed)
+    tasks = []
+    for index in range(count):
+        task = synthetic_task(rng, index)
+        task["id"] = str(uuid.UUID(int=rng.getrandbits(128)))
+        task["created_at"] = "2025-12-06T09:00:00Z"
+        tasks.append(task)
+    return tasks
+
+
+def measure(func, repeat):
+    """Median and worst wall time of repeat calls, in milliseconds."""
+    samples = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for attempt in range(repeat):
+            start = time.perf_counter()
+            func(attempt)
+            samples.append(time.perf_counter() - start)
+    return {"median_ms": round(statistics.median(samples) * 1000, 3),
+            "max_ms": round(max(samples) * 1000, 3)}
+
+
+def bench_backend(name, size, tasks, repeat, workdir):
+    factory, writer = BACKENDS[name]
+    directory = os.path.join(workdir, f"{name}-{size}")
+    with contextlib.redirect_stdout(io.StringIO()):
+        store = factory(directory)
+    build_start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        writer(store, tasks)
+    build_s = time.perf_counter() - build_start
+
+    existing = store.load_tasks()
+    # Probe the end of the list: the worst case for linear scans
+    last = existing[-1]
+    missing = {"description": "A description that is not in the store at all"}
+
+    results = {
+        "load_tasks": measure(lambda _: store.load_tasks(), repeat),
+        "add_task": measure(lambda i: store.add_task(
+            {"description": f"Benchmark task {size}-{i}", "category": "Work", "priority": "Low"}), repeat),
+        "is_duplicate": measure(lambda _: store.is_duplicate(missing, existing), repeat),
+        "get_task_by_id": measure(lambda _: store.get_task_by_id(last["id"]), repeat),
+        "update_task_status": measure(
+            lambda i: store.update_task_status(last["id"], "done" if i % 2 == 0 else "pending"), repeat),
+    }
+    file_bytes = sum(
+        os.path.getsize(os.path.join(root, filename))
+        for root, _, filenames in os.walk(directory) for filename in filenames
+        if not filename.endswith(".backup")
+    )
+    return {"backend": name, "size": size, "build_s": round(build_s, 3),
+            "file_mb": round(file_bytes / 1024 / 1024, 2), "operations": results}
+
+
+def print_table(rows):
+    header = f"  {'backend':<8} {'tasks':>9} {'file MB':>9} " + " ".join(f"{op:>19}" for op in OPERATIONS)
+    print(header)
+    print("  " + "-" * (len(header) - 2))
+    for row in rows:
+        cells = " ".join(f"{row['operations'][op]['median_ms']:>17.2f}ms" for op in OPERATIONS)
+        print(f"  {row['backend']:<8} {row['size']:>9,} {row['file_mb']:>9.2f} {cells}")
+    print("  (median per call; max and build time are in the JSON report)")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--sizes", default="1000,10000,100000",
+                            help="comma-separated store sizes (add 1000000 for the full curve)")
+    arg_parser.add_argument("--backends", default=",".join(BACKENDS))
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--output", help="write the JSON report here")
+    args = arg_parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    backends = [name for name in args.backends.split(",") if name]
+    unknown = [name for name in backends if name not in BACKENDS]
+    if unknown:
+        arg_parser.error(f"unknown backends: {', '.join(unknown)} (available: {', '.join(BACKENDS)})")
+
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes:
+            print(f"Generating {size:,} tasks...")
+            tasks = generate_tasks(size)
+            for name in backends:
+                rows.append(bench_backend(name, size, tasks, args.repeat, workdir))
+                print(f"  ✓ {name}: {size:,} tasks")
+
+    print()
+    print_table(rows)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"results": rows, "config": vars(args)}, f, indent=2)
+        print(f"✓ Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark corpus: the sample emails in examples/ plus seeded synthetic generators.
+"""
+
+import glob
+import json
+import os
+import random
+from typing import Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ACTIONS = ["Complete", "Review", "Submit", "Prepare", "Send", "Update", "Schedule", "Fix", "Finish", "Discuss"]
+OBJECTS = ["the Q4 report", "the client presentation", "the budget spreadsheet", "the research paper draft",
+           "the onboarding checklist", "the vendor contract", "the release notes", "the grocery list",
+           "the thesis outline", "the incident postmortem", "the travel booking", "the design mockups"]
+WHEN = ["by Friday", "by December 20th", "tomorrow", "next week", "by 2025-12-15", "in 3 days",
+        "by end of day", "sometime next month", "", "", ""]
+URGENCY = ["URGENT: ", "", "", "", "ASAP: ", ""]
+FILLER = [
+    "Hope you had a great weekend.",
+    "Thanks again for all the help last week.",
+    "Let me know if you have any questions.",
+    "The team did a fantastic job on the launch.",
+    "I have attached the notes from our discussion.",
+]
+SENDERS = ["pm@company.com", "advisor@university.edu", "family@personal.com", "ops@company.com",
+           "cfo@company.com", "hr@company.com", "friend@mail.com"]
+QUOTED_HISTORY = "\n\nOn Mon, Dec 1, 2025 at 9:00 AM Someone <someone@company.com> wrote:\n" + \
+    "\n".join(f"> Earlier message line {i}: please review the old draft." for i in range(20))
+SIGNATURE = "\n\n--\nJane Doe | Program Manager\nExample Corp\nSent from my iPhone"
+DISCLAIMER = "\n\nCONFIDENTIALITY NOTICE: This email and any attachments are confidential and intended " \
+    "solely for the addressee. If you received it in error, please delete it." * 2
+
+
+def load_sample_emails() -> List[Dict]:
+    """Every email payload under examples/ (files may hold one email or a list)."""
+    emails = []
+    for path in sorted(glob.glob(os.path.join(REPO_ROOT, "examples", "*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for item in data if isinstance(data, list) else [data]:
+            if isinstance(item, dict) and {"subject", "body", "sender"} <= set(item):
+                emails.append(item)
+    return emails
+
+
+def synthetic_email(rng: random.Random, index: int, actions: int = 3, noisy: bool = True) -> Dict:
+    """One synthetic email with numbered action items and optional reply/signature noise."""
+    lines = [rng.choice(FILLER)]
+    for number in range(1, actions + 1):
+        when = rng.choice(WHEN)
+        lines.append(f"{number}. {rng.choice(URGENCY)}{rng.choice(ACTIONS)} {rng.choice(OBJECTS)} "
+                     f"#{index}-{number} {when}".rstrip() + ".")
+    lines.append(rng.choice(FILLER))
+    body = "Hi,\n\n" + "\n".join(lines)
+    if noisy:
+        body += SIGNATURE
+        if rng.random() < 0.5:
+            body += QUOTED_HISTORY
+        if rng.random() < 0.3:
+            body += DISCLAIMER
+    return {
+        "subject": f"Action items #{index}",
+        "body": body,
+        "sender": rng.choice(SENDERS),
+        "received_at": "2025-12-06T09:00:00Z",
+    }
+
+
+def synthetic_task(rng: random.Random, index: int) -> Dict:
+    """One stored-task record shaped like TaskExtractor output."""
+    return {
+        "description": f"{rng.choice(ACTIONS)} {rng.choice(OBJECTS)} #{index}",
+        "category": rng.choice(["Work", "Personal", "Academic", "Urgent", "Low Priority"]),
+        "priority": rng.choice(["High", "Medium", "Low"]),
+        "due_date": rng.choice([None, "2025-12-15", "2025-12-20"]),
+        "sender": rng.choice(SENDERS),
+        "status": rng.choice(["pending", "pending", "done"]),
+        "source_email": {"subject": f"Action items #{index}", "received_at": "2025-12-06T09:00:00Z"},
+    }
+
+
+def build_corpus(size: int, seed: int = 42) -> List[Dict]:
+    """Sample emails first, then synthetic ones up to size."""
+    rng = random.Random(seed)
+    emails = load_sample_emails()[:size]
+    index = 0
+    while len(emails) < size:
+        emails.append(synthetic_email(rng, index, actions=rng.randint(1, 6)))
+        index += 1
+    return emails
@@ -0,0 +1,76 @@
+"""
+Mock OpenAI-compatible client for offline benchmarks.
+Answers record_tasks calls (or plain JSON) after a configurable latency,
+with realistic-looking token usage, and supports stream=True.
+"""
+
+import json
+import random
+import re
+import time
+from types import SimpleNamespace
+
+_BODY = re.compile(r"Email Body:\n(.*?)\n\nRespond ONLY", re.DOTALL)
+_ACTION_LINE = re.compile(r"^\s*(?:\d+[.)]\s*)?(.{12,200}?)\s*$", re.MULTILINE)
+
+
+class MockChatCompletions:
+    def __init__(self, latency_ms: float, jitter_ms: float, seed: int):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rng = random.Random(seed)
+        self.calls = 0
+
+    def _sleep(self) -> None:
+        delay = self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    @staticmethod
+    def _answer(prompt: str) -> str:
+        match = _BODY.search(prompt)
+        body = match.group(1) if match else prompt
+        tasks = [
+            {"description": line.strip(), "category": "Work", "priority": "Medium",
+             "due_date": None, "confidence": 0.9}
+            for line in _ACTION_LINE.findall(body) if line[:1].isupper() and not line.endswith(":")
+        ][:8]
+        return json.dumps({"tasks": tasks})
+
+    def create(self, model, messages, stream=False, tools=None, **kwargs):
+        self.calls += 1
+        prompt = messages[-1]["content"]
+        answer = self._answer(prompt)
+        usage = SimpleNamespace(prompt_tokens=len(prompt) // 4, completion_tokens=len(answer) // 4)
+
+        if stream:
+            return self._stream(answer, tools is not None)
+
+        self._sleep()
+        if tools:
+            call = SimpleNamespace(function=SimpleNamespace(name="record_tasks", arguments=answer))
+            message = SimpleNamespace(content=None, tool_calls=[call])
+        else:
+            message = SimpleNamespace(content=answer, tool_calls=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+    def _stream(self, answer: str, as_tool: bool):
+        # Spread the configured latency across ~20 chunks
+        pieces = max(1, len(answer) // 20)
+        chunks = [answer[i:i + pieces] for i in range(0, len(answer), pieces)]
+        per_chunk = self.latency_ms / 1000 / max(1, len(chunks))
+        for text in chunks:
+            time.sleep(per_chunk)
+            if as_tool:
+                call = SimpleNamespace(function=SimpleNamespace(arguments=text))
+                delta = SimpleNamespace(content=None, tool_calls=[call])
+            else:
+                delta = SimpleNamespace(content=text, tool_calls=None)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+class MockOpenAIClient:
+    """Drop-in for openai.OpenAI with client.chat.completions.create(...)."""
+
+    def __init__(self, latency_ms: float = 800, jitter_ms: float = 200, seed: int = 7):
+        self.chat = SimpleNamespace(completions=MockChatCompletions(latency_ms, jitter_ms, seed))
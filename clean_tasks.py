@@ -1,27 +1,45 @@
 """
 Clean up task descriptions by removing excessive formatting and truncating long text.
+
+TaskStore applies clean_task() to every task it adds and marks it with the
+current CLEAN_VERSION, so this command only has to touch tasks stored before
+that (or before the normalization changed):
+
+    python clean_tasks.py [--store data/tasks.json] [--chunk-size 2000] [--workers N] [--all]
 """
-import json
+import argparse
+import os
 import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Bump when clean_text/truncate_description change so stored tasks get re-cleaned
+CLEAN_VERSION = 1
+
+CHUNK_SIZE = 2000
+
+# Below this many tasks a process pool costs more than it saves
+PARALLEL_THRESHOLD = 20000
+
 
 def clean_text(text):
     """Clean and normalize text."""
     if not text:
         return ""
-    
+
     # Remove carriage returns and normalize line breaks
     text = text.replace('\r\n', '\n').replace('\r', '\n')
-    
+
     # Remove multiple consecutive newlines
     text = re.sub(r'\n{3,}', '\n\n', text)
-    
+
     # Remove excessive spaces
     text = re.sub(r' {2,}', ' ', text)
-    
+
     # Remove leading/trailing whitespace from each line
     lines = [line.strip() for line in text.split('\n')]
     text = '\n'.join(line for line in lines if line)
-    
+
     return text.strip()
 
 def truncate_description(desc, max_length=300):
@@ -31,21 +49,106 @@ def truncate_description(desc, max_length=300):
         return desc[:max_length] + "..."
     return desc
 
-# Load tasks
-with open('data/tasks.json', 'r', encoding='utf-8') as f:
-    data = json.load(f)
+def _subject(task: Dict) -> Optional[str]:
+    source_email = task.get('source_email')
+    return source_email.get('subject') if isinstance(source_email, dict) else None
+
+def clean_fields(description: str, subject: Optional[str]) -> Tuple[str, Optional[str]]:
+    """Cleaned (description, source subject); a missing subject stays None."""
+    return truncate_description(description), clean_text(subject) if subject is not None else None
+
+def clean_task(task: Dict) -> Dict:
+    """Normalize a task's description and source subject in place and mark it clean."""
+    if task.get('cleaned') == CLEAN_VERSION:
+        return task
+    description, subject = clean_fields(task.get('description', ''), _subject(task))
+    task['description'] = description
+    if subject is not None:
+        task['source_email']['subject'] = subject
+    task['cleaned'] = CLEAN_VERSION
+    return task
+
+def _clean_chunk(chunk: List[Tuple[str, Optional[str]]]) -> List[Tuple[str, Optional[str]]]:
+    # Workers get and return only the strings: pickling whole tasks costs more than cleaning them
+    return [clean_fields(description, subject) for description, subject in chunk]
+
+def clean_store(store, chunk_size: int = CHUNK_SIZE, workers: int = 1, force: bool = False) -> Dict:
+    """
+    Clean every task not yet marked with CLEAN_VERSION (all tasks with force).
+    Cleaning runs on a snapshot, in chunks, across worker processes for large
+    stores; the results are applied in one store transaction, skipping tasks
+    that changed in the meantime (the next run picks those up).
+    """
+    start = time.perf_counter()
+    snapshot = store.load_tasks(internal=True)
+    dirty = [task for task in snapshot
+             if task.get('id') and (force or task.get('cleaned') != CLEAN_VERSION)]
+    stats = {"tasks": len(snapshot), "cleaned": 0, "changed": 0, "conflicts": 0}
+    if not dirty:
+        stats["seconds"] = time.perf_counter() - start
+        return stats
+
+    originals = {task['id']: (task.get('description', ''), _subject(task)) for task in dirty}
+    fields = [originals[task['id']] for task in dirty]
+    chunk_size = max(1, chunk_size)
+    chunks = [fields[i:i + chunk_size] for i in range(0, len(fields), chunk_size)]
+
+    if workers > 1 and len(dirty) >= PARALLEL_THRESHOLD:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = [item for chunk in pool.map(_clean_chunk, chunks) for item in chunk]
+    else:
+        results = [item for chunk in chunks for item in _clean_chunk(chunk)]
+    cleaned = {task['id']: result for task, result in zip(dirty, results)}
+    del snapshot, dirty, fields, chunks, results
+
+    with store.transaction() as tasks:
+        for task in tasks:
+            result = cleaned.get(task.get('id'))
+            if result is None:
+                continue
+            original = (task.get('description', ''), _subject(task))
+            if original != originals[task['id']]:
+                # Edited while we were cleaning; leave it for the next run
+                stats["conflicts"] += 1
+                continue
+            if result != original:
+                stats["changed"] += 1
+            task['description'], subject = result
+            if subject is not None:
+                task['source_email']['subject'] = subject
+            task['cleaned'] = CLEAN_VERSION
+            stats["cleaned"] += 1
+
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+def main():
+    """Clean the tasks in a store that are not marked clean yet."""
+    parser = argparse.ArgumentParser(description="Normalize stored task descriptions and subjects")
+    parser.add_argument('--store', default='data/tasks.json', help="task store file")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="tasks per worker job")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help=f"processes used when more than {PARALLEL_THRESHOLD} tasks need cleaning")
+    parser.add_argument('--all', action='store_true', help="re-clean tasks already marked clean")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.store):
+        print(f"✗ Error: {args.store} not found")
+        raise SystemExit(1)
+
+    from task_store import TaskStore
+
+    stats = clean_store(TaskStore(args.store), chunk_size=args.chunk_size, workers=args.workers,
+                        force=args.all)
 
-# Clean each task
-for task in data['tasks']:
-    task['description'] = truncate_description(task['description'])
-    
-    # Also clean subject
-    if 'source_email' in task and 'subject' in task['source_email']:
-        task['source_email']['subject'] = clean_text(task['source_email']['subject'])
+    print("✓ Tasks cleaned successfully!")
+    print(f"  Total tasks: {stats['tasks']}")
+    print(f"  Cleaned:     {stats['cleaned']} ({stats['changed']} modified)")
+    if stats['conflicts']:
+        print(f"  Skipped:     {stats['conflicts']} changed during the run (run again to clean them)")
+    print(f"  Time:        {stats['seconds']:.2f}s")
 
-# Save cleaned tasks
-with open('data/tasks.json', 'w', encoding='utf-8') as f:
-    json.dump(data, f, indent=2, ensure_ascii=False)
 
-print("✓ Tasks cleaned successfully!")
-print(f"  Total tasks: {len(data['tasks'])}")
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""
+Components Module
+Process-wide registry of shared components: one TaskExtractor per
+configuration, one TaskStore per file (optionally under a name), and a
+keep-alive HTTP client pool for the LLM API (HTTP/2 when the h2 package is
+installed). Repeated calls reuse the same instances, so library users no
+longer pay client construction and TLS handshakes per call. shutdown()
+closes extractors and HTTP clients and also runs at interpreter exit; stores
+hold no open resources and stay registered. A preforking server defers the
+LLM warm-up until after fork, so workers never share a connection.
+"""
+
+import atexit
+import importlib.util
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+DEFAULT_STORE_PATH = "data/tasks.json"
+DEFAULT_LLM_BASE_URL = "https://api.openai.com/v1"
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+_lock = threading.RLock()
+_extractors: Dict[Tuple, object] = {}
+_stores: Dict[str, object] = {}        # absolute path -> TaskStore
+_store_names: Dict[str, str] = {}      # name -> absolute path
+_http_clients: Dict[str, object] = {}
+_shutdown_registered = False
+_warm_up_deferred = False
+
+
+def _register_shutdown() -> None:
+    """Close shared components at exit (caller holds the lock)."""
+    global _shutdown_registered
+    if not _shutdown_registered:
+        atexit.register(shutdown)
+        _shutdown_registered = True
+
+
+def llm_http_client():
+    """
+    Shared httpx client for the LLM API: pooled keep-alive connections, HTTP/2
+    when available (LLM_HTTP2=false turns it off). Created on first use.
+    """
+    with _lock:
+        client = _http_clients.get("llm")
+        if client is None:
+            import httpx
+            http2 = HTTP2_AVAILABLE and os.getenv("LLM_HTTP2", "true").lower() != "false"
+            connections = int(os.getenv("LLM_POOL_CONNECTIONS", 20))
+            client = httpx.Client(
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=connections,
+                    max_keepalive_connections=connections,
+                    keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_SECONDS", 120))
+                ),
+                timeout=httpx.Timeout(float(os.getenv("LLM_TIMEOUT", 60)), connect=10.0),
+                follow_redirects=True
+            )
+            _http_clients["llm"] = client
+            _register_shutdown()
+            print(f"✓ LLM connection pool ready ({'HTTP/2' if http2 else 'HTTP/1.1'} keep-alive, "
+                  f"{connections} connections)")
+        return client
+
+
+def _warm_up(extractor) -> None:
+    try:
+        if extractor.client is None:
+            return
+        base_url = os.getenv("OPENAI_BASE_URL") or DEFAULT_LLM_BASE_URL
+        # Any response will do: the point is an open TLS connection in the pool
+        llm_http_client().head(base_url.rstrip("/") + "/models")
+    except Exception as e:
+        print(f"Warning: LLM connection warm-up failed: {e}")
+
+
+def _start_warm_up(extractor) -> None:
+    threading.Thread(target=_warm_up, args=(extractor,), name="llm-warm-up", daemon=True).start()
+
+
+def defer_warm_up() -> None:
+    """
+    Hold LLM warm-ups until start_warm_up(). A server that imports the app
+    before forking workers calls this first: a connection opened in the parent
+    would be inherited, socket and pool state included, by every worker.
+    """
+    global _warm_up_deferred
+    _warm_up_deferred = True
+
+
+def start_warm_up() -> None:
+    """Warm up the registered LLM extractors (with LLM_WARMUP=true); run in each worker after fork."""
+    global _warm_up_deferred
+    with _lock:
+        _warm_up_deferred = False
+        extractors = list(_extractors.values())
+    if os.getenv("LLM_WARMUP", "false").lower() == "true":
+        for extractor in extractors:
+            if extractor.llm_enabled:
+                _start_warm_up(extractor)
+
+
+def get_extractor(api_key: Optional[str] = None, model: Optional[str] = None,
+                  use_llm: bool = True, use_triage: bool = True, warm_up: Optional[bool] = None):
+    """
+    Shared TaskExtractor for a configuration; LLM clients share one connection pool.
+    warm_up (default LLM_WARMUP) opens the LLM connection in the background so
+    the first email doesn't wait for the handshake (after defer_warm_up(), only
+    once start_warm_up() runs).
+    """
+    from task_extractor import TaskExtractor
+
+    key = (api_key or os.getenv("OPENAI_API_KEY"), model or os.getenv("LLM_MODEL", "gpt-4"),
+           use_llm, use_triage)
+    with _lock:
+        extractor = _extractors.get(key)
+        if extractor is not None:
+            return extractor
+        extractor = TaskExtractor(api_key=api_key, model=model, use_llm=use_llm, use_triage=use_triage,
+                                  http_client_factory=llm_http_client)
+        _extractors[key] = extractor
+        _register_shutdown()
+
+    if warm_up is None:
+        warm_up = os.getenv("LLM_WARMUP", "false").lower() == "true"
+    if warm_up and extractor.llm_enabled and not _warm_up_deferred:
+        _start_warm_up(extractor)
+    return extractor
+
+
+def store_at(file_path: str = DEFAULT_STORE_PATH):
+    """Shared TaskStore for a file (one instance, and so one lock, per path)."""
+    from task_store import TaskStore
+
+    path = os.path.abspath(file_path)
+    with _lock:
+        store = _stores.get(path)
+        if store is None:
+            store = TaskStore(file_path)
+            _stores[path] = store
+        return store
+
+
+def get_store(name: str = "default", file_path: Optional[str] = None):
+    """
+    Named TaskStore. The first call for a name binds it to file_path (default:
+    data/tasks.json for "default", data/<name>.json otherwise); later calls may
+    omit the path. Raises ValueError if a name is rebound to another file.
+    """
+    with _lock:
+        bound = _store_names.get(name)
+        if file_path is None:
+            path = bound or os.path.abspath(DEFAULT_STORE_PATH if name == "default" else f"data/{name}.json")
+        else:
+            path = os.path.abspath(file_path)
+        if bound is not None and bound != path:
+            raise ValueError(f"Store '{name}' already uses {bound}")
+        _store_names[name] = path
+        return store_at(path)
+
+
+def close_extractor(extractor) -> None:
+    """Shut down an extractor's worker pool and drop it from the registry."""
+    with _lock:
+        for key, registered in list(_extractors.items()):
+            if registered is extractor:
+                del _extractors[key]
+    extractor.close()
+
+
+def shutdown() -> None:
+    """
+    Close every shared extractor and HTTP client; later calls build fresh ones.
+    Extractors that callers still hold drop their LLM client on close() and
+    build a new one (on a new pool) when next used. Stores are kept: callers
+    still hold them, and a second TaskStore for the same file would have its
+    own lock.
+    """
+    with _lock:
+        extractors = list(_extractors.values())
+        clients = list(_http_clients.values())
+        _extractors.clear()
+        _http_clients.clear()
+    for extractor in extractors:
+        extractor.close()
+    for client in clients:
+        client.close()
@@ -0,0 +1,197 @@
+"""
+Date Resolver Module
+Fast due-date extraction with precompiled patterns and a relative-date resolver.
+"""
+
+import calendar
+import re
+from datetime import date, datetime, timedelta
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Optional, Union
+
+
+MONTHS = {
+    'january': 1, 'jan': 1, 'february': 2, 'feb': 2, 'march': 3, 'mar': 3,
+    'april': 4, 'apr': 4, 'may': 5, 'june': 6, 'jun': 6, 'july': 7, 'jul': 7,
+    'august': 8, 'aug': 8, 'september': 9, 'sept': 9, 'sep': 9,
+    'october': 10, 'oct': 10, 'november': 11, 'nov': 11, 'december': 12, 'dec': 12,
+}
+
+WEEKDAYS = {
+    'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
+    'friday': 4, 'saturday': 5, 'sunday': 6,
+}
+
+_MONTH = "(?:" + "|".join(sorted(MONTHS, key=len, reverse=True)) + r")\.?"
+_WEEKDAY = "(?:" + "|".join(WEEKDAYS) + ")"
+_ORDINAL = r"(?:st|nd|rd|th)?"
+
+# One pass over the text; the named group that matched tells the resolver what to do
+DATE_PATTERN = re.compile(
+    rf"""\b(?:
+        (?P<iso>\d{{4}}-\d{{1,2}}-\d{{1,2}})
+      | (?P<numeric>\d{{1,2}}/\d{{1,2}}/\d{{4}})
+      | (?P<month_day>{_MONTH}\s+\d{{1,2}}{_ORDINAL}(?:,?\s+\d{{4}})?)
+      | (?P<day_month>\d{{1,2}}{_ORDINAL}\s+(?:of\s+)?{_MONTH}(?:,?\s+\d{{4}})?)
+      | (?P<relative>today|tonight|tomorrow|eod|eow
+            |end\s+of\s+(?:the\s+)?(?:day|week|month)
+            |(?:next|this)\s+(?:week|month|year)
+            |in\s+\d+\s+(?:days?|weeks?|months?))
+      | (?P<weekday>(?:(?:next|this|coming)\s+)?{_WEEKDAY}(?!['’]s\b))
+    )\b""",
+    re.IGNORECASE | re.VERBOSE,
+)
+
+# A bare weekday ("Thanks for Monday") or "may" ("we may 2x the budget") is only a
+# due date right after a deadline cue: "by Friday", "due on May 5", "until the 3rd of May"
+_DEADLINE_CUE = re.compile(r"\b(?:by|due|before|on|until|till)\s*:?\s+(?:the\s+)?$", re.IGNORECASE)
+_CUE_WINDOW = 24
+_UNAMBIGUOUS_MAY = re.compile(r"\d(?:st|nd|rd|th)|\bof\b|\d{4}")
+
+_NUMBER = re.compile(r"\d+")
+_WORD = re.compile(r"[a-z]+")
+
+
+def parse_received_at(value: Union[str, datetime, None]) -> Optional[datetime]:
+    """Parse an email received timestamp (ISO 8601 or RFC 2822). Returns None if unparseable."""
+    if value is None or isinstance(value, datetime):
+        return value
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        pass
+    try:
+        return parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def _safe_date(year: int, month: int, day: int) -> Optional[date]:
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def _add_months(anchor: date, months: int) -> date:
+    """Move by whole months, clamping the day to the target month's length."""
+    month_index = anchor.month - 1 + months
+    year = anchor.year + month_index // 12
+    month = month_index % 12 + 1
+    day = min(anchor.day, calendar.monthrange(year, month)[1])
+    return date(year, month, day)
+
+
+def _month_and_day(phrase: str, anchor: date) -> Optional[date]:
+    """Resolve 'dec 15', '15th of december', 'december 15, 2025'. Year-less dates roll forward."""
+    numbers = [int(n) for n in _NUMBER.findall(phrase)]
+    month = next((MONTHS[w] for w in _WORD.findall(phrase) if w in MONTHS), None)
+    if month is None or not numbers:
+        return None
+    day = numbers[0]
+    if len(numbers) > 1:
+        return _safe_date(numbers[1], month, day)
+    resolved = _safe_date(anchor.year, month, day)
+    if resolved is not None and resolved < anchor:
+        resolved = _safe_date(anchor.year + 1, month, day)
+    return resolved
+
+
+def _relative(phrase: str, anchor: date) -> Optional[date]:
+    """Resolve relative expressions against the anchor date."""
+    if phrase in ('today', 'tonight', 'eod', 'end of day', 'end of the day'):
+        return anchor
+    if phrase == 'tomorrow':
+        return anchor + timedelta(days=1)
+    if phrase in ('eow', 'end of week', 'end of the week', 'this week'):
+        # Friday of the current week; at the weekend, the coming Friday
+        return anchor + timedelta(days=(4 - anchor.weekday()) % 7)
+    if phrase in ('end of month', 'end of the month', 'this month'):
+        return anchor.replace(day=calendar.monthrange(anchor.year, anchor.month)[1])
+    if phrase == 'next week':
+        return anchor + timedelta(days=7)
+    if phrase == 'next month':
+        return _add_months(anchor, 1)
+    if phrase == 'this year':
+        return date(anchor.year, 12, 31)
+    if phrase == 'next year':
+        return _add_months(anchor, 12)
+    if phrase.startswith('in '):
+        amount = int(_NUMBER.search(phrase).group(0))
+        if 'month' in phrase:
+            return _add_months(anchor, amount)
+        return anchor + timedelta(days=amount * (7 if 'week' in phrase else 1))
+    return None
+
+
+def _weekday(phrase: str, anchor: date) -> date:
+    """
+    'friday' / 'coming friday': next occurrence after the anchor.
+    'this friday': occurrence in the current week (today counts).
+    'next friday': occurrence in the following week.
+    """
+    words = phrase.split()
+    target = WEEKDAYS[words[-1]]
+    if words[0] == 'next':
+        start_of_next_week = anchor + timedelta(days=7 - anchor.weekday())
+        return start_of_next_week + timedelta(days=target)
+    ahead = (target - anchor.weekday()) % 7
+    if ahead == 0 and words[0] != 'this':
+        ahead = 7
+    return anchor + timedelta(days=ahead)
+
+
+@lru_cache(maxsize=8192)
+def resolve_phrase(kind: str, phrase: str, anchor: date) -> Optional[date]:
+    """Resolve one normalized date phrase. Cached on (kind, phrase, anchor)."""
+    if kind == 'iso':
+        year, month, day = (int(part) for part in phrase.split('-'))
+        return _safe_date(year, month, day)
+    if kind == 'numeric':
+        month, day, year = (int(part) for part in phrase.split('/'))
+        return _safe_date(year, month, day)
+    if kind in ('month_day', 'day_month'):
+        return _month_and_day(phrase, anchor)
+    if kind == 'relative':
+        return _relative(phrase, anchor)
+    if kind == 'weekday':
+        return _weekday(phrase, anchor)
+    return None
+
+
+class DateResolver:
+    """Finds the first resolvable date expression in a piece of text."""
+
+    def resolve(self, text: str, reference: Optional[datetime] = None) -> Optional[str]:
+        """
+        Return the first date mentioned in text as YYYY-MM-DD, or None.
+        Relative expressions are anchored to reference (defaults to today).
+        """
+        if not text:
+            return None
+        anchor = (reference or datetime.utcnow()).date()
+        for match in DATE_PATTERN.finditer(text):
+            kind = match.lastgroup
+            phrase = " ".join(match.group(kind).lower().split())
+            if self._needs_cue(kind, phrase) and \
+                    not _DEADLINE_CUE.search(text, max(0, match.start() - _CUE_WINDOW), match.start()):
+                continue
+            resolved = resolve_phrase(kind, phrase, anchor)
+            if resolved is not None:
+                return resolved.strftime("%Y-%m-%d")
+        return None
+
+    @staticmethod
+    def _needs_cue(kind: str, phrase: str) -> bool:
+        """Bare weekdays and bare "may <n>" / "<n> may" are too ambiguous on their own."""
+        if kind == 'weekday':
+            return phrase.split()[0] in WEEKDAYS
+        if kind in ('month_day', 'day_month'):
+            return 'may' in _WORD.findall(phrase) and not _UNAMBIGUOUS_MAY.search(phrase)
+        return False
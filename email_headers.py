@@ -0,0 +1,43 @@
+"""
+Email Headers Module
+Header helpers shared by the Gmail poller and the mailbox importer: decoding
+RFC 2047 encoded headers and collecting the headers forwarded to the API.
+Standard library only, so importer worker processes stay light.
+"""
+
+from email.header import decode_header
+
+# Headers forwarded to the API for non-actionable mail triage
+TRIAGE_HEADERS = ['List-Unsubscribe', 'List-Id', 'Auto-Submitted', 'Precedence', 'X-Autoreply']
+# Headers the API uses to skip already-ingested mail and trim quoted thread history
+THREAD_HEADERS = ['Message-ID', 'In-Reply-To', 'References']
+
+
+def decode_email_subject(subject):
+    """Decode email subject handling different encodings."""
+    if subject is None:
+        return "No Subject"
+
+    decoded_parts = decode_header(subject)
+    decoded_subject = ""
+
+    for part, encoding in decoded_parts:
+        if isinstance(part, bytes):
+            try:
+                decoded_subject += part.decode(encoding or 'utf-8')
+            except (LookupError, UnicodeDecodeError):
+                decoded_subject += part.decode('utf-8', errors='ignore')
+        else:
+            decoded_subject += part
+
+    return decoded_subject
+
+
+def get_triage_headers(msg):
+    """Collect the headers the API uses to skip newsletters and auto-replies."""
+    return {name: str(msg[name]) for name in TRIAGE_HEADERS if msg[name] is not None}
+
+
+def get_api_headers(msg):
+    """Triage and thread headers forwarded to the API with each email."""
+    return {name: str(msg[name]) for name in TRIAGE_HEADERS + THREAD_HEADERS if msg[name] is not None}
@@ -0,0 +1,159 @@
+"""
+Email Preprocessor Module
+Strips quoted history, signatures and boilerplate from email bodies and
+enforces a token budget before the body is sent to the LLM.
+"""
+
+import re
+from typing import Dict, List, Tuple
+
+from clean_tasks import clean_text
+from mime_body import html_to_text
+
+
+# Rough GPT tokenizer ratio for English text
+CHARS_PER_TOKEN = 4
+
+TRUNCATION_MARKER = "[...]"
+
+_HTML_HINT = re.compile(r"<(?:html|body|div|p|br|table|span)\b", re.IGNORECASE)
+
+# A line that starts the quoted reply history; everything from here on is dropped
+_REPLY_HEADER = re.compile(
+    r"""^(?:
+        on\s.{5,200}\swrote:\s*$
+      | -{2,}\s*original\s+message\s*-{2,}
+      | _{10,}\s*$
+      | from:\s.+\n(?:.+\n){0,2}?(?:sent|date):\s
+    )""",
+    re.IGNORECASE | re.MULTILINE | re.VERBOSE,
+)
+
+_FORWARD_MARKER = re.compile(r"-{2,}\s*forwarded\s+message\s*-{2,}\s*\n?$", re.IGNORECASE)
+
+# Signature delimiter ("-- ")
+_SIGNATURE = re.compile(r"^--\s*$", re.MULTILINE)
+
+# Mobile client and mailing-list footers. Only short lines among the last few
+# of the body are checked, so "Please unsubscribe me from the vendor list" in
+# the message itself is kept.
+_FOOTER_LINE = re.compile(
+    r"""^\W*(?:
+        sent\s+from\s+my\s+\w+.*
+      | get\s+outlook\s+for\s+\w+.*
+      | unsubscribe\b.*
+      | (?:to|click\s+here\s+to|you\s+(?:can|may))\s+unsubscribe\b.*
+      | .*\b(?:unsubscribe|opt\s+out)\s+(?:here|at\s+\S+|below)\b.*
+      | you\s+(?:are|were)\s+receiving\s+this\b.*
+      | manage\s+(?:your\s+)?(?:email\s+)?(?:preferences|subscriptions?)\b.*
+    )$""",
+    re.IGNORECASE | re.VERBOSE,
+)
+FOOTER_LINES = 6
+FOOTER_MAX_CHARS = 200
+
+# Legal disclaimers run to the end of the message
+_DISCLAIMER = re.compile(
+    r"""^\W*(?:
+        confidentiality\s+notice
+      | disclaimer
+      | this\s+(?:e-?mail|message)(?:\s+and\s+any\s+attachments?|\s+\(including\s+any\s+attachments\))?\s+(?:is|are|may\s+contain)\s+(?:confidential|intended)
+      | the\s+information\s+contained\s+in\s+this\s+(?:e-?mail|message|communication)
+    )""",
+    re.IGNORECASE | re.MULTILINE | re.VERBOSE,
+)
+
+_SENTENCE_END = re.compile(r"[.!?]\s")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (no tokenizer dependency)."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _strip_footer(lines: List[str]) -> List[str]:
+    """Drop footer-shaped lines among the last FOOTER_LINES non-blank lines."""
+    footer = set()
+    seen = 0
+    for index in range(len(lines) - 1, -1, -1):
+        line = lines[index].strip()
+        if not line:
+            continue
+        seen += 1
+        if seen > FOOTER_LINES:
+            break
+        if len(line) <= FOOTER_MAX_CHARS and _FOOTER_LINE.match(line):
+            footer.add(index)
+    return [line for index, line in enumerate(lines) if index not in footer]
+
+
+def strip_noise(body: str) -> str:
+    """Remove quoted replies, signatures, disclaimers and client footers."""
+    body = body.replace('\r\n', '\n').replace('\r', '\n')
+    if _HTML_HINT.search(body):
+        # The converted text is never longer than the markup
+        body = html_to_text(body, max_chars=len(body))
+
+    for pattern in (_REPLY_HEADER, _SIGNATURE, _DISCLAIMER):
+        for match in pattern.finditer(body):
+            before = body[:match.start()]
+            # A forwarded message's header block introduces content, not history
+            if pattern is _REPLY_HEADER and _FORWARD_MARKER.search(before):
+                continue
+            # Never cut away everything
+            if before.strip():
+                body = before
+            break
+
+    lines = [line for line in body.split('\n') if not line.lstrip().startswith('>')]
+    return clean_text('\n'.join(_strip_footer(lines)))
+
+
+def _cut_at_boundary(text: str, limit: int, from_end: bool = False) -> str:
+    """Take at most limit chars from the start (or end), preferring a sentence or line break."""
+    if len(text) <= limit:
+        return text
+    if from_end:
+        window = text[-limit:]
+        breaks = [m.end() for m in _SENTENCE_END.finditer(window)] + [i + 1 for i, c in enumerate(window) if c == '\n']
+        start = min(breaks) if breaks else 0
+        return window[start:].lstrip()
+    window = text[:limit]
+    breaks = [m.start() + 1 for m in _SENTENCE_END.finditer(window)] + [window.rfind('\n')]
+    end = max(breaks) if breaks else -1
+    # Only honour the boundary if it keeps most of the window
+    return window[:end].rstrip() if end > limit // 2 else window.rstrip()
+
+
+def truncate_to_budget(text: str, token_budget: int) -> Tuple[str, bool]:
+    """
+    Keep the head (where requests usually are) plus a short tail (where
+    deadlines and sign-off asks often are) within token_budget.
+    """
+    if token_budget <= 0 or estimate_tokens(text) <= token_budget:
+        return text, False
+    char_budget = token_budget * CHARS_PER_TOKEN - len(TRUNCATION_MARKER) - 2
+    head = _cut_at_boundary(text, int(char_budget * 0.8))
+    tail = _cut_at_boundary(text[len(head):], char_budget - len(head), from_end=True)
+    parts: List[str] = [head, TRUNCATION_MARKER]
+    if tail:
+        parts.append(tail)
+    return "\n".join(parts), True
+
+
+def preprocess_body(body: str, token_budget: int = 1500) -> Tuple[str, Dict]:
+    """
+    Clean an email body for extraction.
+    Returns (clean body, stats) where stats reports token counts before/after.
+    """
+    original_tokens = estimate_tokens(body or "")
+    cleaned = strip_noise(body or "")
+    cleaned, truncated = truncate_to_budget(cleaned, token_budget)
+    tokens = estimate_tokens(cleaned)
+    stats = {
+        "original_tokens": original_tokens,
+        "tokens": tokens,
+        "tokens_saved": max(0, original_tokens - tokens),
+        "truncated": truncated,
+    }
+    return cleaned, stats
@@ -0,0 +1,251 @@
+"""
+Email Triage Module
+Cheap local pre-filter that skips LLM extraction for non-actionable mail
+(newsletters, notifications, auto-replies, receipts).
+
+Train the text classifier on labelled mail:
+    python email_triage.py train labelled.jsonl [model_path]
+Each line: {"subject": str, "body": str, "actionable": bool}
+"""
+
+import json
+import math
+import os
+import re
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import metrics
+from search_index import tokenize
+
+
+DEFAULT_MODEL_PATH = "data/triage_model.json"
+
+# Confidence that an email is non-actionable when a header signal is present.
+# Signals combine as independent evidence (noisy-OR): 1 - prod(1 - weight).
+HEADER_SIGNAL_WEIGHTS = {
+    "auto_submitted": 0.99,
+    "auto_reply_subject": 0.95,
+    "precedence_bulk": 0.95,
+    # Review requests, tickets and invitations come from notifications@ and
+    # mailing lists too, so these stay below the default threshold even all
+    # together (1 - 0.5^3 = 0.875); they only tip the verdict with a lower one
+    "noreply_sender": 0.5,
+    "list_unsubscribe": 0.5,
+    "precedence_list": 0.5,
+}
+
+_NOREPLY_SENDER = re.compile(
+    r"(?:^|[<\s\"])(?:no-?reply|do-?not-?reply|notifications?|mailer-daemon|postmaster|bounces?)[^@]*@",
+    re.IGNORECASE,
+)
+_AUTO_REPLY_SUBJECT = re.compile(
+    r"^\s*(?:out\s+of\s+(?:the\s+)?office|automatic\s+reply|auto-?reply|autoreply"
+    r"|delivery\s+status\s+notification|undeliverable|mail\s+delivery\s+failed)\b",
+    re.IGNORECASE,
+)
+
+# Only the start of the body matters for classification
+CLASSIFIER_MAX_CHARS = 4000
+
+TRIAGE_DECISIONS = metrics.counter(
+    "triage_decisions_total", "Emails checked by triage, by outcome", ["result"]
+)
+
+
+def combine_signals(signals: Iterable[str]) -> float:
+    """Non-actionable confidence from several header signals (noisy-OR of their weights)."""
+    remaining = 1.0
+    for signal in signals:
+        remaining *= 1.0 - HEADER_SIGNAL_WEIGHTS[signal]
+    return 1.0 - remaining
+
+
+class NaiveBayesClassifier:
+    """Multinomial naive Bayes over word tokens; labels are actionable / non-actionable."""
+
+    LABELS = ("actionable", "non_actionable")
+
+    def __init__(self):
+        self.doc_counts = {label: 0 for label in self.LABELS}
+        self.token_counts: Dict[str, Dict[str, int]] = {label: {} for label in self.LABELS}
+        self.token_totals = {label: 0 for label in self.LABELS}
+        self.vocabulary = set()
+
+    @property
+    def trained(self) -> bool:
+        return all(self.doc_counts[label] > 0 for label in self.LABELS)
+
+    def train(self, samples: Iterable[Tuple[str, bool]]) -> int:
+        """Add (text, actionable) samples. Returns the number of samples learned."""
+        learned = 0
+        for text, actionable in samples:
+            label = self.LABELS[0] if actionable else self.LABELS[1]
+            self.doc_counts[label] += 1
+            counts = self.token_counts[label]
+            for token in tokenize(text[:CLASSIFIER_MAX_CHARS]):
+                counts[token] = counts.get(token, 0) + 1
+                self.token_totals[label] += 1
+                self.vocabulary.add(token)
+            learned += 1
+        return learned
+
+    def probability_non_actionable(self, text: str) -> float:
+        """Posterior probability that text is non-actionable."""
+        total_docs = sum(self.doc_counts.values())
+        vocabulary_size = len(self.vocabulary) or 1
+        tokens = tokenize(text[:CLASSIFIER_MAX_CHARS])
+
+        log_scores = {}
+        for label in self.LABELS:
+            score = math.log(self.doc_counts[label] / total_docs)
+            counts = self.token_counts[label]
+            denominator = self.token_totals[label] + vocabulary_size
+            for token in tokens:
+                if token in self.vocabulary:
+                    score += math.log((counts.get(token, 0) + 1) / denominator)
+            log_scores[label] = score
+
+        # Normalize in log space to avoid underflow
+        peak = max(log_scores.values())
+        weights = {label: math.exp(score - peak) for label, score in log_scores.items()}
+        return weights["non_actionable"] / sum(weights.values())
+
+    def to_dict(self) -> Dict:
+        return {
+            "doc_counts": self.doc_counts,
+            "token_counts": self.token_counts,
+            "token_totals": self.token_totals,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "NaiveBayesClassifier":
+        classifier = cls()
+        classifier.doc_counts.update(data.get("doc_counts", {}))
+        classifier.token_counts.update(data.get("token_counts", {}))
+        classifier.token_totals.update(data.get("token_totals", {}))
+        for counts in classifier.token_counts.values():
+            classifier.vocabulary.update(counts)
+        return classifier
+
+
+class EmailTriage:
+    """Decides whether an email is worth sending to the extractor."""
+
+    def __init__(self, model_path: Optional[str] = None,
+                 header_threshold: Optional[float] = None,
+                 classifier_threshold: Optional[float] = None):
+        """
+        Load the classifier (if trained) and thresholds.
+        Emails whose non-actionable confidence reaches a threshold are skipped.
+        """
+        self.model_path = model_path or os.getenv("TRIAGE_MODEL_PATH", DEFAULT_MODEL_PATH)
+        self.header_threshold = header_threshold if header_threshold is not None else \
+            float(os.getenv("TRIAGE_HEADER_THRESHOLD", 0.9))
+        self.classifier_threshold = classifier_threshold if classifier_threshold is not None else \
+            float(os.getenv("TRIAGE_CLASSIFIER_THRESHOLD", 0.95))
+        self.classifier = self.load_model(self.model_path)
+
+    @staticmethod
+    def load_model(model_path: str) -> Optional[NaiveBayesClassifier]:
+        """Load a trained classifier from JSON; None if missing or unreadable."""
+        try:
+            with open(model_path, 'r', encoding='utf-8') as f:
+                classifier = NaiveBayesClassifier.from_dict(json.load(f))
+            return classifier if classifier.trained else None
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, AttributeError, TypeError) as e:
+            print(f"Warning: Ignoring unreadable triage model at {model_path}: {e}")
+            return None
+
+    def header_signals(self, subject: str, sender: str, headers: Optional[Dict] = None) -> List[str]:
+        """Return the names of header heuristics that mark this email as non-actionable."""
+        headers = {k.lower(): str(v) for k, v in (headers or {}).items() if v is not None}
+        signals = []
+
+        auto_submitted = headers.get("auto-submitted", "").strip().lower()
+        if (auto_submitted and auto_submitted != "no") or "x-autoreply" in headers or "x-autorespond" in headers:
+            signals.append("auto_submitted")
+        precedence = headers.get("precedence", "").strip().lower()
+        if precedence in ("bulk", "junk"):
+            signals.append("precedence_bulk")
+        elif precedence == "list":
+            signals.append("precedence_list")
+        if "list-unsubscribe" in headers:
+            signals.append("list_unsubscribe")
+        if sender and _NOREPLY_SENDER.search(sender):
+            signals.append("noreply_sender")
+        if subject and _AUTO_REPLY_SUBJECT.search(subject):
+            signals.append("auto_reply_subject")
+        return signals
+
+    def header_verdict(self, subject: str, sender: str, headers: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        Non-actionable verdict from headers alone (no body needed), or None if
+        the headers are not conclusive. Lets the IMAP poller skip downloads.
+        """
+        signals = self.header_signals(subject, sender, headers)
+        if signals:
+            confidence = combine_signals(signals)
+            if confidence >= self.header_threshold:
+                return {"actionable": False, "confidence": confidence, "reason": ", ".join(signals)}
+        return None
+
+    def triage(self, subject: str, body: str, sender: str, headers: Optional[Dict] = None) -> Dict:
+        """
+        Classify an email.
+        Returns {"actionable": bool, "confidence": float, "reason": str}, where
+        confidence is the estimated probability that the email is non-actionable.
+        """
+        verdict = self.header_verdict(subject, sender, headers)
+        if verdict is not None:
+            TRIAGE_DECISIONS.inc(result="skipped_by_headers")
+            return verdict
+
+        if self.classifier is not None:
+            confidence = self.classifier.probability_non_actionable(f"{subject}\n{body}")
+            if confidence >= self.classifier_threshold:
+                TRIAGE_DECISIONS.inc(result="skipped_by_classifier")
+                return {"actionable": False, "confidence": confidence, "reason": "classifier"}
+            TRIAGE_DECISIONS.inc(result="actionable")
+            return {"actionable": True, "confidence": confidence, "reason": "classifier"}
+
+        TRIAGE_DECISIONS.inc(result="actionable")
+        return {"actionable": True, "confidence": 0.0, "reason": "no signals"}
+
+
+def train_model(samples_path: str, model_path: str = DEFAULT_MODEL_PATH) -> int:
+    """Train (or extend) the classifier from a JSON / NDJSON file of labelled emails."""
+    with open(samples_path, 'r', encoding='utf-8') as f:
+        content = f.read().strip()
+    if content.startswith('['):
+        records = json.loads(content)
+    else:
+        records = [json.loads(line) for line in content.splitlines() if line.strip()]
+
+    classifier = EmailTriage.load_model(model_path) or NaiveBayesClassifier()
+    learned = classifier.train(
+        (f"{r.get('subject', '')}\n{r.get('body', '')}", bool(r['actionable']))
+        for r in records if 'actionable' in r
+    )
+
+    os.makedirs(os.path.dirname(model_path) or '.', exist_ok=True)
+    with open(model_path, 'w', encoding='utf-8') as f:
+        json.dump(classifier.to_dict(), f)
+    return learned
+
+
+def main():
+    """CLI entry point: train the triage classifier."""
+    if len(sys.argv) < 3 or sys.argv[1] != 'train':
+        print("Usage: python email_triage.py train <labelled.jsonl> [model_path]")
+        sys.exit(1)
+
+    model_path = sys.argv[3] if len(sys.argv) > 3 else DEFAULT_MODEL_PATH
+    learned = train_model(sys.argv[2], model_path)
+    print(f"✓ Trained triage model on {learned} emails -> {model_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -6,11 +6,18 @@ Automatically fetches emails from Gmail and sends them to the task extraction AP
 
 import imaplib
 import email
-from email.header import decode_header
+from email.utils import parseaddr
+from fnmatch import fnmatch
 import time
+import threading
 import requests
 import os
 from dotenv import load_dotenv
+import metrics
+import tracing
+from email_headers import TRIAGE_HEADERS, decode_email_subject, get_api_headers, get_triage_headers
+from mime_body import extract_body
+from outbox import Outbox, REJECTED, RETRY, SENT
 
 # Load environment variables
 load_dotenv()
@@ -21,10 +28,49 @@ GMAIL_APP_PASSWORD = os.getenv('GMAIL_APP_PASSWORD', '')
 API_URL = os.getenv('API_URL', 'http://localhost:8000/ingest-email')
 CHECK_INTERVAL = int(os.getenv('CHECK_INTERVAL', 60))  # Check every 60 seconds
 IMAP_SERVER = 'imap.gmail.com'
+# Port for this poller's own /metrics endpoint (0 disables it)
+METRICS_PORT = int(os.getenv('GMAIL_METRICS_PORT', 0))
+
+# Durable outbox: fetched emails wait here until the API accepts them
+OUTBOX_DIR = os.getenv('OUTBOX_DIR', 'data/outbox')
+OUTBOX_CONCURRENCY = int(os.getenv('OUTBOX_CONCURRENCY', 4))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 8))
+OUTBOX_BASE_DELAY = float(os.getenv('OUTBOX_BASE_DELAY', 5))
+OUTBOX_MAX_DELAY = float(os.getenv('OUTBOX_MAX_DELAY', 600))
+API_TIMEOUT = float(os.getenv('API_TIMEOUT', 30))
+
+# Header-first screening: fetch only these headers for new mail, and download
+# full messages only for senders/messages that pass the rules below
+HEADER_SCREENING = os.getenv('GMAIL_HEADER_SCREENING', 'true').lower() != 'false'
+SCREEN_HEADERS = ['From', 'Subject', 'Date', 'Message-ID'] + TRIAGE_HEADERS
+HEADER_FETCH_CHUNK = 200
+# Comma-separated addresses, domains (example.com matches subdomains too) or globs (*@news.*)
+ALLOW_SENDERS = [p.strip().lower() for p in os.getenv('GMAIL_ALLOW_SENDERS', '').split(',') if p.strip()]
+DENY_SENDERS = [p.strip().lower() for p in os.getenv('GMAIL_DENY_SENDERS', '').split(',') if p.strip()]
+# Message-IDs already sent to the API, so re-delivered or copied mail is not downloaded again
+SEEN_IDS_PATH = os.getenv('GMAIL_SEEN_IDS_PATH', 'data/gmail_seen_message_ids.txt')
 
 # Track processed emails
 processed_emails = set()
 
+# Created by main(); without it process_emails posts synchronously
+outbox = None
+
+# Loaded on first use; outbox sender threads add to it after each delivery
+seen_message_ids = None
+seen_ids_lock = threading.Lock()
+header_triage = None
+
+# Keep-alive connections to the API, shared by the outbox sender threads
+http = requests.Session()
+
+IMAP_SECONDS = metrics.histogram("imap_operation_seconds", "IMAP command latency", ["operation"])
+API_SECONDS = metrics.histogram("gmail_api_post_seconds", "Latency of posting an email to the API")
+API_POSTS = metrics.counter("gmail_api_posts_total", "Emails posted to the API", ["result"])
+BACKLOG = metrics.gauge("gmail_backlog_emails", "Unseen emails found but not yet processed")
+ALREADY_PROCESSED = metrics.counter("gmail_already_processed_total", "Unseen emails skipped as already processed")
+SCREENED = metrics.counter("gmail_screened_total", "New emails screened by headers before download", ["result"])
+
 
 def connect_to_gmail():
     """Connect to Gmail using IMAP."""
@@ -39,70 +85,215 @@ def connect_to_gmail():
         return None
 
 
-def decode_email_subject(subject):
-    """Decode email subject handling different encodings."""
-    if subject is None:
-        return "No Subject"
+def get_email_body(msg):
+    """Extract email body from message (text/plain, else HTML converted to text)."""
+    return extract_body(msg)
+
+
+def sender_matches(address, patterns):
+    """True if the sender address matches an address, domain or glob pattern."""
+    for pattern in patterns:
+        if any(char in pattern for char in '*?['):
+            if fnmatch(address, pattern):
+                return True
+        elif '@' in pattern.lstrip('@'):
+            if address == pattern:
+                return True
+        else:
+            domain = pattern.lstrip('@')
+            if address.endswith('@' + domain) or address.endswith('.' + domain):
+                return True
+    return False
+
+
+def _get_seen_message_ids():
+    global seen_message_ids
+    with seen_ids_lock:
+        if seen_message_ids is None:
+            try:
+                with open(SEEN_IDS_PATH, 'r', encoding='utf-8') as f:
+                    seen_message_ids = {line.strip() for line in f if line.strip()}
+            except FileNotFoundError:
+                seen_message_ids = set()
+        return seen_message_ids
+
+
+def remember_message_id(message_id):
+    """Record a Message-ID as ingested (kept across restarts). Call once the API has accepted it."""
+    message_id = (message_id or '').strip()
+    seen = _get_seen_message_ids()
+    if not message_id:
+        return
+    with seen_ids_lock:
+        if message_id in seen:
+            return
+        seen.add(message_id)
+        os.makedirs(os.path.dirname(SEEN_IDS_PATH) or '.', exist_ok=True)
+        with open(SEEN_IDS_PATH, 'a', encoding='utf-8') as f:
+            f.write(message_id + '\n')
+
+
+def on_delivered(entry):
+    """Outbox hook: the API accepted a queued email, so it counts as ingested now."""
+    remember_message_id((entry['payload'].get('headers') or {}).get('Message-ID'))
+
+
+def _get_header_triage():
+    """The API's header heuristics, when triage is enabled."""
+    global header_triage
+    if header_triage is None and os.getenv('TRIAGE_ENABLED', 'true').lower() != 'false':
+        from email_triage import EmailTriage
+        header_triage = EmailTriage()
+    return header_triage
+
+
+def screen_email(msg):
+    """
+    Decide from headers alone whether to download a message.
+    Returns None to keep it, or (result, detail) explaining the skip.
+    """
+    sender = str(msg['from'] or '')
+    address = parseaddr(sender)[1].lower()
     
-    decoded_parts = decode_header(subject)
-    decoded_subject = ""
+    # Allow rules win over everything else
+    if ALLOW_SENDERS and sender_matches(address, ALLOW_SENDERS):
+        return None
+    if DENY_SENDERS and sender_matches(address, DENY_SENDERS):
+        return "denied_sender", address
     
-    for part, encoding in decoded_parts:
-        if isinstance(part, bytes):
-            try:
-                decoded_subject += part.decode(encoding or 'utf-8')
-            except:
-                decoded_subject += part.decode('utf-8', errors='ignore')
-        else:
-            decoded_subject += part
+    message_id = (msg['message-id'] or '').strip()
+    if message_id and (message_id in _get_seen_message_ids() or (outbox is not None and message_id in outbox)):
+        return "duplicate", message_id
     
-    return decoded_subject
+    triage = _get_header_triage()
+    if triage is not None:
+        verdict = triage.header_verdict(decode_email_subject(msg['subject']), sender, get_triage_headers(msg))
+        if verdict is not None:
+            return "triage", verdict["reason"]
+    return None
 
 
-def get_email_body(msg):
-    """Extract email body from message."""
-    body = ""
+def fetch_headers(mail, email_ids):
+    """
+    Screening headers for many messages, one FETCH per chunk.
+    BODY.PEEK leaves the messages unread. Returns {email_id: header-only Message}.
+    """
+    query = f"(BODY.PEEK[HEADER.FIELDS ({' '.join(name.upper() for name in SCREEN_HEADERS)})])"
+    headers = {}
+    for start in range(0, len(email_ids), HEADER_FETCH_CHUNK):
+        chunk = email_ids[start:start + HEADER_FETCH_CHUNK]
+        with IMAP_SECONDS.time(operation="fetch_headers"):
+            status, data = mail.fetch(b','.join(chunk).decode(), query)
+        if status != 'OK':
+            continue
+        for part in data:
+            if isinstance(part, tuple):
+                headers[part[0].split()[0]] = email.message_from_bytes(part[1])
+    return headers
+
+
+def screen_emails(mail, email_ids):
+    """
+    Phase 1 of a poll: drop denied senders, already-ingested Message-IDs and
+    mail the header triage marks non-actionable, without downloading bodies.
+    Skipped emails count as processed. Returns the ids to download in full.
+    """
+    headers = fetch_headers(mail, email_ids)
+    survivors = []
+    batch_message_ids = set()
+    skipped = 0
+    for email_id in email_ids:
+        msg = headers.get(email_id)
+        # No headers back (server quirk): let the full fetch handle it
+        decision = screen_email(msg) if msg is not None else None
+        if decision is None and msg is not None:
+            # The same message twice in one poll (e.g. copied between labels)
+            message_id = (msg['message-id'] or '').strip()
+            if message_id in batch_message_ids:
+                decision = "duplicate", message_id
+            elif message_id:
+                batch_message_ids.add(message_id)
+        if decision is None:
+            SCREENED.inc(result="kept")
+            survivors.append(email_id)
+            continue
+        result, detail = decision
+        SCREENED.inc(result=result)
+        processed_emails.add(email_id)
+        skipped += 1
+        print(f"  - Skipped \"{decode_email_subject(msg['subject'])[:50]}\" ({result}: {detail})")
+    if skipped:
+        print(f"  Screened out {skipped} of {len(email_ids)} email(s) from headers alone")
+    return survivors
+
+
+def build_payload(subject, body, sender, received_at=None, headers=None):
+    """Request body for POST /ingest-email."""
+    payload = {
+        "subject": subject,
+        "body": body,
+        "sender": sender
+    }
+    if received_at:
+        payload["received_at"] = received_at
+    if headers:
+        payload["headers"] = headers
+    return payload
+
+
+def post_to_api(payload, request_headers=None):
+    """
+    POST one email to the API.
+    Returns (outbox outcome, error): SENT, RETRY for timeouts/connection errors/5xx/429
+    and 409 (an earlier attempt is still being processed), REJECTED for other 4xx responses.
+    """
+    try:
+        with API_SECONDS.time(), tracing.span("http.ingest", url=API_URL) as span:
+            response = http.post(API_URL, json=payload, headers=request_headers or None, timeout=API_TIMEOUT)
+            span.set_attribute("status", response.status_code)
+    except requests.RequestException as e:
+        API_POSTS.inc(result="failed")
+        return RETRY, str(e)
     
-    if msg.is_multipart():
-        for part in msg.walk():
-            content_type = part.get_content_type()
-            if content_type == "text/plain":
-                try:
-                    body = part.get_payload(decode=True).decode()
-                    break
-                except:
-                    pass
-    else:
-        try:
-            body = msg.get_payload(decode=True).decode()
-        except:
-            body = str(msg.get_payload())
+    if response.status_code == 200:
+        data = response.json()
+        print(f"  ✓ Processed \"{payload['subject'][:40]}\": {data.get('added', 0)} tasks added, "
+              f"{data.get('duplicates', 0)} duplicates")
+        API_POSTS.inc(result="ok")
+        return SENT, None
     
-    return body.strip()
+    API_POSTS.inc(result="api_error")
+    error = f"API error {response.status_code}"
+    if response.status_code in (408, 409, 429) or response.status_code >= 500:
+        return RETRY, error
+    return REJECTED, f"{error}: {response.text[:200]}"
 
 
-def send_to_api(subject, body, sender):
-    """Send email data to the task extraction API."""
-    try:
-        payload = {
-            "subject": subject,
-            "body": body,
-            "sender": sender
-        }
-        
-        response = requests.post(API_URL, json=payload, timeout=30)
-        
-        if response.status_code == 200:
-            data = response.json()
-            print(f"  ✓ Processed: {data.get('added', 0)} tasks added, {data.get('duplicates', 0)} duplicates")
-            return True
-        else:
-            print(f"  ✗ API error: {response.status_code}")
-            return False
-            
-    except Exception as e:
-        print(f"  ✗ Failed to send to API: {e}")
-        return False
+def send_to_api(subject, body, sender, received_at=None, headers=None):
+    """Send email data to the task extraction API (synchronously, no retries)."""
+    # Continue this email's trace in the API when it is sampled
+    traceparent = tracing.current_traceparent()
+    request_headers = {"traceparent": traceparent} if traceparent else None
+    
+    outcome, error = post_to_api(build_payload(subject, body, sender, received_at, headers), request_headers)
+    if outcome != SENT:
+        print(f"  ✗ Failed to send to API: {error}")
+    return outcome == SENT
+
+
+def queue_for_api(key, subject, body, sender, received_at=None, headers=None):
+    """
+    Hand the email to the outbox; it is on disk when this returns, so the
+    poller can move on while the outbox senders deliver it with retries.
+    """
+    traceparent = tracing.current_traceparent()
+    request_headers = {"traceparent": traceparent} if traceparent else None
+    
+    if outbox.enqueue(key, build_payload(subject, body, sender, received_at, headers), request_headers):
+        print(f"  ✓ Queued for delivery ({len(outbox)} in outbox)")
+    else:
+        print("  Already waiting in the outbox")
+    return True
 
 
 def process_emails(mail, folder='INBOX', filter_unread=True):
@@ -112,46 +303,70 @@ def process_emails(mail, folder='INBOX', filter_unread=True):
         mail.select(folder)
         
         # Search for emails
-        if filter_unread:
-            status, messages = mail.search(None, 'UNSEEN')
-        else:
-            status, messages = mail.search(None, 'ALL')
+        with IMAP_SECONDS.time(operation="search"):
+            if filter_unread:
+                status, messages = mail.search(None, 'UNSEEN')
+            else:
+                status, messages = mail.search(None, 'ALL')
         
         email_ids = messages[0].split()
+        new_ids = [email_id for email_id in email_ids if email_id not in processed_emails]
+        if len(new_ids) < len(email_ids):
+            ALREADY_PROCESSED.inc(len(email_ids) - len(new_ids))
+        backlog = len(new_ids)
+        BACKLOG.set(backlog)
         
-        if not email_ids:
+        if not new_ids:
             return 0
         
-        print(f"\nFound {len(email_ids)} new email(s) in {folder}")
+        print(f"\nFound {len(new_ids)} new email(s) in {folder}")
+        
+        # Phase 1: headers only, so skippable mail is never downloaded
+        if HEADER_SCREENING:
+            new_ids = screen_emails(mail, new_ids)
+            backlog = len(new_ids)
+            BACKLOG.set(backlog)
         
         processed_count = 0
         
-        for email_id in email_ids:
-            # Skip if already processed
-            if email_id in processed_emails:
-                continue
-            
+        # Phase 2: full download for the emails that passed screening
+        for email_id in new_ids:
             try:
-                # Fetch email
-                status, msg_data = mail.fetch(email_id, '(RFC822)')
-                
-                for response_part in msg_data:
-                    if isinstance(response_part, tuple):
-                        # Parse email
-                        msg = email.message_from_bytes(response_part[1])
-                        
-                        # Extract details
-                        subject = decode_email_subject(msg['subject'])
-                        sender = msg['from']
-                        body = get_email_body(msg)
-                        
-                        print(f"\n📧 Processing: {subject[:50]}...")
-                        print(f"   From: {sender}")
-                        
-                        # Send to API
-                        if send_to_api(subject, body, sender):
-                            processed_count += 1
-                            processed_emails.add(email_id)
+                with tracing.trace("gmail.process_email", folder=folder):
+                    # Fetch email
+                    with IMAP_SECONDS.time(operation="fetch"), tracing.span("imap.fetch") as span:
+                        status, msg_data = mail.fetch(email_id, '(RFC822)')
+                        span.set_attribute("bytes", sum(len(part[1]) for part in msg_data if isinstance(part, tuple)))
+                    
+                    for response_part in msg_data:
+                        if isinstance(response_part, tuple):
+                            # Parse email
+                            msg = email.message_from_bytes(response_part[1])
+                            
+                            # Extract details
+                            subject = decode_email_subject(msg['subject'])
+                            sender = msg['from']
+                            body = get_email_body(msg)
+                            
+                            print(f"\n📧 Processing: {subject[:50]}...")
+                            print(f"   From: {sender}")
+                            
+                            # Queue for the API (or send directly when running without an outbox).
+                            # Queued mail is remembered as ingested by on_delivered, so an email
+                            # the outbox dead-letters can be fetched again.
+                            if outbox is not None:
+                                key = (msg['message-id'] or f"{folder}:{email_id.decode()}").strip()
+                                delivered = queue_for_api(key, subject, body, sender, msg['date'],
+                                                          get_api_headers(msg))
+                            else:
+                                delivered = send_to_api(subject, body, sender, msg['date'], get_api_headers(msg))
+                                if delivered:
+                                    remember_message_id(msg['message-id'])
+                            if delivered:
+                                processed_count += 1
+                                processed_emails.add(email_id)
+                                backlog -= 1
+                                BACKLOG.set(backlog)
                         
             except Exception as e:
                 print(f"  ✗ Error processing email: {e}")
@@ -186,11 +401,29 @@ def main():
     print(f"  Gmail: {GMAIL_USER}")
     print(f"  API: {API_URL}")
     print(f"  Check interval: {CHECK_INTERVAL} seconds")
+    print(f"  Outbox: {OUTBOX_DIR} ({OUTBOX_CONCURRENCY} senders, {OUTBOX_MAX_ATTEMPTS} attempts)")
+    if METRICS_PORT:
+        metrics.start_metrics_server(METRICS_PORT)
+        print(f"  Metrics: http://localhost:{METRICS_PORT}/metrics")
     print()
     
+    # Start delivering queued emails, including any left over from the last run
+    global outbox
+    outbox = Outbox(
+        OUTBOX_DIR,
+        post_to_api,
+        max_attempts=OUTBOX_MAX_ATTEMPTS,
+        base_delay=OUTBOX_BASE_DELAY,
+        max_delay=OUTBOX_MAX_DELAY,
+        concurrency=OUTBOX_CONCURRENCY,
+        on_sent=on_delivered
+    )
+    outbox.start()
+    
     # Connect to Gmail
     mail = connect_to_gmail()
     if not mail:
+        outbox.stop(timeout=0)
         return
     
     print()
@@ -228,6 +461,9 @@ def main():
             mail.logout()
         except:
             pass
+        remaining = outbox.stop(timeout=API_TIMEOUT)
+        if remaining:
+            print(f"  {remaining} email(s) left in the outbox; they will be sent on the next run")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,69 @@
+"""
+Gunicorn Configuration
+Production serving for app.py: python serve.py (or gunicorn -c gunicorn.conf.py wsgi:app).
+All settings are environment-driven; see .env.example.
+"""
+
+import os
+import signal
+
+from dotenv import load_dotenv
+
+import components
+
+load_dotenv()
+
+bind = f"{os.getenv('WEB_HOST', '0.0.0.0')}:{os.getenv('FLASK_PORT', 8000)}"
+
+# TaskStore writes and the ingest index log are serialized across workers (flock),
+# but each worker keeps its own /metrics counters, trace buffer (/debug/traces),
+# profiler state (/debug/profile, /debug/memory) and event-stream subscribers, so
+# with WEB_WORKERS>1 those only show, and only reach, one worker. Scale with
+# threads first.
+workers = int(os.getenv('WEB_WORKERS', 1))
+threads = int(os.getenv('WEB_THREADS', 8))
+worker_class = 'gthread'
+
+# Import app.py once in the master so every worker forks with the TaskExtractor
+# (keyword tables, triage model) and TaskStore already built. The LLM client and
+# its connections are per worker: they are built on first use, and the
+# LLM_WARMUP connection is opened in post_worker_init, after fork.
+preload_app = True
+components.defer_warm_up()
+
+# Keep idle client connections open briefly (Gmail poller, dashboards behind a proxy)
+keepalive = int(os.getenv('WEB_KEEPALIVE', 5))
+# LLM extraction can take tens of seconds per request
+timeout = int(os.getenv('WEB_TIMEOUT', 120))
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', 30))
+# Recycle workers after N requests to bound slow memory growth (0 disables)
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.getenv('WEB_ACCESS_LOG', '-') or None
+errorlog = '-'
+
+
+def post_worker_init(worker):
+    """
+    Start draining (close SSE streams, refuse new ingests) as soon as the worker
+    gets SIGTERM, and open this worker's own LLM connection (LLM_WARMUP).
+    """
+    import app as app_module
+
+    components.start_warm_up()
+
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def handle_term(signum, frame):
+        app_module.begin_drain()
+        if callable(previous):
+            previous(signum, frame)
+
+    signal.signal(signal.SIGTERM, handle_term)
+
+
+def worker_exit(server, worker):
+    """In-flight requests have finished (or timed out); release pools and flush traces."""
+    import app as app_module
+    app_module.shutdown(timeout=5)
@@ -0,0 +1,327 @@
+"""
+Ingest Index Module
+Remembers which emails were already ingested (by Message-ID, or for mail
+without one by a hash of sender, subject, date and body) so re-delivered or
+copied mail skips extraction, and keeps per-message paragraph hashes so a
+reply in a known thread is extracted from its new paragraphs only. Persisted
+as an append-only JSONL log that several worker processes can share.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from email.utils import parseaddr
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process share an index safely
+    fcntl = None
+
+import metrics
+
+DEFAULT_INDEX_PATH = "data/ingest_index.jsonl"
+
+# Paragraph hashes kept per message (enough for any realistic quoted history)
+MAX_PARAGRAPHS = 200
+
+# An email being extracted is reserved so a concurrent re-delivery skips it. A
+# worker that dies mid-extraction never releases its keys, so they expire.
+RESERVATION_SECONDS = 600
+
+_MESSAGE_ID = re.compile(r"<[^<>\s]+>")
+_QUOTE_PREFIX = re.compile(r"^[\s>]+", re.MULTILINE)
+_WHITESPACE = re.compile(r"\s+")
+# "On <date>, <name> wrote:" lines introduce quoted history and carry no content
+_ATTRIBUTION = re.compile(r"^(?:on\s.{5,200}\swrote:|-{2,}\s*original\s+message\s*-{2,})\s*$",
+                          re.IGNORECASE | re.DOTALL)
+
+INGEST_SKIPS = metrics.counter(
+    "ingest_index_skips_total", "Emails not extracted because the ingest index knew them", ["reason"]
+)
+THREAD_TRIMMED = metrics.counter(
+    "ingest_index_trimmed_paragraphs_total", "Quoted paragraphs removed from replies before extraction"
+)
+
+
+def header_value(headers: Optional[Dict], name: str) -> str:
+    """Case-insensitive header lookup in the payload's headers dict."""
+    for key, value in (headers or {}).items():
+        if key.lower() == name.lower() and value is not None:
+            return str(value)
+    return ""
+
+
+def parse_message_ids(value: str) -> List[str]:
+    """All <message-id> tokens in an In-Reply-To / References header."""
+    return _MESSAGE_ID.findall(value or "")
+
+
+def _normalize(text: str) -> str:
+    # Quoted copies differ only in '>' prefixes, wrapping and case
+    return _WHITESPACE.sub(" ", _QUOTE_PREFIX.sub("", text)).strip().lower()
+
+
+def split_paragraphs(body: str) -> List[Tuple[str, str]]:
+    """
+    (hash, text) for each paragraph of a body. Paragraphs end at blank lines
+    (also quoted blank lines like ">") and where the quoting depth changes, so
+    a quoted copy of a paragraph hashes the same as the original.
+    """
+    blocks: List[List[str]] = []
+    depth = None
+    for line in body.replace("\r\n", "\n").split("\n"):
+        prefix = _QUOTE_PREFIX.match(line)
+        line_depth = prefix.group(0).count(">") if prefix else 0
+        if not line[prefix.end() if prefix else 0:].strip():
+            depth = None
+            continue
+        if depth is None or line_depth != depth:
+            blocks.append([])
+        blocks[-1].append(line)
+        depth = line_depth
+
+    paragraphs = []
+    for lines in blocks:
+        text = "\n".join(lines)
+        digest = hashlib.blake2b(_normalize(text).encode("utf-8"), digest_size=8).hexdigest()
+        paragraphs.append((digest, text.strip()))
+    return paragraphs
+
+
+def content_hash(sender: str, body: str, subject: str = "", date: str = "") -> str:
+    """
+    Identity of an email without a Message-ID (re-sends of the same payload).
+    Subject and date are part of it so a recurring email ("weekly status
+    report by Friday") is a new email each time it is sent.
+    """
+    address = parseaddr(sender)[1].lower() or sender.strip().lower()
+    key = f"{address}\n{_normalize(subject or '')}\n{(date or '').strip()}\n{_normalize(body)}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class IngestIndex:
+    """
+    Bounded in-memory index of ingested emails, backed by a JSONL log.
+    Every check() and record() first reads what other processes appended, under
+    an flock on "<log>.lock", so web workers see each other's emails.
+    """
+
+    def __init__(self, file_path: Optional[str] = None, max_entries: Optional[int] = None):
+        self.file_path = file_path or os.getenv("INGEST_INDEX_PATH", DEFAULT_INDEX_PATH)
+        self.lock_path = f"{self.file_path}.lock"
+        self.max_entries = max_entries or int(os.getenv("INGEST_INDEX_MAX_ENTRIES", 50000))
+        # key (Message-ID, or "#" + content hash) -> {"hash", "paragraphs"}; oldest first
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._hashes: Dict[str, str] = {}
+        # key -> reservation time, for emails some worker is still extracting
+        self._reserved: Dict[str, float] = {}
+        # How far this process has read the log (a compaction replaces the file)
+        self._inode = None
+        self._offset = 0
+        self._partial_tail = False
+        self._log_lines = 0
+        self._lock = threading.Lock()
+        with self._locked():
+            self._refresh()
+
+    @contextmanager
+    def _locked(self):
+        """Hold the thread lock and an exclusive flock on the log (opened per call: fork-safe)."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(os.path.dirname(self.lock_path) or ".", exist_ok=True)
+            with open(self.lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _reset(self) -> None:
+        self._entries.clear()
+        self._hashes.clear()
+        self._reserved.clear()
+        self._inode = None
+        self._offset = 0
+        self._partial_tail = False
+        self._log_lines = 0
+
+    def _refresh(self) -> None:
+        """Apply log lines appended since the last read (caller holds the lock)."""
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            if self._inode is not None:
+                self._reset()
+            return
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            # First read, or another process compacted the log: read it from the start
+            self._reset()
+            self._inode = stat.st_ino
+        if stat.st_size == self._offset:
+            return
+        with open(self.file_path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        complete = data.rfind(b"\n") + 1
+        for line in data[:complete].splitlines():
+            try:
+                self._apply(json.loads(line))
+            except (ValueError, KeyError, TypeError):
+                continue  # torn line left by a crash
+            self._log_lines += 1
+        self._offset += complete
+        self._partial_tail = complete < len(data)
+
+    def _apply(self, record: Dict) -> None:
+        key = record["key"]
+        if "reserved" in record:
+            self._reserved[key] = record["reserved"]
+        elif record.get("released"):
+            self._reserved.pop(key, None)
+        else:
+            self._add(key, record["hash"], record.get("paragraphs", []))
+            self._reserved.pop(key, None)
+
+    def _append(self, record: Dict) -> None:
+        """Append one record to the log (caller holds the lock and has refreshed)."""
+        # A torn line from a crash must not swallow this one
+        line = ("\n" if self._partial_tail else "") + json.dumps(record) + "\n"
+        os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+        with open(self.file_path, "ab") as f:
+            f.write(line.encode("utf-8"))
+        if self._inode is None:
+            self._inode = os.stat(self.file_path).st_ino
+        self._offset += len(line.encode("utf-8"))
+        self._partial_tail = False
+        self._log_lines += 1
+
+    def _add(self, key: str, digest: str, paragraphs: List[str]) -> None:
+        self._entries.pop(key, None)
+        self._entries[key] = {"hash": digest, "paragraphs": paragraphs}
+        self._hashes[digest] = key
+        while len(self._entries) > self.max_entries:
+            old_key, old = self._entries.popitem(last=False)
+            if self._hashes.get(old["hash"]) == old_key:
+                del self._hashes[old["hash"]]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _in_progress(self, key: str) -> bool:
+        reserved_at = self._reserved.get(key)
+        return reserved_at is not None and reserved_at > time.time() - RESERVATION_SECONDS
+
+    def check(self, sender: str, body: str, headers: Optional[Dict] = None,
+              subject: str = "", received_at: Optional[str] = None) -> Dict:
+        """
+        Decide how to ingest an email before any extraction work.
+        Returns {"skip": None | "message_id" | "content_hash" | "in_progress" | "no_new_content",
+                 "body": body to extract (quoted thread paragraphs removed),
+                 "key": Message-ID, or "#" + content hash for mail without one, ...}.
+        An email to extract is reserved until record() (once its tasks are
+        stored) or release() (on failure); meanwhile re-deliveries are skipped
+        as "in_progress".
+        """
+        message_id = header_value(headers, "Message-ID").strip()
+        date = header_value(headers, "Date") or (received_at if isinstance(received_at, str) else "")
+        digest = content_hash(sender, body, subject, date)
+        parents = parse_message_ids(header_value(headers, "In-Reply-To")) + \
+            parse_message_ids(header_value(headers, "References"))
+        paragraphs = split_paragraphs(body)
+        check = {
+            "skip": None,
+            "body": body,
+            "message_id": message_id,
+            "hash": digest,
+            "key": message_id or f"#{digest}",
+            "paragraphs": [paragraph_hash for paragraph_hash, _ in paragraphs[:MAX_PARAGRAPHS]],
+            "trimmed": 0,
+            "reserved": False
+        }
+
+        known = set()
+        with self._locked():
+            self._refresh()
+            if message_id and message_id in self._entries:
+                check["skip"] = "message_id"
+            elif not message_id and check["hash"] in self._hashes:
+                # With a Message-ID, the ID alone decides whether it is a new email
+                check["skip"] = "content_hash"
+            elif self._in_progress(check["key"]):
+                check["skip"] = "in_progress"
+            else:
+                for parent in parents:
+                    entry = self._entries.get(parent)
+                    if entry is not None:
+                        known.update(entry["paragraphs"])
+                now = time.time()
+                self._reserved[check["key"]] = now
+                self._append({"key": check["key"], "reserved": now})
+                check["reserved"] = True
+
+        if known:
+            new_paragraphs = [text for digest, text in paragraphs if digest not in known]
+            check["trimmed"] = len(paragraphs) - len(new_paragraphs)
+            if check["trimmed"]:
+                THREAD_TRIMMED.inc(check["trimmed"])
+                check["body"] = "\n\n".join(new_paragraphs)
+            if all(_ATTRIBUTION.match(text) for text in new_paragraphs):
+                check["skip"] = "no_new_content"
+
+        if check["skip"]:
+            INGEST_SKIPS.inc(reason=check["skip"])
+        return check
+
+    def record(self, check: Dict) -> None:
+        """Remember a processed email (the dict returned by check()) and release its reservation."""
+        if not check["reserved"]:
+            return
+        key = check["key"]
+        # Paragraphs are only looked up through Message-IDs (In-Reply-To / References)
+        paragraphs = check["paragraphs"] if check["message_id"] else []
+        with self._locked():
+            self._refresh()
+            self._add(key, check["hash"], paragraphs)
+            self._reserved.pop(key, None)
+            self._append({"key": key, "hash": check["hash"], "paragraphs": paragraphs, "at": time.time()})
+            check["reserved"] = False
+            if self._log_lines > 2 * self.max_entries:
+                self._compact()
+
+    def release(self, check: Dict) -> None:
+        """Give up a reservation without recording (extraction or storing failed); no-op after record()."""
+        if not check["reserved"]:
+            return
+        with self._locked():
+            self._refresh()
+            self._reserved.pop(check["key"], None)
+            self._append({"key": check["key"], "released": True})
+            check["reserved"] = False
+
+    def _compact(self) -> None:
+        """Rewrite the log with the entries and live reservations in memory (caller holds the lock)."""
+        temp_path = f"{self.file_path}.{os.getpid()}.tmp"
+        expired = time.time() - RESERVATION_SECONDS
+        lines = 0
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for key, entry in self._entries.items():
+                f.write(json.dumps({"key": key, "hash": entry["hash"], "paragraphs": entry["paragraphs"]}) + "\n")
+                lines += 1
+            for key, reserved_at in self._reserved.items():
+                if reserved_at > expired:
+                    f.write(json.dumps({"key": key, "reserved": reserved_at}) + "\n")
+                    lines += 1
+        os.replace(temp_path, self.file_path)
+        self._reserved = {key: at for key, at in self._reserved.items() if at > expired}
+        stat = os.stat(self.file_path)
+        self._inode, self._offset, self._partial_tail = stat.st_ino, stat.st_size, False
+        self._log_lines = lines
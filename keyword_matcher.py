@@ -0,0 +1,51 @@
+"""
+Keyword Matcher Module
+Precompiled multi-pattern keyword matching with word boundaries.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Hashable, Iterable
+
+
+def compile_keyword_pattern(keywords: Iterable[str], suffix: str = r"(?:s|es)?") -> "re.Pattern":
+    """
+    Build a single alternation regex matching any keyword as a whole word.
+    Longer keywords are tried first so phrases win over their prefixes.
+    Multi-word keywords match across any run of whitespace.
+    """
+    alternatives = sorted({" ".join(k.lower().split()) for k in keywords if k.strip()}, key=len, reverse=True)
+    if not alternatives:
+        # Pattern that never matches
+        return re.compile(r"(?!x)x")
+    body = "|".join(re.escape(k).replace(r"\ ", r"\s+") for k in alternatives)
+    return re.compile(rf"\b({body}){suffix}\b", re.IGNORECASE)
+
+
+class KeywordMatcher:
+    """
+    Matches text against several labelled keyword tables in a single pass.
+    Tables map a label (any hashable) to the keywords that imply it.
+    """
+
+    def __init__(self, tables: Dict[Hashable, Iterable[str]], cache_size: int = 4096):
+        """Compile all tables into one regex and a keyword -> labels lookup."""
+        self.labels_by_keyword: Dict[str, set] = {}
+        for label, keywords in tables.items():
+            for keyword in keywords:
+                normalized = " ".join(keyword.lower().split())
+                if normalized:
+                    self.labels_by_keyword.setdefault(normalized, set()).add(label)
+
+        self.pattern = compile_keyword_pattern(self.labels_by_keyword)
+        self.match = lru_cache(maxsize=cache_size)(self._match)
+
+    def _match(self, text: str) -> FrozenSet[Hashable]:
+        """Return every label whose keywords appear in text."""
+        if not text:
+            return frozenset()
+        labels = set()
+        for found in self.pattern.finditer(text):
+            keyword = " ".join(found.group(1).lower().split())
+            labels.update(self.labels_by_keyword.get(keyword, ()))
+        return frozenset(labels)
@@ -1,34 +1,75 @@
 """
 Kiro Hook for Email Processing
 Automatically triggers when email arrives and sends to ingestion endpoint.
+With a daemon running (python kiro_email_hook.py --daemon), each trigger only
+hands the email to the daemon over a local socket; the daemon batches emails
+into POST /ingest-emails over a pooled keep-alive session.
 """
 
+import os
 import sys
 import json
-import requests
-from typing import Dict, Optional
+import socket
+import urllib.error
+import urllib.request
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
+# The hook runs as a fresh process per email, so it sticks to the standard
+# library: importing requests alone costs more than the rest of the hook.
 
-def validate_email_payload(payload: Dict) -> bool:
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+API_BASE_URL = os.getenv('KIRO_API_URL', 'http://localhost:8000').rstrip('/')
+# Unix socket path, or tcp://127.0.0.1:PORT where Unix sockets are unavailable (Windows)
+DAEMON_ADDRESS = os.getenv('KIRO_HOOK_SOCKET') or (
+    os.path.join(BASE_DIR, 'data', 'kiro_hook.sock') if hasattr(socket, 'AF_UNIX') else 'tcp://127.0.0.1:8765'
+)
+DAEMON_BATCH_SIZE = int(os.getenv('KIRO_HOOK_BATCH_SIZE', 50))
+DAEMON_BATCH_WINDOW = float(os.getenv('KIRO_HOOK_BATCH_WINDOW', 0.5))
+DAEMON_QUEUE_SIZE = int(os.getenv('KIRO_HOOK_QUEUE_SIZE', 10000))
+DAEMON_RETRIES = int(os.getenv('KIRO_HOOK_RETRIES', 5))
+# --batch replay of NDJSON streams and mailbox exports
+REPLAY_BATCH_SIZE = int(os.getenv('KIRO_REPLAY_BATCH_SIZE', 100))
+REPLAY_CONCURRENCY = int(os.getenv('KIRO_REPLAY_CONCURRENCY', 4))
+REPLAY_EXTENSIONS = ('.eml', '.json', '.ndjson', '.jsonl')
+# Headers the API uses to skip newsletters, auto-replies and already-ingested mail
+FORWARDED_HEADERS = ['List-Unsubscribe', 'List-Id', 'Auto-Submitted', 'Precedence', 'X-Autoreply',
+                     'Message-ID', 'In-Reply-To', 'References']
+
+
+def payload_error(payload) -> Optional[str]:
     """
-    Ensure required fields are present: subject, body, sender.
-    Returns True if valid, False otherwise.
+    Check required fields: subject, body, sender.
+    Returns the reason the payload is invalid, or None if it is valid.
     """
+    if not isinstance(payload, dict):
+        return "Email payload must be a JSON object"
+    
     required_fields = ['subject', 'body', 'sender']
     
     for field in required_fields:
         if field not in payload:
-            print(f"Error: Missing required field '{field}' in email payload")
-            return False
+            return f"Missing required field '{field}' in email payload"
         
         if not payload[field] or not isinstance(payload[field], str):
-            print(f"Error: Field '{field}' must be a non-empty string")
-            return False
+            return f"Field '{field}' must be a non-empty string"
+    
+    return None
+
+
+def validate_email_payload(payload: Dict) -> bool:
+    """
+    Ensure required fields are present: subject, body, sender.
+    Returns True if valid, False otherwise.
+    """
+    error = payload_error(payload)
+    if error:
+        print(f"Error: {error}")
+        return False
     
     return True
 
 
-def send_to_ingestion_endpoint(payload: Dict, endpoint_url: str = "http://localhost:8000/ingest-email") -> Optional[Dict]:
+def send_to_ingestion_endpoint(payload: Dict, endpoint_url: str = f"{API_BASE_URL}/ingest-email") -> Optional[Dict]:
     """
     POST email payload to Flask ingestion endpoint.
     Returns response data if successful, None otherwise.
@@ -38,36 +79,443 @@ def send_to_ingestion_endpoint(payload: Dict, endpoint_url: str = "http://localh
         print(f"Subject: {payload['subject']}")
         print(f"Sender: {payload['sender']}")
         
-        response = requests.post(
+        request = urllib.request.Request(
             endpoint_url,
-            json=payload,
+            data=json.dumps(payload).encode('utf-8'),
             headers={'Content-Type': 'application/json'},
-            timeout=30
+            method='POST'
         )
         
-        if response.status_code == 200:
-            data = response.json()
-            print(f"✓ Success: {data.get('message', 'Email processed')}")
-            print(f"  Tasks added: {data.get('added', 0)}")
-            print(f"  Duplicates: {data.get('duplicates', 0)}")
-            return data
-        else:
-            print(f"✗ Error: Server returned status {response.status_code}")
-            print(f"  Response: {response.text}")
-            return None
+        with urllib.request.urlopen(request, timeout=30) as response:
+            data = json.loads(response.read().decode('utf-8'))
+        
+        print(f"✓ Success: {data.get('message', 'Email processed')}")
+        print(f"  Tasks added: {data.get('added', 0)}")
+        print(f"  Duplicates: {data.get('duplicates', 0)}")
+        return data
             
-    except requests.exceptions.ConnectionError:
-        print("✗ Error: Could not connect to Flask server")
-        print("  Make sure the server is running on port 8000")
+    except urllib.error.HTTPError as e:
+        print(f"✗ Error: Server returned status {e.code}")
+        print(f"  Response: {e.read().decode('utf-8', errors='replace')}")
         return None
-    except requests.exceptions.Timeout:
+    except (socket.timeout, TimeoutError):
         print("✗ Error: Request timed out")
         return None
+    except urllib.error.URLError as e:
+        if isinstance(e.reason, (socket.timeout, TimeoutError)):
+            print("✗ Error: Request timed out")
+        else:
+            print("✗ Error: Could not connect to Flask server")
+            print("  Make sure the server is running on port 8000")
+        return None
     except Exception as e:
         print(f"✗ Error: {str(e)}")
         return None
 
 
+def _build_session(retries: int, pool_size: int = 2):
+    """
+    Keep-alive session with retries for the daemon and --batch mode.
+    requests is imported here rather than at module level to keep single hook calls fast.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    
+    # Ingestion is idempotent (duplicates are detected), so retrying a POST is safe.
+    # 503 + Retry-After is what the server answers while draining for a restart.
+    retry = Retry(
+        total=retries,
+        backoff_factor=0.5,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=frozenset(['POST']),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _parse_address(address: str):
+    """(family, sockaddr) for a Unix socket path or tcp://host:port."""
+    if address.startswith('tcp://'):
+        host, _, port = address[len('tcp://'):].rpartition(':')
+        return socket.AF_INET, (host or '127.0.0.1', int(port))
+    if not hasattr(socket, 'AF_UNIX'):
+        raise ValueError("Unix sockets are not available here; use KIRO_HOOK_SOCKET=tcp://127.0.0.1:PORT")
+    return socket.AF_UNIX, address
+
+
+def send_to_daemon(payload: Dict, address: str = DAEMON_ADDRESS, timeout: float = 2.0) -> bool:
+    """
+    Hand the email to a running hook daemon.
+    Returns True if the daemon queued it, False if no daemon is listening or it refused.
+    """
+    try:
+        family, sockaddr = _parse_address(address)
+        with socket.socket(family, socket.SOCK_STREAM) as conn:
+            conn.settimeout(timeout)
+            conn.connect(sockaddr)
+            conn.sendall(json.dumps(payload).encode('utf-8') + b'\n')
+            conn.shutdown(socket.SHUT_WR)
+            reply = conn.makefile('rb').readline()
+        result = json.loads(reply) if reply else {}
+    except (OSError, ValueError):
+        # No daemon (missing socket, connection refused) or it went away mid-reply
+        return False
+    
+    if result.get('success'):
+        print(f"✓ Queued with hook daemon ({result.get('queued', 0)} pending)")
+        return True
+    print(f"Hook daemon refused email: {result.get('error', 'no reply')}")
+    return False
+
+
+class HookDaemon:
+    """
+    Long-running receiver for hook events.
+    Accepts newline-delimited JSON emails on a local socket, validates them and
+    forwards them to POST /ingest-emails in batches over a keep-alive session
+    with retries. Batches that still fail are appended to failed_path.
+    """
+    
+    def __init__(self, address: str = DAEMON_ADDRESS, api_base_url: str = API_BASE_URL,
+                 batch_size: int = DAEMON_BATCH_SIZE, batch_window: float = DAEMON_BATCH_WINDOW,
+                 queue_size: int = DAEMON_QUEUE_SIZE, retries: int = DAEMON_RETRIES,
+                 failed_path: Optional[str] = None):
+        import queue
+        
+        self.address = address
+        self.batch_url = f"{api_base_url.rstrip('/')}/ingest-emails"
+        self.batch_size = max(1, batch_size)
+        self.batch_window = batch_window
+        self.failed_path = (failed_path or os.getenv('KIRO_HOOK_FAILED_PATH')
+                            or os.path.join(BASE_DIR, 'data', 'kiro_hook_failed.jsonl'))
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.session = _build_session(retries)
+        self.server = None
+    
+    def submit(self, payload) -> Dict:
+        """Validate and enqueue one email; the reply is sent back to the hook client."""
+        import queue
+        
+        error = payload_error(payload)
+        if error:
+            return {"success": False, "error": error}
+        try:
+            self.queue.put_nowait(payload)
+        except queue.Full:
+            return {"success": False, "error": "Daemon queue is full"}
+        return {"success": True, "queued": self.queue.qsize()}
+    
+    def _next_batch(self) -> Optional[List[Dict]]:
+        """Block for the first email, then gather more for up to batch_window seconds. None means stop."""
+        import queue
+        import time
+        
+        first = self.queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Forward what we have, then stop on the next call
+                self.queue.put(None)
+                break
+            batch.append(item)
+        return batch
+    
+    def _run_batcher(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self.forward(batch)
+    
+    def forward(self, batch: List[Dict]) -> bool:
+        """POST one batch to /ingest-emails; on failure keep the emails in failed_path."""
+        import requests
+        
+        try:
+            response = self.session.post(self.batch_url, json={"emails": batch}, timeout=120)
+            if response.status_code == 200:
+                data = response.json()
+                print(f"✓ Forwarded {len(batch)} emails: {data.get('added', 0)} tasks added, "
+                      f"{data.get('duplicates', 0)} duplicates")
+                for error in data.get('errors', []):
+                    print(f"  ✗ Email {error.get('index')}: {error.get('error')}")
+                return True
+            print(f"✗ Error: Server returned status {response.status_code} for a batch of {len(batch)} emails")
+            print(f"  Response: {response.text[:500]}")
+        except requests.RequestException as e:
+            print(f"✗ Error: Could not forward a batch of {len(batch)} emails: {str(e)}")
+        
+        self._save_failed(batch)
+        return False
+    
+    def _save_failed(self, batch: List[Dict]) -> None:
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.failed_path)), exist_ok=True)
+            with open(self.failed_path, 'a', encoding='utf-8') as f:
+                for email in batch:
+                    f.write(json.dumps(email) + '\n')
+            print(f"  Saved {len(batch)} emails to {self.failed_path}")
+        except OSError as e:
+            print(f"✗ Error: Could not save failed emails: {str(e)}")
+    
+    def _make_server(self):
+        import socketserver
+        
+        daemon = self
+        
+        class EventHandler(socketserver.StreamRequestHandler):
+            """One JSON email per line; one JSON reply per line."""
+            
+            def handle(self):
+                for line in self.rfile:
+                    if not line.strip():
+                        continue
+                    try:
+                        reply = daemon.submit(json.loads(line))
+                    except ValueError:
+                        reply = {"success": False, "error": "Invalid JSON"}
+                    self.wfile.write(json.dumps(reply).encode('utf-8') + b'\n')
+        
+        class TCPServer(socketserver.ThreadingTCPServer):
+            allow_reuse_address = True
+            daemon_threads = True
+        
+        family, sockaddr = _parse_address(self.address)
+        if family == socket.AF_INET:
+            return TCPServer(sockaddr, EventHandler)
+        
+        self._remove_stale_socket(sockaddr)
+        server = socketserver.ThreadingUnixStreamServer(sockaddr, EventHandler)
+        server.daemon_threads = True
+        # Only the owning user may submit emails
+        os.chmod(sockaddr, 0o600)
+        return server
+    
+    @staticmethod
+    def _remove_stale_socket(path: str) -> None:
+        """Refuse to start twice; clean up the socket file left by a killed daemon."""
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            return
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(path)
+            except OSError:
+                os.unlink(path)
+                return
+        raise RuntimeError(f"Another hook daemon is already listening on {path}")
+    
+    def serve_forever(self) -> None:
+        """Run until interrupted (Ctrl+C / SIGTERM), then forward everything still queued."""
+        import signal
+        import threading
+        
+        def handle_stop(signum, frame):
+            raise KeyboardInterrupt
+        
+        if hasattr(signal, 'SIGTERM'):
+            signal.signal(signal.SIGTERM, handle_stop)
+        
+        self.server = self._make_server()
+        batcher = threading.Thread(target=self._run_batcher, name='kiro-hook-batcher', daemon=True)
+        batcher.start()
+        print(f"✓ Kiro hook daemon listening on {self.address}")
+        print(f"  Forwarding batches of up to {self.batch_size} emails to {self.batch_url}")
+        try:
+            self.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.server.server_close()
+            if not self.address.startswith('tcp://') and os.path.exists(self.address):
+                os.unlink(self.address)
+            print(f"Stopping hook daemon, forwarding {self.queue.qsize()} queued emails...")
+            self.queue.put(None)
+            batcher.join()
+            self.session.close()
+            print("✓ Hook daemon stopped")
+
+
+def load_eml(path: str) -> Dict:
+    """Email payload (subject, body, sender, received_at, triage headers) from an .eml file."""
+    from email import policy
+    from email.parser import BytesParser
+    from mime_body import extract_body
+    
+    with open(path, 'rb') as f:
+        msg = BytesParser(policy=policy.default).parse(f)
+    
+    payload = {
+        "subject": str(msg.get('Subject', '')),
+        "body": extract_body(msg),
+        "sender": str(msg.get('From', ''))
+    }
+    if msg.get('Date'):
+        payload["received_at"] = str(msg['Date'])
+    headers = {name: str(msg[name]) for name in FORWARDED_HEADERS if msg[name] is not None}
+    if headers:
+        payload["headers"] = headers
+    return payload
+
+
+def _iter_ndjson(lines: Iterable[str], name: str) -> Iterator[Tuple[str, Optional[Dict], Optional[str]]]:
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield f"{name}:{number}", json.loads(line), None
+        except ValueError:
+            yield f"{name}:{number}", None, "Invalid JSON"
+
+
+def _iter_file(path: str) -> Iterator[Tuple[str, Optional[Dict], Optional[str]]]:
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        if extension == '.eml':
+            yield path, load_eml(path), None
+        elif extension in ('.ndjson', '.jsonl'):
+            with open(path, 'r', encoding='utf-8') as f:
+                yield from _iter_ndjson(f, path)
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, list):
+                for index, item in enumerate(data):
+                    yield f"{path}[{index}]", item, None
+            else:
+                yield path, data, None
+    except (OSError, ValueError) as e:
+        yield path, None, str(e)
+
+
+def iter_records(source: str) -> Iterator[Tuple[str, Optional[Dict], Optional[str]]]:
+    """
+    Stream (label, payload, error) records from NDJSON on stdin ('-'), an
+    NDJSON/JSON/.eml file, or a directory tree of such files (in name order).
+    JSON files may hold one email or a list of emails.
+    """
+    if source == '-':
+        yield from _iter_ndjson(sys.stdin, 'stdin')
+    elif os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(REPLAY_EXTENSIONS):
+                    yield from _iter_file(os.path.join(root, name))
+    else:
+        yield from _iter_file(source)
+
+
+def send_batches(records: Iterable[Tuple[str, Optional[Dict], Optional[str]]],
+                 api_base_url: str = API_BASE_URL, batch_size: int = REPLAY_BATCH_SIZE,
+                 concurrency: int = REPLAY_CONCURRENCY, retries: int = DAEMON_RETRIES) -> Dict:
+    """
+    Validate records as they stream in and POST them to /ingest-emails in
+    batches, with at most `concurrency` batches in flight over one session.
+    Returns a summary with counts, throughput and per-record failures.
+    """
+    import time
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+    import requests
+    
+    batch_url = f"{api_base_url.rstrip('/')}/ingest-emails"
+    batch_size = max(1, batch_size)
+    concurrency = max(1, concurrency)
+    session = _build_session(retries, pool_size=concurrency)
+    summary = {"records": 0, "submitted": 0, "accepted": 0, "added": 0, "duplicates": 0, "failures": []}
+    
+    def post(batch: List[Tuple[str, Dict]]):
+        try:
+            response = session.post(batch_url, json={"emails": [payload for _, payload in batch]}, timeout=300)
+            if response.status_code != 200:
+                return batch, None, f"Server returned status {response.status_code}: {response.text[:200]}"
+            return batch, response.json(), None
+        except (requests.RequestException, ValueError) as e:
+            return batch, None, str(e)
+    
+    def collect(done) -> None:
+        for future in done:
+            batch, data, error = future.result()
+            if error:
+                summary["failures"].extend((label, error) for label, _ in batch)
+                continue
+            for item in data.get('errors', []):
+                summary["failures"].append((batch[item['index']][0], item.get('error')))
+            summary["accepted"] += data.get('emails', 0)
+            summary["added"] += data.get('added', 0)
+            summary["duplicates"] += data.get('duplicates', 0)
+    
+    start = time.perf_counter()
+    pending = set()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        def submit(batch):
+            nonlocal pending
+            # Stop reading input while the API is busy, so memory stays bounded
+            if len(pending) >= concurrency:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(executor.submit(post, batch))
+            summary["submitted"] += len(batch)
+        
+        batch = []
+        for label, payload, error in records:
+            summary["records"] += 1
+            error = error or payload_error(payload)
+            if error:
+                summary["failures"].append((label, error))
+                continue
+            batch.append((label, payload))
+            if len(batch) >= batch_size:
+                submit(batch)
+                batch = []
+        if batch:
+            submit(batch)
+        collect(wait(pending)[0])
+    
+    session.close()
+    summary["elapsed"] = time.perf_counter() - start
+    return summary
+
+
+def print_batch_summary(summary: Dict, max_failures: int = 50) -> None:
+    elapsed = summary["elapsed"]
+    rate = summary["records"] / elapsed if elapsed > 0 else 0.0
+    print("=" * 60)
+    print("Batch Summary")
+    print("=" * 60)
+    print(f"Records read:  {summary['records']}")
+    print(f"Submitted:     {summary['submitted']}")
+    print(f"Accepted:      {summary['accepted']}")
+    print(f"Tasks added:   {summary['added']}")
+    print(f"Duplicates:    {summary['duplicates']}")
+    print(f"Failed:        {len(summary['failures'])}")
+    print(f"Elapsed:       {elapsed:.2f}s ({rate:.1f} records/s)")
+    
+    failures = summary["failures"]
+    if failures:
+        print("\nFailures:")
+        for label, error in failures[:max_failures]:
+            print(f"  ✗ {label}: {error}")
+        if len(failures) > max_failures:
+            print(f"  ... and {len(failures) - max_failures} more")
+
+
 def on_email_received(email_payload: Dict) -> bool:
     """
     Main hook entry point.
@@ -85,6 +533,10 @@ def on_email_received(email_payload: Dict) -> bool:
     
     print("✓ Payload validated")
     
+    # Hand off to the hook daemon when one is running, otherwise post directly
+    if send_to_daemon(email_payload):
+        return True
+    
     # Send to ingestion endpoint
     result = send_to_ingestion_endpoint(email_payload)
     
@@ -100,11 +552,41 @@ def main():
     """
     CLI entry point for testing the hook.
     Accepts JSON payload from stdin or command line argument.
+    With --daemon, runs the batching hook daemon instead; with --batch,
+    replays NDJSON from stdin or a file/directory of emails.
     """
-    if len(sys.argv) > 1:
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Send emails to the task extraction API")
+    parser.add_argument('payload', nargs='?', help="JSON email payload (default: read from stdin)")
+    parser.add_argument('--daemon', action='store_true', help="run the batching hook daemon")
+    parser.add_argument('--batch', nargs='?', const='-', metavar='PATH',
+                        help="replay NDJSON from stdin, or an NDJSON/JSON/.eml file or directory")
+    parser.add_argument('--batch-size', type=int, default=REPLAY_BATCH_SIZE)
+    parser.add_argument('--concurrency', type=int, default=REPLAY_CONCURRENCY)
+    args = parser.parse_args()
+    
+    if args.daemon:
+        try:
+            HookDaemon().serve_forever()
+        except (RuntimeError, OSError, ValueError) as e:
+            print(f"✗ Error: {str(e)}")
+            sys.exit(1)
+        sys.exit(0)
+    
+    if args.batch:
+        if args.batch != '-' and not os.path.exists(args.batch):
+            print(f"Error: {args.batch} not found")
+            sys.exit(1)
+        summary = send_batches(iter_records(args.batch), batch_size=args.batch_size,
+                               concurrency=args.concurrency)
+        print_batch_summary(summary)
+        sys.exit(1 if summary["failures"] else 0)
+    
+    if args.payload:
         # Read from command line argument
         try:
-            payload = json.loads(sys.argv[1])
+            payload = json.loads(args.payload)
         except json.JSONDecodeError:
             print("Error: Invalid JSON in command line argument")
             sys.exit(1)
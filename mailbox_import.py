@@ -0,0 +1,301 @@
+"""
+Mailbox Import Module
+Offline backfill from mbox files, Maildir folders and .eml files. Messages are
+streamed in batches (memory stays flat however large the export is), parsed and
+extracted across worker processes, and stored with one TaskStore write per
+batch. A checkpoint file records progress so an interrupted import resumes
+where it stopped.
+
+Usage: python mailbox_import.py PATH [--format auto|mbox|maildir|eml] [--batch-size 500]
+                                     [--workers N] [--checkpoint FILE] [--restart] [--no-llm]
+"""
+
+import argparse
+import email
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from email_headers import decode_email_subject, get_api_headers
+from mime_body import extract_body
+
+BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 500))
+IMPORT_WORKERS = int(os.getenv('IMPORT_WORKERS', os.cpu_count() or 1))
+CHECKPOINT_DIR = os.getenv('IMPORT_CHECKPOINT_DIR', 'data/import_checkpoints')
+
+FORMATS = ('mbox', 'maildir', 'eml')
+
+
+def detect_format(path: str) -> str:
+    """mbox for a plain file, eml for a .eml file or folder of them, maildir for cur/new folders."""
+    if os.path.isdir(path):
+        if os.path.isdir(os.path.join(path, 'cur')) or os.path.isdir(os.path.join(path, 'new')):
+            return 'maildir'
+        return 'eml'
+    if path.lower().endswith('.eml'):
+        return 'eml'
+    return 'mbox'
+
+
+def iter_mbox(path: str, offset: int = 0) -> Iterator[Tuple[int, bytes]]:
+    """
+    Stream (end offset, raw message) from an mbox file, starting at a byte offset.
+    Reads line by line instead of indexing the whole file like mailbox.mbox does.
+    """
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        position = offset
+        lines: List[bytes] = []
+        previous_blank = True
+        for line in f:
+            if line.startswith(b'From ') and previous_blank:
+                if lines:
+                    yield position, b''.join(lines)
+                lines = []
+            elif line.startswith(b'>') and line.lstrip(b'>').startswith(b'From '):
+                # Undo the ">From " escaping of body lines (mboxrd; mboxo as far as it can be)
+                lines.append(line[1:])
+            else:
+                lines.append(line)
+            position += len(line)
+            previous_blank = not line.strip()
+        if lines:
+            yield position, b''.join(lines)
+
+
+def _iter_files(paths: Iterator[str], root: str, after: Optional[str]) -> Iterator[Tuple[str, bytes]]:
+    for path in paths:
+        key = os.path.relpath(path, root)
+        if after is not None and key <= after:
+            continue
+        with open(path, 'rb') as f:
+            yield key, f.read()
+
+
+def iter_maildir(path: str, after: Optional[str] = None) -> Iterator[Tuple[str, bytes]]:
+    """Stream (key, raw message) from a Maildir's cur/ and new/ folders, in name order."""
+    def paths():
+        for folder in ('cur', 'new'):
+            directory = os.path.join(path, folder)
+            if os.path.isdir(directory):
+                for name in sorted(os.listdir(directory)):
+                    if not name.startswith('.'):
+                        yield os.path.join(directory, name)
+    return _iter_files(paths(), path, after)
+
+
+def iter_eml(path: str, after: Optional[str] = None) -> Iterator[Tuple[str, bytes]]:
+    """Stream (key, raw message) from one .eml file or a directory tree of them, in name order."""
+    if os.path.isfile(path):
+        return _iter_files(iter([path]), os.path.dirname(path) or '.', after)
+
+    def paths():
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith('.eml'):
+                    yield os.path.join(root, name)
+    return _iter_files(paths(), path, after)
+
+
+def parse_message(raw: bytes) -> Optional[Dict]:
+    """Email payload for TaskExtractor.extract_many, or None when there is nothing to extract from."""
+    msg = email.message_from_bytes(raw)
+    body = extract_body(msg)
+    if not body:
+        return None
+    payload = {
+        "subject": decode_email_subject(msg['subject']),
+        "body": body,
+        "sender": decode_email_subject(msg['from']) if msg['from'] else "unknown"
+    }
+    if msg['date']:
+        payload["received_at"] = str(msg['date'])
+    headers = get_api_headers(msg)
+    if headers:
+        payload["headers"] = headers
+    return payload
+
+
+def _parse_or_none(raw: bytes) -> Optional[Dict]:
+    # Worker processes must not die on one malformed message
+    try:
+        return parse_message(raw)
+    except Exception:
+        return None
+
+
+def default_checkpoint_path(source: str) -> str:
+    name = os.path.basename(os.path.normpath(source)) or 'mailbox'
+    return os.path.join(CHECKPOINT_DIR, f"{name}.checkpoint.json")
+
+
+def load_checkpoint(path: str, source: str, mailbox_format: str) -> Dict:
+    """Progress of an earlier run over the same source, or a fresh checkpoint."""
+    fresh = {
+        "source": os.path.abspath(source),
+        "format": mailbox_format,
+        "position": None,
+        "messages": 0,
+        "skipped": 0,
+        "tasks_added": 0,
+        "duplicates": 0,
+        "completed": False
+    }
+    if not os.path.exists(path):
+        return fresh
+    with open(path, 'r', encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    if checkpoint.get('source') != fresh['source'] or checkpoint.get('format') != mailbox_format:
+        raise ValueError(f"Checkpoint {path} belongs to {checkpoint.get('source')}; "
+                         f"use --checkpoint or --restart")
+    return checkpoint
+
+
+def save_checkpoint(path: str, checkpoint: Dict) -> None:
+    """Write atomically so a crash mid-write never corrupts the resume point."""
+    checkpoint["updated_at"] = datetime.utcnow().isoformat() + "Z"
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(temp_path, path)
+
+
+class MailboxImporter:
+    """Streams a mailbox through parse -> extract_many -> add_tasks in checkpointed batches."""
+
+    def __init__(self, source: str, mailbox_format: str = 'auto', task_store=None, task_extractor=None,
+                 batch_size: int = BATCH_SIZE, workers: int = IMPORT_WORKERS,
+                 checkpoint_path: Optional[str] = None):
+        self.source = source
+        self.format = detect_format(source) if mailbox_format == 'auto' else mailbox_format
+        if self.format not in FORMATS:
+            raise ValueError(f"Unknown mailbox format: {mailbox_format}")
+        self.task_store = task_store
+        self.task_extractor = task_extractor
+        self.batch_size = max(1, batch_size)
+        self.workers = max(1, workers)
+        self.checkpoint_path = checkpoint_path or default_checkpoint_path(source)
+
+    def _messages(self, position) -> Iterator[Tuple[object, bytes]]:
+        if self.format == 'mbox':
+            return iter_mbox(self.source, position or 0)
+        if self.format == 'maildir':
+            return iter_maildir(self.source, position)
+        return iter_eml(self.source, position)
+
+    def _batches(self, position) -> Iterator[List[Tuple[object, bytes]]]:
+        batch = []
+        for item in self._messages(position):
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def run(self, restart: bool = False) -> Dict:
+        """Import everything after the checkpoint; returns the final checkpoint."""
+        from concurrent.futures import ProcessPoolExecutor
+
+        if restart and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        checkpoint = load_checkpoint(self.checkpoint_path, self.source, self.format)
+        if checkpoint["completed"]:
+            print(f"✓ {self.source} was already imported ({checkpoint['messages']} messages); "
+                  f"use --restart to import again")
+            return checkpoint
+        if checkpoint["position"] is not None:
+            print(f"Resuming after {checkpoint['messages']} messages (checkpoint {self.checkpoint_path})")
+
+        start = time.perf_counter()
+        imported = 0
+        # Keyword extraction already runs in the extractor's process pool: parse there too
+        # rather than starting a second pool of the same size. LLM extraction uses threads.
+        if self.task_extractor.llm_enabled:
+            pool_context = ProcessPoolExecutor(max_workers=self.workers)
+        else:
+            pool_context = self.task_extractor.worker_pool(self.workers)
+        with pool_context as pool:
+            for batch in self._batches(checkpoint["position"]):
+                chunksize = max(1, len(batch) // (self.workers * 4))
+                parsed = list(pool.map(_parse_or_none, [raw for _, raw in batch], chunksize=chunksize))
+                payloads = [payload for payload in parsed if payload is not None]
+
+                results = self.task_extractor.extract_many(payloads, workers=self.workers)
+                added, duplicates = self.task_store.add_tasks([task for tasks in results for task in tasks])
+
+                # Only advance the checkpoint once the batch's tasks are on disk
+                checkpoint["position"] = batch[-1][0]
+                checkpoint["messages"] += len(batch)
+                checkpoint["skipped"] += len(batch) - len(payloads)
+                checkpoint["tasks_added"] += len(added)
+                checkpoint["duplicates"] += len(duplicates)
+                save_checkpoint(self.checkpoint_path, checkpoint)
+
+                imported += len(batch)
+                elapsed = time.perf_counter() - start
+                print(f"✓ {checkpoint['messages']} messages, {checkpoint['tasks_added']} tasks added "
+                      f"({imported / elapsed:.0f} messages/s)")
+
+        checkpoint["completed"] = True
+        save_checkpoint(self.checkpoint_path, checkpoint)
+        return checkpoint
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill tasks from mbox, Maildir or .eml exports")
+    parser.add_argument('path', help="mbox file, Maildir folder, .eml file or folder of .eml files")
+    parser.add_argument('--format', choices=('auto',) + FORMATS, default='auto')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help="messages per batch (and per store write)")
+    parser.add_argument('--workers', type=int, default=IMPORT_WORKERS,
+                        help="processes for parsing and extraction")
+    parser.add_argument('--store', default='data/tasks.json', help="task store file")
+    parser.add_argument('--checkpoint', help=f"progress file (default: {CHECKPOINT_DIR}/<name>.checkpoint.json)")
+    parser.add_argument('--restart', action='store_true', help="ignore the checkpoint and start over")
+    parser.add_argument('--no-llm', action='store_true', help="keyword extraction only (fast, no API cost)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"✗ Error: {args.path} not found")
+        sys.exit(1)
+
+    import components
+
+    try:
+        importer = MailboxImporter(
+            args.path,
+            mailbox_format=args.format,
+            task_store=components.store_at(args.store),
+            task_extractor=components.get_extractor(use_llm=not args.no_llm),
+            batch_size=args.batch_size,
+            workers=args.workers,
+            checkpoint_path=args.checkpoint
+        )
+        print(f"Importing {args.path} ({importer.format}) into {args.store}")
+        checkpoint = importer.run(restart=args.restart)
+    except (OSError, ValueError) as e:
+        print(f"✗ Error: {str(e)}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\nInterrupted; run the same command again to resume from the last checkpoint")
+        sys.exit(130)
+    finally:
+        components.shutdown()
+
+    print("=" * 60)
+    print("Import Summary")
+    print("=" * 60)
+    print(f"Messages:     {checkpoint['messages']}")
+    print(f"Skipped:      {checkpoint['skipped']} (no text body)")
+    print(f"Tasks added:  {checkpoint['tasks_added']}")
+    print(f"Duplicates:   {checkpoint['duplicates']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""
+MIME Body Module
+Extracts the readable body of an email in one walk of the MIME tree: the first
+inline text/plain part, else the first text/html part converted to text.
+Declared charsets are honoured (with fallbacks for mislabelled mail), and only
+as much of a part as the size cap needs is decoded, so a huge message is never
+held in memory as several full copies.
+"""
+
+import binascii
+import codecs
+import os
+import quopri
+import re
+from html.parser import HTMLParser
+from typing import List, Optional
+
+MAX_BODY_CHARS = int(os.getenv('MAX_BODY_CHARS', 100000))
+
+# HTML carries several bytes of markup per character of text
+HTML_BYTES_PER_CHAR = 8
+
+# Feed the HTML converter in chunks so it can stop as soon as the cap is reached
+HTML_CHUNK_CHARS = 64 * 1024
+
+# Labels mail clients commonly use for a superset encoding (as browsers treat them)
+CHARSET_ALIASES = {
+    "us-ascii": "utf-8",
+    "ascii": "utf-8",
+    "iso-8859-1": "cp1252",
+    "latin1": "cp1252",
+    "latin-1": "cp1252",
+    "gb2312": "gb18030",
+    "gbk": "gb18030",
+    "ks_c_5601-1987": "cp949",
+    "euc-kr": "cp949",
+    "shift_jis": "cp932",
+    "x-sjis": "cp932",
+    "unknown-8bit": "utf-8",
+    "x-unknown": "utf-8",
+}
+
+_BLOCK_TAGS = {"p", "div", "br", "tr", "li", "ul", "ol", "table", "h1", "h2", "h3", "h4", "h5", "h6",
+               "blockquote", "pre", "hr", "section", "article", "header", "footer", "dd", "dt"}
+_SKIP_TAGS = {"script", "style", "head", "title", "noscript", "template"}
+_BLANK_LINES = re.compile(r"\n[ \t]*(?:\n[ \t]*)+")
+_SPACES = re.compile(r"[ \t\r\f\v]+")
+
+
+class _TextCollector(HTMLParser):
+    """Streaming HTML-to-text converter that stops collecting at max_chars."""
+
+    def __init__(self, max_chars: int):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.chunks: List[str] = []
+        self.size = 0
+        self._skip_depth = 0
+        self._pre_depth = 0
+
+    @property
+    def full(self) -> bool:
+        return self.size >= self.max_chars
+
+    def _emit(self, text: str) -> None:
+        if not self.full:
+            self.chunks.append(text)
+            self.size += len(text)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "pre":
+            self._pre_depth += 1
+            self._emit("\n")
+        elif tag == "li":
+            self._emit("\n- ")
+        elif tag in _BLOCK_TAGS:
+            self._emit("\n")
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in _BLOCK_TAGS:
+            self._emit("\n")
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == "pre":
+            self._pre_depth = max(0, self._pre_depth - 1)
+            self._emit("\n")
+        elif tag in _BLOCK_TAGS and tag != "li":
+            # The next <li> starts its own line
+            self._emit("\n")
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if not self._pre_depth:
+            data = _SPACES.sub(" ", data.replace("\n", " "))
+        self._emit(data)
+
+    def text(self) -> str:
+        text = "".join(self.chunks).replace("\xa0", " ")
+        text = "\n".join(line.strip() for line in text.split("\n"))
+        return _BLANK_LINES.sub("\n\n", text).strip()[:self.max_chars].rstrip()
+
+
+def html_to_text(markup: str, max_chars: int = MAX_BODY_CHARS) -> str:
+    """Readable text of an HTML document (block tags become line breaks, list items dashes)."""
+    collector = _TextCollector(max_chars)
+    for start in range(0, len(markup), HTML_CHUNK_CHARS):
+        collector.feed(markup[start:start + HTML_CHUNK_CHARS])
+        if collector.full:
+            break
+    else:
+        collector.close()
+    return collector.text()
+
+
+def _decode_prefix(part, max_bytes: int) -> bytes:
+    """
+    Transfer-decode at most about max_bytes of a part's payload. base64 and
+    quoted-printable payloads are cut (at a line end) before decoding, so a
+    multi-megabyte part is never decoded in full just to be truncated.
+    """
+    encoding = str(part.get('Content-Transfer-Encoding', '')).strip().lower()
+    if encoding not in ("base64", "quoted-printable"):
+        # 7bit / 8bit / binary: the payload is the text itself, as the original bytes
+        return (part.get_payload(decode=True) or b"")[:max_bytes]
+
+    raw = part.get_payload(decode=False)
+    if not isinstance(raw, str):
+        return b""
+
+    if encoding == "base64":
+        # 4 encoded chars per 3 bytes, plus line breaks every 76 chars
+        limit = (max_bytes // 3 + 1) * 4 * 78 // 76 + 4
+        if len(raw) > limit:
+            raw = raw[:raw.rfind("\n", 0, limit) + 1] or raw[:limit - limit % 4]
+        try:
+            return binascii.a2b_base64(raw.encode("ascii", "ignore"))[:max_bytes]
+        except binascii.Error:
+            return (part.get_payload(decode=True) or b"")[:max_bytes]
+
+    # quoted-printable: an encoded byte takes at most 3 chars ("=XX")
+    limit = max_bytes * 3
+    if len(raw) > limit:
+        raw = raw[:raw.rfind("\n", 0, limit) + 1] or raw[:limit]
+    return quopri.decodestring(raw.encode("utf-8", "surrogateescape"))[:max_bytes]
+
+
+def _charset_candidates(declared: Optional[str]) -> List[str]:
+    candidates = []
+    if declared:
+        declared = declared.strip().strip('"').lower()
+        candidates.append(CHARSET_ALIASES.get(declared, declared))
+    candidates += ["utf-8", "cp1252"]
+    return list(dict.fromkeys(candidates))
+
+
+def decode_text(data: bytes, charset: Optional[str] = None) -> str:
+    """
+    Decode part bytes with the declared charset, falling back to UTF-8 and
+    then Windows-1252 when the label is unknown or wrong. A multibyte sequence
+    cut off by the size cap is dropped rather than replaced.
+    """
+    for candidate in _charset_candidates(charset):
+        try:
+            decoder = codecs.getincrementaldecoder(candidate)("strict")
+            return decoder.decode(data, final=False)
+        except (LookupError, UnicodeDecodeError):
+            continue
+    return data.decode("utf-8", "replace")
+
+
+def _is_attachment(part) -> bool:
+    return part.get_content_disposition() == "attachment" or \
+        (part.get_filename() is not None and part.get_content_disposition() != "inline")
+
+
+def find_body_parts(msg):
+    """(first inline text/plain part, first inline text/html part); either may be None."""
+    plain_part = html_part = None
+    for part in msg.walk():
+        if part.is_multipart() or _is_attachment(part):
+            continue
+        content_type = part.get_content_type()
+        if content_type == "text/plain" and plain_part is None:
+            plain_part = part
+        elif content_type == "text/html" and html_part is None:
+            html_part = part
+        if plain_part is not None and html_part is not None:
+            break
+    return plain_part, html_part
+
+
+def extract_body(msg, max_chars: int = MAX_BODY_CHARS) -> str:
+    """
+    Readable body of an email.message.Message (any policy): text/plain when
+    present, otherwise text/html converted to text; at most max_chars long.
+    """
+    plain_part, html_part = find_body_parts(msg)
+    if plain_part is not None:
+        # UTF-8 needs at most 4 bytes per character
+        data = _decode_prefix(plain_part, max_chars * 4)
+        text = decode_text(data, plain_part.get_content_charset())
+        body = text.replace("\r\n", "\n")[:max_chars].strip()
+        if body or html_part is None:
+            return body
+    if html_part is not None:
+        data = _decode_prefix(html_part, max_chars * HTML_BYTES_PER_CHAR)
+        return html_to_text(decode_text(data, html_part.get_content_charset()), max_chars)
+    return ""
@@ -0,0 +1,277 @@
+"""
+Model Router Module
+Sends extraction requests to a cheap, fast model first and escalates to the
+large model only when the cheap output is invalid or low confidence, or the
+email is long or complex. Records routing decisions, latency and cost per tier.
+"""
+
+import copy
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import metrics
+import tracing
+
+LLM_SECONDS = metrics.histogram("llm_request_duration_seconds", "LLM call latency", ["tier"])
+LLM_TOKENS = metrics.counter("llm_tokens_total", "LLM tokens used", ["tier", "kind"])
+LLM_ERRORS = metrics.counter("llm_errors_total", "Failed LLM calls", ["tier"])
+LLM_COST = metrics.counter("llm_cost_usd_total", "Estimated LLM spend in USD", ["tier"])
+LLM_ROUTES = metrics.counter("llm_routes_total", "Routing decisions", ["tier", "reason"])
+
+
+# Approximate USD per 1K tokens (prompt, completion); unknown models count as free
+MODEL_PRICING = {
+    "gpt-4": (0.03, 0.06),
+    "gpt-4-32k": (0.06, 0.12),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4o": (0.005, 0.015),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-3.5-turbo": (0.0015, 0.002),
+}
+
+SYSTEM_PROMPT = "You are a helpful assistant that extracts actionable tasks from emails. Always respond with valid JSON."
+
+REPAIR_PROMPT = """Your previous answer could not be used because it did not match the required schema.
+
+Problems:
+{errors}
+
+Previous answer:
+{output}
+
+Return the same tasks again, corrected so that they match the schema exactly."""
+
+# parse(output) -> (tasks, errors); tasks is None when the output is unusable
+ParseFn = Callable[[str], Tuple[Optional[List[Dict]], List[str]]]
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Cost of one call in USD, matching the longest known model-name prefix."""
+    matches = [name for name in MODEL_PRICING if model.startswith(name)]
+    if not matches:
+        return 0.0
+    prompt_price, completion_price = MODEL_PRICING[max(matches, key=len)]
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+
+class ModelRouter:
+    """Two-tier (fast -> large) LLM routing with per-tier accounting."""
+
+    def __init__(self, client, large_model: str, fast_model: Optional[str] = None,
+                 temperature: Optional[float] = None, max_tokens: Optional[int] = None,
+                 request_options: Optional[Dict] = None):
+        """
+        Configure tiers. fast_model defaults to LLM_FAST_MODEL; set it empty (or
+        equal to large_model) to send everything to the large model.
+        request_options (e.g. tools / tool_choice) are passed on every call.
+        """
+        self.client = client
+        self.request_options = request_options or {}
+        self.large_model = large_model
+        self.fast_model = fast_model if fast_model is not None else os.getenv("LLM_FAST_MODEL", "gpt-3.5-turbo")
+        if self.fast_model == self.large_model:
+            self.fast_model = ""
+        self.temperature = temperature if temperature is not None else float(os.getenv("LLM_TEMPERATURE", 0.7))
+        self.max_tokens = max_tokens if max_tokens is not None else int(os.getenv("LLM_MAX_TOKENS", 1000))
+
+        # Emails above this many body tokens, or with many candidate actions, skip the fast tier
+        self.max_fast_body_tokens = int(os.getenv("LLM_ROUTE_MAX_FAST_TOKENS", 800))
+        self.max_fast_actions = int(os.getenv("LLM_ROUTE_MAX_FAST_ACTIONS", 6))
+        # Fast-tier tasks reporting confidence below this are re-extracted by the large model
+        self.min_confidence = float(os.getenv("LLM_ROUTE_MIN_CONFIDENCE", 0.6))
+
+        # One router serves concurrent requests: counters change under this lock
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "tiers": {
+                tier: {"calls": 0, "errors": 0, "latency_s": 0.0, "prompt_tokens": 0,
+                       "completion_tokens": 0, "cost_usd": 0.0}
+                for tier in ("fast", "large")
+            },
+            "routes": {},
+            "repairs": {"attempted": 0, "succeeded": 0},
+        }
+
+    def stats_snapshot(self) -> Dict:
+        """A consistent copy of the routing statistics."""
+        with self._stats_lock:
+            return copy.deepcopy(self.stats)
+
+    def _add_stats(self, tier: str, **amounts) -> None:
+        with self._stats_lock:
+            tier_stats = self.stats["tiers"][tier]
+            for name, amount in amounts.items():
+                tier_stats[name] = tier_stats.get(name, 0) + amount
+
+    def complete(self, prompt: str, tier: str, **options) -> str:
+        """Run one chat completion on the given tier and record its latency, tokens and cost."""
+        model = self.fast_model if tier == "fast" else self.large_model
+        start = time.perf_counter()
+        try:
+            with tracing.span("llm.call", tier=tier, model=model) as span:
+                response = self.client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=self.temperature,
+                    max_tokens=self.max_tokens,
+                    **{**self.request_options, **options}
+                )
+                usage = getattr(response, "usage", None)
+                if usage is not None:
+                    span.set_attributes(prompt_tokens=usage.prompt_tokens,
+                                        completion_tokens=usage.completion_tokens)
+        except Exception:
+            self._add_stats(tier, errors=1)
+            LLM_ERRORS.inc(tier=tier)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self._add_stats(tier, calls=1, latency_s=elapsed)
+            LLM_SECONDS.observe(elapsed, tier=tier)
+
+        if usage is not None:
+            cost = estimate_cost(model, usage.prompt_tokens, usage.completion_tokens)
+            self._add_stats(tier, prompt_tokens=usage.prompt_tokens,
+                            completion_tokens=usage.completion_tokens, cost_usd=cost)
+            LLM_TOKENS.inc(usage.prompt_tokens, tier=tier, kind="prompt")
+            LLM_TOKENS.inc(usage.completion_tokens, tier=tier, kind="completion")
+            LLM_COST.inc(cost, tier=tier)
+        message = response.choices[0].message
+        # Structured output arrives as function-call arguments
+        tool_calls = getattr(message, "tool_calls", None)
+        if tool_calls:
+            return tool_calls[0].function.arguments or ""
+        return message.content or ""
+
+    def stream(self, prompt: str, tier: str) -> Iterator[str]:
+        """
+        Stream one chat completion on the given tier, yielding text deltas
+        (content or function-call argument fragments) as they arrive.
+        Streamed calls report no token usage, so only latency is recorded.
+        """
+        model = self.fast_model if tier == "fast" else self.large_model
+        start = time.perf_counter()
+        first_delta = None
+        try:
+            response = self.client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+                stream=True,
+                **self.request_options
+            )
+            for chunk in response:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                text = delta.content or ""
+                for tool_call in getattr(delta, "tool_calls", None) or []:
+                    if tool_call.function is not None and tool_call.function.arguments:
+                        text += tool_call.function.arguments
+                if text:
+                    if first_delta is None:
+                        first_delta = time.perf_counter() - start
+                    yield text
+        except Exception:
+            self._add_stats(tier, errors=1)
+            LLM_ERRORS.inc(tier=tier)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self._add_stats(tier, calls=1, latency_s=elapsed,
+                            **({"first_delta_s": first_delta} if first_delta is not None else {}))
+            LLM_SECONDS.observe(elapsed, tier=tier)
+
+    def pick_stream_tier(self, body_tokens: int = 0, action_count: int = 0) -> str:
+        """
+        Streamed tasks are used as they arrive, so there is no escalation;
+        choose the tier up front with the same long/complex rules as route().
+        """
+        reason = self._direct_large_reason(body_tokens, action_count)
+        tier = "fast" if reason is None else "large"
+        self._record_route(tier, f"stream:{reason or 'fast'}")
+        return tier
+
+    def route(self, prompt: str, parse: ParseFn, body_tokens: int = 0,
+              action_count: int = 0) -> Tuple[Optional[List[Dict]], Dict]:
+        """
+        Extract tasks for one prompt. parse turns raw model output into
+        (task list or None, validation errors). Returns (tasks or None, the
+        routing decision {"tier", "reason"}) for this call.
+        """
+        reason = self._direct_large_reason(body_tokens, action_count)
+        if reason is None:
+            try:
+                tasks = self._attempt(prompt, "fast", parse)
+            except Exception as e:
+                print(f"Fast model {self.fast_model} failed: {e}")
+                tasks, reason = None, "fast_error"
+            if reason is None:
+                reason = self._escalation_reason(tasks)
+            if reason is None:
+                return tasks, self._record_route("fast", "accepted")
+            print(f"Routing: escalating to {self.large_model} ({reason})")
+            decision = self._record_route("large", f"escalated:{reason}")
+        else:
+            decision = self._record_route("large", reason)
+
+        return self._attempt(prompt, "large", parse), decision
+
+    def _attempt(self, prompt: str, tier: str, parse: ParseFn) -> Optional[List[Dict]]:
+        """One extraction on a tier, plus a single cheap repair call if the output is invalid."""
+        output = self.complete(prompt, tier)
+        tasks, errors = parse(output)
+        if tasks is not None:
+            return tasks
+
+        with self._stats_lock:
+            self.stats["repairs"]["attempted"] += 1
+        repair_tier = "fast" if self.fast_model else "large"
+        print(f"Invalid LLM output ({len(errors)} problems), asking {repair_tier} model to repair it")
+        repair_prompt = REPAIR_PROMPT.format(
+            errors="\n".join(f"- {error}" for error in errors[:20]),
+            output=output[:4000]
+        )
+        tasks, _ = parse(self.complete(repair_prompt, repair_tier))
+        if tasks is not None:
+            with self._stats_lock:
+                self.stats["repairs"]["succeeded"] += 1
+        return tasks
+
+    def _direct_large_reason(self, body_tokens: int, action_count: int) -> Optional[str]:
+        """Why this email should skip the fast tier, or None to try it first."""
+        if not self.fast_model:
+            return "single_tier"
+        if body_tokens > self.max_fast_body_tokens:
+            return "long_email"
+        if action_count > self.max_fast_actions:
+            return "complex_email"
+        return None
+
+    def _escalation_reason(self, tasks: Optional[List[Dict]]) -> Optional[str]:
+        """Why fast-tier output is not good enough, or None to accept it."""
+        if tasks is None:
+            return "invalid_output"
+        for task in tasks:
+            if not isinstance(task, dict) or not str(task.get("description", "")).strip():
+                return "invalid_task"
+            confidence = task.get("confidence")
+            if isinstance(confidence, (int, float)) and confidence < self.min_confidence:
+                return "low_confidence"
+        return None
+
+    def _record_route(self, tier: str, reason: str) -> Dict:
+        with self._stats_lock:
+            routes = self.stats["routes"]
+            routes[reason] = routes.get(reason, 0) + 1
+        LLM_ROUTES.inc(tier=tier, reason=reason)
+        return {"tier": tier, "reason": reason}
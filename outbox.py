@@ -0,0 +1,236 @@
+"""
+Outbox Module
+Durable local queue for payloads that must reach the API. Each entry is a JSON
+file, so queued emails survive restarts. Worker threads send due entries with
+exponential backoff and move entries that keep failing to a dead-letter folder.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Optional, Set, Tuple
+
+import metrics
+
+# Outcomes returned by the send function
+SENT = "sent"
+RETRY = "retry"          # timeouts, connection errors, 5xx, 429: try again later
+REJECTED = "rejected"    # 4xx: retrying will not help, dead-letter right away
+
+OUTBOX_PENDING = metrics.gauge("outbox_pending", "Entries waiting in the outbox (incl. in flight)")
+OUTBOX_ATTEMPTS = metrics.counter("outbox_send_attempts_total", "Outbox send attempts", ["outcome"])
+OUTBOX_DEAD = metrics.counter("outbox_dead_letters_total", "Entries moved to the dead-letter folder")
+
+
+class Outbox:
+    """Persistent retry queue: enqueue() returns once the entry is on disk; workers deliver it."""
+
+    def __init__(self, directory: str, send: Callable[[Dict, Dict], Tuple[str, Optional[str]]],
+                 max_attempts: int = 8, base_delay: float = 5.0, max_delay: float = 600.0,
+                 concurrency: int = 4, on_sent: Optional[Callable[[Dict], None]] = None):
+        """
+        send(payload, headers) -> (SENT | RETRY | REJECTED, error message or None).
+        The retry delay doubles per attempt from base_delay up to max_delay (with jitter).
+        on_sent(entry) runs in the sender thread after an entry was delivered,
+        outside the outbox lock.
+        """
+        self.pending_dir = os.path.join(directory, 'pending')
+        self.dead_dir = os.path.join(directory, 'dead')
+        os.makedirs(self.pending_dir, exist_ok=True)
+        os.makedirs(self.dead_dir, exist_ok=True)
+
+        self._send = send
+        self._on_sent = on_sent
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.concurrency = max(1, concurrency)
+
+        self._cond = threading.Condition()
+        self._entries: Dict[str, Dict] = {}
+        self._keys: Dict[str, str] = {}
+        self._in_flight: Set[str] = set()
+        self._threads = []
+        self._stopping = False
+        self._load()
+
+    def _path(self, entry_id: str, folder: Optional[str] = None) -> str:
+        return os.path.join(folder or self.pending_dir, f"{entry_id}.json")
+
+    def _load(self) -> None:
+        """Pick up entries left by a previous run."""
+        for name in sorted(os.listdir(self.pending_dir)):
+            path = os.path.join(self.pending_dir, name)
+            if name.endswith('.tmp'):
+                os.remove(path)
+                continue
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"✗ Skipping unreadable outbox entry {name}: {e}")
+                continue
+            self._entries[entry['id']] = entry
+            self._keys[entry['key']] = entry['id']
+        OUTBOX_PENDING.set(len(self._entries))
+        if self._entries:
+            print(f"✓ Outbox: {len(self._entries)} pending entries from a previous run")
+
+    def _write(self, entry: Dict, folder: Optional[str] = None) -> None:
+        path = self._path(entry['id'], folder)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(temp_path, path)
+
+    def enqueue(self, key: str, payload: Dict, headers: Optional[Dict] = None) -> bool:
+        """
+        Persist a payload for delivery. key identifies the email (e.g. Message-ID);
+        returns False if an entry with that key is already waiting.
+        """
+        now = time.time()
+        with self._cond:
+            if key in self._keys:
+                return False
+            entry = {
+                "id": uuid.uuid4().hex,
+                "key": key,
+                "payload": payload,
+                "headers": headers or {},
+                "attempts": 0,
+                "created_at": now,
+                "next_attempt_at": now,
+                "last_error": None
+            }
+            self._write(entry)
+            self._entries[entry['id']] = entry
+            self._keys[key] = entry['id']
+            OUTBOX_PENDING.set(len(self._entries))
+            self._cond.notify()
+        return True
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        with self._cond:
+            return key in self._keys
+
+    def start(self) -> None:
+        """Start `concurrency` sender threads."""
+        self._stopping = False
+        for index in range(self.concurrency):
+            thread = threading.Thread(target=self._run, name=f"outbox-sender-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10.0) -> int:
+        """
+        Stop the senders, letting in-flight sends finish for up to timeout seconds.
+        Unsent entries stay on disk for the next run; returns how many remain.
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        self._threads = []
+        return len(self)
+
+    def flush(self, timeout: float = 30.0) -> bool:
+        """Wait until nothing is due or in flight (entries backing off do not count)."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._in_flight or self._next_due(time.time()) is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(min(remaining, 0.5))
+        return True
+
+    def _next_due(self, now: float) -> Optional[Dict]:
+        """Earliest due entry that is not being sent (caller holds the lock)."""
+        due = None
+        for entry in self._entries.values():
+            if entry['id'] in self._in_flight or entry['next_attempt_at'] > now:
+                continue
+            if due is None or entry['next_attempt_at'] < due['next_attempt_at']:
+                due = entry
+        return due
+
+    def _next_wakeup(self) -> Optional[float]:
+        waiting = [entry['next_attempt_at'] for entry in self._entries.values()
+                   if entry['id'] not in self._in_flight]
+        return max(0.0, min(waiting) - time.time()) if waiting else None
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopping:
+                        return
+                    entry = self._next_due(time.time())
+                    if entry is not None:
+                        self._in_flight.add(entry['id'])
+                        break
+                    self._cond.wait(self._next_wakeup())
+
+            try:
+                outcome, error = self._send(entry['payload'], entry['headers'])
+            except Exception as e:
+                outcome, error = RETRY, str(e)
+            self._complete(entry, outcome, error)
+            if outcome == SENT and self._on_sent is not None:
+                try:
+                    self._on_sent(entry)
+                except Exception as e:
+                    print(f"  ✗ Post-delivery hook failed for {entry['key']}: {e}")
+
+    def _complete(self, entry: Dict, outcome: str, error: Optional[str]) -> None:
+        OUTBOX_ATTEMPTS.inc(outcome=outcome)
+        with self._cond:
+            self._in_flight.discard(entry['id'])
+            if outcome == SENT:
+                self._remove(entry)
+                try:
+                    os.remove(self._path(entry['id']))
+                except FileNotFoundError:
+                    pass
+            else:
+                entry['attempts'] += 1
+                entry['last_error'] = error
+                if outcome == REJECTED or entry['attempts'] >= self.max_attempts:
+                    self._dead_letter(entry)
+                else:
+                    delay = min(self.max_delay, self.base_delay * 2 ** (entry['attempts'] - 1))
+                    # Jitter spreads out retries of entries that failed together
+                    delay *= random.uniform(0.8, 1.2)
+                    entry['next_attempt_at'] = time.time() + delay
+                    self._write(entry)
+                    print(f"  ⚠ Send failed ({error}); retry {entry['attempts']}/{self.max_attempts - 1} "
+                          f"in {delay:.0f}s")
+            OUTBOX_PENDING.set(len(self._entries))
+            self._cond.notify_all()
+
+    def _remove(self, entry: Dict) -> None:
+        self._entries.pop(entry['id'], None)
+        self._keys.pop(entry['key'], None)
+
+    def _dead_letter(self, entry: Dict) -> None:
+        entry['dead_at'] = time.time()
+        self._write(entry, self.dead_dir)
+        try:
+            os.remove(self._path(entry['id']))
+        except FileNotFoundError:
+            pass
+        self._remove(entry)
+        OUTBOX_DEAD.inc()
+        print(f"  ✗ Giving up on {entry['key']} after {entry['attempts']} attempts ({entry['last_error']}); "
+              f"saved to {self.dead_dir}")
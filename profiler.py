@@ -0,0 +1,245 @@
+"""
+Profiler Module
+On-demand profiling for a live server: cProfile over the next N requests, a
+sampling profiler over a fixed time window (collapsed stacks, ready for
+flamegraph tools), and tracemalloc snapshots for tracking memory growth.
+"""
+
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, List, Optional
+
+
+class RequestProfiler:
+    """Profile the next N requests with cProfile and aggregate them into one pstats report."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._remaining = 0
+        self._requested = 0
+        self._active: Optional[cProfile.Profile] = None  # only one profiler can run at a time
+        self._stats: Optional[pstats.Stats] = None
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+
+    def arm(self, count: int) -> None:
+        with self._lock:
+            self._remaining = count
+            self._requested = count
+            self._stats = None
+            self._started_at = time.time()
+            self._finished_at = None
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._remaining = 0
+            self._finished_at = self._finished_at or time.time()
+
+    def start_request(self) -> Optional[cProfile.Profile]:
+        """Begin profiling the current request if armed and no other request holds the profiler."""
+        with self._lock:
+            if self._remaining <= 0 or self._active is not None:
+                return None
+            profile = cProfile.Profile()
+            self._active = profile
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiling tool owns the interpreter hook
+            with self._lock:
+                self._active = None
+            return None
+        return profile
+
+    def finish_request(self, profile: cProfile.Profile) -> None:
+        profile.disable()
+        with self._lock:
+            self._active = None
+            if self._remaining <= 0:
+                return
+            if self._stats is None:
+                self._stats = pstats.Stats(profile)
+            else:
+                self._stats.add(profile)
+            self._remaining -= 1
+            if self._remaining == 0:
+                self._finished_at = time.time()
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {
+                "mode": "requests",
+                "requested": self._requested,
+                "profiled": self._requested - self._remaining if self._requested else 0,
+                "done": self._requested > 0 and self._remaining == 0 and self._stats is not None,
+                "started_at": self._started_at,
+                "finished_at": self._finished_at,
+            }
+
+    def report(self, sort: str = "cumulative", limit: int = 40) -> Optional[str]:
+        """pstats text of everything collected so far (None if nothing was profiled)."""
+        with self._lock:
+            if self._stats is None:
+                return None
+            stream = io.StringIO()
+            self._stats.stream = stream
+            self._stats.sort_stats(sort).print_stats(limit)
+            return stream.getvalue()
+
+
+class SamplingProfiler:
+    """Sample every thread's stack at a fixed interval for a time window."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples: Counter = Counter()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.seconds = 0.0
+        self.interval = 0.0
+        self.sample_count = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def start(self, seconds: float, interval: float = 0.005) -> bool:
+        """Start a window; returns False if one is already running."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._samples = Counter()
+            self.seconds = seconds
+            self.interval = interval
+            self.sample_count = 0
+            self.started_at = time.time()
+            self.finished_at = None
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        own_thread = threading.get_ident()
+        deadline = time.perf_counter() + self.seconds
+        while time.perf_counter() < deadline and not self._stop.is_set():
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                key = ";".join(reversed(stack))
+                with self._lock:
+                    self._samples[key] += 1
+            with self._lock:
+                self.sample_count += 1
+            time.sleep(self.interval)
+        with self._lock:
+            self.finished_at = time.time()
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {
+                "mode": "window",
+                "seconds": self.seconds,
+                "interval_ms": self.interval * 1000,
+                "samples": self.sample_count,
+                "done": self.finished_at is not None,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+
+    def collapsed(self, include_idle: bool = False) -> str:
+        """Brendan Gregg collapsed-stack format: 'frame;frame;frame count' per line."""
+        with self._lock:
+            samples = list(self._samples.items())
+        lines = []
+        for stack, count in sorted(samples, key=lambda item: -item[1]):
+            # Threads parked in wait()/select() dominate otherwise
+            if not include_idle and _is_idle(stack):
+                continue
+            lines.append(f"{stack} {count}")
+        return "\n".join(lines) + ("\n" if lines else "")
+
+
+_IDLE_FRAMES = ("wait (threading.py", "select (selectors.py", "accept (socket.py",
+                "get (queue.py", "serve_forever (socketserver.py")
+
+
+def _is_idle(stack: str) -> bool:
+    return stack.rsplit(";", 1)[-1].startswith(_IDLE_FRAMES)
+
+
+class MemoryTracker:
+    """tracemalloc snapshots with a diff against the previous snapshot."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._previous: Optional[tracemalloc.Snapshot] = None
+
+    def start(self, frames: int = 10) -> None:
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+            self._previous = None
+
+    def stop(self) -> None:
+        with self._lock:
+            tracemalloc.stop()
+            self._previous = None
+
+    def snapshot(self, top: int = 25, key_type: str = "lineno") -> Dict:
+        """Top allocation sites now, and the biggest growth since the last snapshot."""
+        if not tracemalloc.is_tracing():
+            return {"tracing": False}
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ])
+        current, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            previous, self._previous = self._previous, snapshot
+
+        result = {
+            "tracing": True,
+            "current_kb": round(current / 1024, 1),
+            "peak_kb": round(peak / 1024, 1),
+            "top": [_stat_dict(stat) for stat in snapshot.statistics(key_type)[:top]],
+        }
+        if previous is not None:
+            result["growth"] = [
+                _stat_dict(stat) for stat in snapshot.compare_to(previous, key_type)[:top]
+                if stat.size_diff > 0
+            ]
+        return result
+
+
+def _stat_dict(stat) -> Dict:
+    frame = stat.traceback[0]
+    entry = {"location": f"{frame.filename}:{frame.lineno}", "size_kb": round(stat.size / 1024, 1),
+             "count": stat.count}
+    if hasattr(stat, "size_diff"):
+        entry["size_diff_kb"] = round(stat.size_diff / 1024, 1)
+        entry["count_diff"] = stat.count_diff
+    return entry
+
+
+# Process-wide instances used by the /debug/* endpoints
+request_profiler = RequestProfiler()
+sampling_profiler = SamplingProfiler()
+memory_tracker = MemoryTracker()
+
+
+def sort_keys() -> List[str]:
+    """Valid pstats sort keys."""
+    return sorted(pstats.Stats.sort_arg_dict_default)
@@ -0,0 +1,157 @@
+"""
+Search Index Module
+In-memory inverted index over task descriptions, email subjects and senders.
+"""
+
+import heapq
+import math
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# Field weights used when scoring matches
+FIELD_WEIGHTS = {
+    "description": 1.0,
+    "subject": 0.6,
+    "sender": 0.4,
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase text and split it into alphanumeric tokens."""
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def task_fields(task: Dict) -> Dict[str, str]:
+    """Pull the searchable fields out of a task dictionary."""
+    source_email = task.get("source_email") or {}
+    return {
+        "description": task.get("description") or "",
+        "subject": source_email.get("subject") or "",
+        "sender": task.get("sender") or "",
+    }
+
+
+class SearchIndex:
+    """Tokenized posting lists mapping terms to weighted task frequencies."""
+
+    def __init__(self):
+        """Create an empty index."""
+        self.postings: Dict[str, Dict[str, float]] = {}
+        self.tasks: Dict[str, Dict] = {}
+        self.doc_terms: Dict[str, Tuple[str, ...]] = {}
+        self.order: Dict[str, int] = {}
+        self._next_order = 0
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    def build(self, tasks: Iterable[Dict]) -> None:
+        """Rebuild the index from scratch."""
+        self.postings = {}
+        self.tasks = {}
+        self.doc_terms = {}
+        self.order = {}
+        self._next_order = 0
+        for task in tasks:
+            self.add(task)
+
+    def add(self, task: Dict) -> None:
+        """Index a single task. Re-adding an existing ID replaces it."""
+        task_id = task.get("id")
+        if not task_id:
+            return
+        if task_id in self.tasks:
+            self.remove(task_id)
+
+        weights: Dict[str, float] = {}
+        for field, text in task_fields(task).items():
+            field_weight = FIELD_WEIGHTS[field]
+            for term in tokenize(text):
+                weights[term] = weights.get(term, 0.0) + field_weight
+
+        for term, weight in weights.items():
+            self.postings.setdefault(term, {})[task_id] = weight
+
+        self.tasks[task_id] = task
+        self.doc_terms[task_id] = tuple(weights)
+        self.order[task_id] = self._next_order
+        self._next_order += 1
+
+    def update(self, task: Dict) -> None:
+        """Refresh the stored copy of a task, re-indexing only if its text changed."""
+        task_id = task.get("id")
+        if task_id not in self.tasks:
+            self.add(task)
+            return
+        if task_fields(self.tasks[task_id]) != task_fields(task):
+            order = self.order[task_id]
+            self.add(task)
+            self.order[task_id] = order
+        else:
+            self.tasks[task_id] = task
+
+    def sync(self, tasks: Iterable[Dict]) -> None:
+        """
+        Bring the index in line with a full task list: changed and new tasks
+        are (re)indexed, missing ones removed, unchanged ones left alone.
+        """
+        seen = set()
+        for task in tasks:
+            task_id = task.get("id")
+            if task_id:
+                seen.add(task_id)
+                self.update(task)
+        for task_id in [task_id for task_id in self.tasks if task_id not in seen]:
+            self.remove(task_id)
+
+    def remove(self, task_id: str) -> None:
+        """Drop a task from every posting list it appears in."""
+        for term in self.doc_terms.pop(task_id, ()):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            posting.pop(task_id, None)
+            if not posting:
+                del self.postings[term]
+        self.tasks.pop(task_id, None)
+        self.order.pop(task_id, None)
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> Tuple[List[Dict], int]:
+        """
+        Return (page of matching tasks, total matches) ranked by TF-IDF score.
+        Every query term must match; newer tasks win ties.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return [], 0
+
+        postings = []
+        for term in terms:
+            posting = self.postings.get(term)
+            if not posting:
+                return [], 0
+            postings.append(posting)
+
+        # Intersect starting from the rarest term so common terms stay cheap
+        postings.sort(key=len)
+        candidates = postings[0].keys()
+        for posting in postings[1:]:
+            candidates = [task_id for task_id in candidates if task_id in posting]
+            if not candidates:
+                return [], 0
+
+        total_docs = len(self.tasks)
+        idfs = [math.log(1 + total_docs / len(posting)) for posting in postings]
+
+        weighted = list(zip(postings, idfs))
+        scored = (
+            (sum(math.log1p(posting[task_id]) * idf for posting, idf in weighted), self.order[task_id], task_id)
+            for task_id in candidates
+        )
+        page = heapq.nlargest(offset + limit, scored)[offset:]
+        return [self.tasks[task_id] for _, _, task_id in page], len(candidates)
@@ -0,0 +1,102 @@
+"""
+Production Server
+Serves the Flask app under gunicorn (Linux/macOS) or waitress (Windows, or when
+gunicorn is not installed), with graceful shutdown that drains in-flight ingests.
+
+Usage: python serve.py          # production
+       python serve.py --dev    # Flask development server (debug, reloader)
+"""
+
+import os
+import signal
+import sys
+import threading
+import _thread
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HOST = os.getenv('WEB_HOST', '0.0.0.0')
+PORT = int(os.getenv('FLASK_PORT', 8000))
+THREADS = int(os.getenv('WEB_THREADS', 8))
+KEEPALIVE = int(os.getenv('WEB_KEEPALIVE', 5))
+GRACEFUL_TIMEOUT = int(os.getenv('WEB_GRACEFUL_TIMEOUT', 30))
+
+
+def serve_gunicorn():
+    """Hand over to gunicorn with gunicorn.conf.py."""
+    from gunicorn.app.wsgiapp import run
+    sys.argv = ["gunicorn", "--config", os.path.join(BASE_DIR, "gunicorn.conf.py"), "wsgi:app"]
+    run()
+
+
+def serve_waitress():
+    """Single process, THREADS worker threads; Ctrl+C / SIGTERM drains before exiting."""
+    from waitress.server import create_server
+    import app as app_module
+
+    server = create_server(
+        app_module.app,
+        host=HOST,
+        port=PORT,
+        threads=THREADS,
+        # Idle keep-alive connections are closed after this many seconds
+        channel_timeout=max(KEEPALIVE, 1),
+        ident="email-task-automation"
+    )
+
+    drained = threading.Event()
+
+    def drain_and_stop():
+        app_module.shutdown(timeout=GRACEFUL_TIMEOUT)
+        drained.set()
+        # Re-enters handle_stop on the main thread, which stops waitress
+        _thread.interrupt_main()
+
+    def handle_stop(signum, frame):
+        if drained.is_set():
+            # waitress stops its task dispatcher cleanly on KeyboardInterrupt
+            raise KeyboardInterrupt
+        if app_module.draining.is_set():
+            return
+        app_module.begin_drain()
+        threading.Thread(target=drain_and_stop, daemon=True).start()
+
+    for name in ("SIGTERM", "SIGINT", "SIGBREAK"):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), handle_stop)
+
+    print(f"✓ Serving on http://{HOST}:{PORT} with waitress ({THREADS} threads)")
+    server.run()
+
+
+def serve_dev():
+    import app as app_module
+    app_module.app.run(host=HOST, port=PORT, debug=True)
+
+
+def main():
+    if "--dev" in sys.argv[1:]:
+        serve_dev()
+        return
+
+    if sys.platform != "win32":
+        try:
+            import gunicorn  # noqa: F401
+            serve_gunicorn()
+            return
+        except ImportError:
+            print("gunicorn not installed, falling back to waitress")
+
+    try:
+        import waitress  # noqa: F401
+    except ImportError:
+        print("✗ No production server installed: pip install gunicorn (Linux/macOS) or waitress")
+        sys.exit(1)
+    serve_waitress()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,11 @@
 // Global state
 let allTasks = [];
 let filteredTasks = [];
+// Ranked task IDs from /tasks/search for the current query (null when not searching)
+let searchResults = null;
+let searchTimer = null;
+const SEARCH_DELAY_MS = 250;
+const SEARCH_LIMIT = 100;
 let categoryChart = null;
 let senderChart = null;
 
@@ -21,6 +26,9 @@ async function initializeApp() {
     
     // Fetch and display tasks
     await fetchTasks();
+    
+    // Receive new and updated tasks as they are extracted
+    subscribeToTaskEvents();
 }
 
 function setupEventListeners() {
@@ -37,7 +45,9 @@ function setupEventListeners() {
     const statusFilter = document.getElementById('statusFilter');
     const urgencyFilter = document.getElementById('urgencyFilter');
     const clearBtn = document.getElementById('clearFilters');
+    const searchInput = document.getElementById('searchInput');
     
+    if (searchInput) searchInput.addEventListener('input', scheduleSearch);
     if (categoryFilter) categoryFilter.addEventListener('change', applyFilters);
     if (statusFilter) statusFilter.addEventListener('change', applyFilters);
     if (urgencyFilter) urgencyFilter.addEventListener('change', applyFilters);
@@ -74,6 +84,41 @@ async function fetchTasks() {
     }
 }
 
+// Subscribe to live task updates (Server-Sent Events)
+function subscribeToTaskEvents() {
+    if (!window.EventSource) {
+        console.log('EventSource not supported, live updates disabled');
+        return;
+    }
+    
+    const source = new EventSource('/tasks/events');
+    
+    source.addEventListener('task_added', event => {
+        const task = JSON.parse(event.data);
+        if (!allTasks.some(t => t.id === task.id)) {
+            allTasks.push(task);
+            console.log(`Live task added: ${task.id}`);
+            if (searchResults !== null) {
+                // The new task may match the current query
+                runSearch();
+            } else {
+                applyFilters();
+            }
+        }
+    });
+    
+    source.addEventListener('task_updated', event => {
+        const task = JSON.parse(event.data);
+        const index = allTasks.findIndex(t => t.id === task.id);
+        if (index !== -1) {
+            allTasks[index] = task;
+            applyFilters();
+        }
+    });
+    
+    source.onerror = () => console.log('Live updates disconnected, retrying...');
+}
+
 // Render all components
 function renderAll() {
     console.log('Rendering all components...');
@@ -192,6 +237,44 @@ async function completeTask(taskId) {
     }
 }
 
+// Search (ranked on the server by GET /tasks/search)
+function scheduleSearch() {
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(runSearch, SEARCH_DELAY_MS);
+}
+
+async function runSearch() {
+    const searchInput = document.getElementById('searchInput');
+    const query = searchInput ? searchInput.value.trim() : '';
+    
+    if (!query) {
+        searchResults = null;
+        applyFilters();
+        return;
+    }
+    
+    try {
+        const params = new URLSearchParams({ q: query, limit: SEARCH_LIMIT });
+        const response = await fetch(`/tasks/search?${params}`);
+        const data = await response.json();
+        
+        // Ignore responses for a query the user has already changed
+        if (searchInput.value.trim() !== query) {
+            return;
+        }
+        if (!response.ok || !data.success) {
+            throw new Error(data.error || `HTTP error! status: ${response.status}`);
+        }
+        
+        searchResults = data.tasks.map(task => task.id);
+        console.log(`Search "${query}": ${data.total} matches`);
+        applyFilters();
+    } catch (error) {
+        console.error('Error searching tasks:', error);
+        showError('Search failed: ' + error.message);
+    }
+}
+
 // Apply filters
 function applyFilters() {
     const categoryFilter = document.getElementById('categoryFilter');
@@ -202,7 +285,14 @@ function applyFilters() {
     const statusValue = statusFilter ? statusFilter.value : 'all';
     const urgencyChecked = urgencyFilter ? urgencyFilter.checked : false;
     
-    filteredTasks = allTasks.filter(task => {
+    // Search results keep the server's ranking
+    let candidates = allTasks;
+    if (searchResults !== null) {
+        const byId = new Map(allTasks.map(task => [task.id, task]));
+        candidates = searchResults.map(id => byId.get(id)).filter(Boolean);
+    }
+    
+    filteredTasks = candidates.filter(task => {
         // Category filter
         if (categoryValue !== 'all' && task.category !== categoryValue) {
             return false;
@@ -230,11 +320,15 @@ function clearFilters() {
     const categoryFilter = document.getElementById('categoryFilter');
     const statusFilter = document.getElementById('statusFilter');
     const urgencyFilter = document.getElementById('urgencyFilter');
+    const searchInput = document.getElementById('searchInput');
     
     if (categoryFilter) categoryFilter.value = 'all';
     if (statusFilter) statusFilter.value = 'all';
     if (urgencyFilter) urgencyFilter.checked = false;
+    if (searchInput) searchInput.value = '';
     
+    clearTimeout(searchTimer);
+    searchResults = null;
     filteredTasks = [...allTasks];
     renderAll();
 }
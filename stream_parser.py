@@ -0,0 +1,74 @@
+"""
+Stream Parser Module
+Incrementally parses task objects out of a streamed JSON completion, so each
+task can be used as soon as its closing brace arrives.
+"""
+
+import json
+from typing import Dict, List
+
+
+class IncrementalTaskParser:
+    """
+    Feed JSON text in arbitrary chunks; get back every object that is a direct
+    element of an array (the task list), either a top-level [...] or the array
+    inside {"tasks": [...]}.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.position = 0       # next character of buffer to scan
+        self.stack: List[str] = []
+        self.in_string = False
+        self.escaped = False
+        self.object_start = -1  # buffer index of the current task object's '{'
+        self.object_depth = 0   # stack depth the current task object opened at
+
+    def feed(self, chunk: str) -> List[Dict]:
+        """Consume a chunk and return the task objects completed by it."""
+        self.buffer += chunk
+        completed = []
+        buffer = self.buffer
+        for index in range(self.position, len(buffer)):
+            char = buffer[index]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                continue
+
+            if char == '"':
+                self.in_string = True
+            elif char in '[{':
+                if char == '{' and self.stack and self.stack[-1] == '[' and self.object_start < 0:
+                    self.object_start = index
+                    self.object_depth = len(self.stack)
+                self.stack.append(char)
+            elif char in ']}':
+                if not self.stack:
+                    continue
+                self.stack.pop()
+                if char == '}' and self.object_start >= 0 and len(self.stack) == self.object_depth:
+                    try:
+                        task = json.loads(buffer[self.object_start:index + 1])
+                        if isinstance(task, dict):
+                            completed.append(task)
+                    except json.JSONDecodeError:
+                        pass
+                    self.object_start = -1
+
+        self.position = len(buffer)
+        self._compact()
+        return completed
+
+    def _compact(self) -> None:
+        """Drop scanned text that no pending object needs, keeping memory flat."""
+        keep_from = self.object_start if self.object_start >= 0 else self.position
+        if keep_from > 0:
+            self.buffer = self.buffer[keep_from:]
+            self.position -= keep_from
+            if self.object_start >= 0:
+                self.object_start = 0
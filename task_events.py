@@ -0,0 +1,48 @@
+"""
+Task Events Module
+In-process publish/subscribe for task changes, used to push new and updated
+tasks to connected dashboards over Server-Sent Events.
+"""
+
+import json
+import queue
+import threading
+from typing import Dict, List
+
+
+class TaskEventBus:
+    """Fan-out of task events to per-subscriber bounded queues."""
+
+    def __init__(self, max_queue_size: int = 1000):
+        self.max_queue_size = max_queue_size
+        self._subscribers: List[queue.Queue] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> queue.Queue:
+        """Register a new listener and return its queue."""
+        subscriber = queue.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue) -> None:
+        """Remove a listener (e.g. when its HTTP connection closes)."""
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def publish(self, event_type: str, task: Dict) -> None:
+        """Send an event to every listener; slow listeners drop events rather than block."""
+        event = {"type": event_type, "task": task}
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                pass
+
+
+def format_sse(event: Dict) -> str:
+    """Encode an event as a Server-Sent Events message."""
+    return f"event: {event['type']}\ndata: {json.dumps(event['task'], ensure_ascii=False)}\n\n"
@@ -5,50 +5,172 @@ Uses LLM to extract actionable tasks from email content with categorization and
 
 import os
 import json
-import re
-from typing import List, Dict, Optional
-from datetime import datetime
-from dateutil import parser as date_parser
+import importlib.util
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
+from datetime import datetime, timezone
 
-# Make OpenAI optional - system works with fallback if not available
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-    OpenAI = None
+from date_resolver import DateResolver, parse_received_at
+from email_preprocessor import estimate_tokens, preprocess_body
+from email_triage import EmailTriage
+from keyword_matcher import KeywordMatcher, compile_keyword_pattern
+import metrics
+from model_router import ModelRouter
+from stream_parser import IncrementalTaskParser
+from task_schema import RECORD_TASKS_CHOICE, RECORD_TASKS_TOOL, normalize_task, validate_task, validate_task_list
+import tracing
+
+# Make OpenAI optional - system works with fallback if not available.
+# Only check that it is installed: importing it takes ~0.3s, so the import
+# happens when the client is first needed.
+OPENAI_AVAILABLE = importlib.util.find_spec("openai") is not None
+
+
+EXTRACTIONS = metrics.counter(
+    "extractions_total", "Emails processed by TaskExtractor, by how tasks were produced", ["mode"]
+)
+TOKENS_SAVED = metrics.counter(
+    "preprocess_tokens_saved_total", "Body tokens removed by preprocessing before the LLM call"
+)
+
+VALID_CATEGORIES = ["Work", "Personal", "Academic", "Urgent", "Low Priority"]
+
+# Keyword tables (checked in order; Urgent always takes precedence)
+DEFAULT_CATEGORY_KEYWORDS = {
+    "Urgent": ['urgent', 'asap', 'critical', 'emergency', 'immediately', 'now'],
+    "Work": ['meeting', 'report', 'project', 'client', 'presentation', 'deadline'],
+    "Academic": ['research', 'paper', 'study', 'assignment', 'thesis', 'course'],
+    "Personal": ['family', 'personal', 'home', 'grocery', 'groceries', 'appointment'],
+    "Low Priority": ['later', 'sometime', 'eventually', 'when possible'],
+}
+
+DEFAULT_PRIORITY_KEYWORDS = {
+    "High": ['urgent', 'asap', 'critical', 'important', 'priority', 'immediately'],
+    "Low": ['later', 'sometime', 'eventually', 'when possible', 'optional'],
+}
+
+DEFAULT_ACTION_VERBS = ['complete', 'finish', 'submit', 'prepare', 'review', 'send', 'create',
+                        'update', 'fix', 'schedule', 'call', 'email', 'meet', 'discuss']
 
 
 class TaskExtractor:
     """Extracts and classifies tasks from email content using LLM."""
     
-    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4"):
-        """Initialize the task extractor with OpenAI API."""
+    def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None,
+                 category_keywords: Optional[Dict[str, List[str]]] = None,
+                 priority_keywords: Optional[Dict[str, List[str]]] = None,
+                 action_verbs: Optional[List[str]] = None, use_llm: bool = True,
+                 use_triage: bool = True, client=None,
+                 http_client_factory: Optional[Callable[[], object]] = None):
+        """
+        Initialize the task extractor with OpenAI API.
+        model is the large (escalation) model; the cheap first tier is LLM_FAST_MODEL.
+        use_llm=False forces fallback extraction (used by batch worker processes).
+        use_triage=False (or TRIAGE_ENABLED=false) sends every email to extraction.
+        client injects a ready OpenAI-compatible client (shared pools, test doubles).
+        http_client_factory returns the httpx client the OpenAI client is built on
+        (called on first use, so a shared pool costs nothing in fallback mode).
+        """
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         self.model = model or os.getenv("LLM_MODEL", "gpt-4")
         
-        if not OPENAI_AVAILABLE:
+        # Build keyword matchers once; classification is a single regex pass per text
+        self.category_keywords = category_keywords or DEFAULT_CATEGORY_KEYWORDS
+        self.priority_keywords = priority_keywords or DEFAULT_PRIORITY_KEYWORDS
+        tables = {("category", label): words for label, words in self.category_keywords.items()}
+        tables.update({("priority", label): words for label, words in self.priority_keywords.items()})
+        self.keyword_matcher = KeywordMatcher(tables)
+        # Action verbs match at word start so inflections (submitted, emails) still count
+        self.action_verbs = action_verbs or DEFAULT_ACTION_VERBS
+        self.action_pattern = compile_keyword_pattern(self.action_verbs, suffix=r"\w*")
+        self.date_resolver = DateResolver()
+        
+        # Local pre-filter that skips extraction for non-actionable mail
+        triage_enabled = os.getenv("TRIAGE_ENABLED", "true").lower() != "false"
+        self.triage = EmailTriage() if use_triage and triage_enabled else None
+        
+        # Body preprocessing: token budget for the email body sent to the LLM
+        self.body_token_budget = int(os.getenv("LLM_BODY_TOKEN_BUDGET", 1500))
+        
+        # Process pool for extract_many, created on first use; leased under the lock
+        # so a resize never shuts down a pool another thread is still using
+        self._pool = None
+        self._pool_workers = 0
+        self._pool_users: Dict[object, int] = {}
+        self._pool_lock = threading.Lock()
+        
+        # LLM mode is decided here; the client and router are built on first use
+        self._client = client
+        self._http_client_factory = http_client_factory
+        self._router: Optional[ModelRouter] = None
+        self._client_lock = threading.RLock()
+        self.llm_enabled = False
+        if not use_llm:
+            self._client = None
+        elif client is not None:
+            self.llm_enabled = True
+        elif not OPENAI_AVAILABLE:
             print("Info: OpenAI library not installed. Using fallback extraction mode.")
             print("      To enable LLM extraction: pip install openai")
-            self.client = None
         elif not self.api_key:
             print("Warning: No OpenAI API key found. Using fallback extraction mode.")
             print("         Set OPENAI_API_KEY in .env file to enable LLM extraction.")
-            self.client = None
         else:
-            try:
-                self.client = OpenAI(api_key=self.api_key)
-                print("✓ OpenAI client initialized successfully")
-            except Exception as e:
-                print(f"Warning: Failed to initialize OpenAI client: {e}")
-                print("         Using fallback extraction mode instead.")
-                self.client = None
+            self.llm_enabled = True
+        
+        # Structured output: force the record_tasks function-calling schema
+        self.structured_output = os.getenv("LLM_STRUCTURED_OUTPUT", "true").lower() != "false"
+        self.request_options = {}
+        if self.structured_output:
+            self.request_options = {"tools": [RECORD_TASKS_TOOL], "tool_choice": RECORD_TASKS_CHOICE}
     
-    def extract_tasks_from_email(self, subject: str, body: str, sender: str) -> List[Dict]:
+    @property
+    def client(self):
+        """OpenAI client, created (importing openai) on first use; None in fallback mode."""
+        if self._client is None and self.llm_enabled:
+            with self._client_lock:
+                if self._client is None and self.llm_enabled:
+                    try:
+                        from openai import OpenAI
+                        http_client = self._http_client_factory() if self._http_client_factory else None
+                        self._client = OpenAI(api_key=self.api_key, http_client=http_client)
+                        print("✓ OpenAI client initialized successfully")
+                    except Exception as e:
+                        print(f"Warning: Failed to initialize OpenAI client: {e}")
+                        print("         Using fallback extraction mode instead.")
+                        self.llm_enabled = False
+        return self._client
+    
+    @property
+    def router(self) -> Optional[ModelRouter]:
+        """Cheap model first, escalating to self.model only when needed; None in fallback mode."""
+        if self._router is None and self.client is not None:
+            with self._client_lock:
+                if self._router is None:
+                    self._router = ModelRouter(self._client, self.model, request_options=self.request_options)
+        return self._router
+    
+    def extract_tasks_from_email(self, subject: str, body: str, sender: str,
+                                 received_at: Optional[str] = None,
+                                 headers: Optional[Dict] = None) -> List[Dict]:
         """
         Main extraction method.
         Returns list of task dictionaries with all metadata.
+        received_at (ISO 8601 or RFC 2822) anchors relative due dates; defaults to now.
+        headers (List-Unsubscribe, Auto-Submitted, Precedence, ...) feed the triage stage.
         """
+        # Skip newsletters, notifications and auto-replies before doing any work
+        if self._skip_by_triage(subject, body, sender, headers):
+            EXTRACTIONS.inc(mode="triage_skipped")
+            return []
+        
+        received = parse_received_at(received_at)
+        
+        # Strip quoted history, signatures and boilerplate; enforce the token budget
+        body = self.preprocess_body(body)
+        
         # Build prompt for LLM
         prompt = self.build_extraction_prompt(subject, body)
         
@@ -56,35 +178,215 @@ class TaskExtractor:
         try:
             if self.client is None:
                 # Fallback: basic keyword extraction if no API key
-                return self._fallback_extraction(subject, body, sender)
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that extracts actionable tasks from emails. Always respond with valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=1000
-            )
-            
-            llm_output = response.choices[0].message.content
+                EXTRACTIONS.inc(mode="fallback")
+                with tracing.span("extract.fallback"):
+                    return self._fallback_extraction(subject, body, sender, received)
             
-            # Parse LLM response
-            tasks = self.parse_llm_response(llm_output)
+            with tracing.span("llm.route") as span:
+                tasks, decision = self.router.route(
+                    prompt,
+                    self.parse_structured_response,
+                    body_tokens=estimate_tokens(body),
+                    action_count=len(self.action_pattern.findall(body))
+                )
+                span.set_attributes(**decision)
+            if tasks is None:
+                # Still unusable after the repair attempt: keep the email's tasks via keywords
+                print("Failed to parse LLM response as JSON, using keyword extraction")
+                EXTRACTIONS.inc(mode="invalid_output_fallback")
+                with tracing.span("extract.fallback", llm_error="invalid_output"):
+                    return self._fallback_extraction(subject, body, sender, received)
             
             # Enrich tasks with metadata
             enriched_tasks = []
             for task in tasks:
-                enriched_task = self._enrich_task(task, subject, sender)
+                enriched_task = self._enrich_task(task, subject, sender, received)
                 enriched_tasks.append(enriched_task)
             
+            EXTRACTIONS.inc(mode="llm")
             return enriched_tasks
             
         except Exception as e:
             print(f"Error during LLM extraction: {e}")
             # Fallback to basic extraction
-            return self._fallback_extraction(subject, body, sender)
+            EXTRACTIONS.inc(mode="llm_error_fallback")
+            with tracing.span("extract.fallback", llm_error=str(e)):
+                return self._fallback_extraction(subject, body, sender, received)
+    
+    def extract_tasks_streaming(self, subject: str, body: str, sender: str,
+                                received_at: Optional[str] = None,
+                                headers: Optional[Dict] = None) -> Iterator[Dict]:
+        """
+        Streaming variant of extract_tasks_from_email.
+        Yields each enriched task as soon as the model finishes writing it.
+        """
+        if self._skip_by_triage(subject, body, sender, headers):
+            EXTRACTIONS.inc(mode="triage_skipped")
+            return
+        
+        received = parse_received_at(received_at)
+        body = self.preprocess_body(body)
+        
+        if self.client is None:
+            EXTRACTIONS.inc(mode="fallback")
+            yield from self._fallback_extraction(subject, body, sender, received)
+            return
+        
+        prompt = self.build_extraction_prompt(subject, body)
+        tier = self.router.pick_stream_tier(
+            body_tokens=estimate_tokens(body),
+            action_count=len(self.action_pattern.findall(body))
+        )
+        parser = IncrementalTaskParser()
+        emitted = 0
+        try:
+            for delta in self.router.stream(prompt, tier):
+                for task in parser.feed(delta):
+                    if validate_task(task):
+                        task = normalize_task(task)
+                        if task is None:
+                            continue
+                    emitted += 1
+                    yield self._enrich_task(task, subject, sender, received)
+            EXTRACTIONS.inc(mode="llm")
+        except Exception as e:
+            print(f"Error during streaming LLM extraction: {e}")
+            # Nothing usable arrived yet, so the fallback cannot duplicate tasks
+            if emitted == 0:
+                EXTRACTIONS.inc(mode="llm_error_fallback")
+                yield from self._fallback_extraction(subject, body, sender, received)
+    
+    def _skip_by_triage(self, subject: str, body: str, sender: str, headers: Optional[Dict]) -> bool:
+        """True if the triage stage confidently marks this email as non-actionable."""
+        if self.triage is None:
+            return False
+        with tracing.span("extract.triage") as span:
+            decision = self.triage.triage(subject, body, sender, headers)
+            span.set_attributes(actionable=decision["actionable"], reason=decision["reason"])
+        if decision["actionable"]:
+            return False
+        print(f"Triage: skipping non-actionable email ({decision['reason']}, "
+              f"confidence {decision['confidence']:.2f})")
+        return True
+    
+    def preprocess_body(self, body: str) -> str:
+        """Clean an email body before extraction and record tokens saved."""
+        with tracing.span("extract.preprocess") as span:
+            cleaned, stats = preprocess_body(body, self.body_token_budget)
+            span.set_attributes(tokens=stats["tokens"], tokens_saved=stats["tokens_saved"])
+        TOKENS_SAVED.inc(stats["tokens_saved"])
+        if self.llm_enabled and stats["tokens_saved"]:
+            print(f"Preprocessed body: {stats['original_tokens']} -> {stats['tokens']} tokens "
+                  f"({stats['tokens_saved']} saved{', truncated' if stats['truncated'] else ''})")
+        return cleaned
+    
+    def extract_many(self, emails: List[Dict], workers: Optional[int] = None,
+                     chunksize: Optional[int] = None) -> List[List[Dict]]:
+        """
+        Extract tasks from many emails ({"subject", "body", "sender", "received_at"?}).
+        Returns one task list per email, in input order.
+        
+        In fallback mode the work is CPU bound, so it fans out across a process
+        pool (reused between calls). With an LLM client the calls are I/O bound
+        and run on a thread pool instead.
+        """
+        if not emails:
+            return []
+        workers = workers or os.cpu_count() or 1
+        
+        if workers <= 1 or len(emails) == 1:
+            return [self._extract_payload(email) for email in emails]
+        
+        if self.llm_enabled:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # Worker threads do not inherit contextvars; carry the caller's span over
+                return list(executor.map(tracing.bind(self._extract_payload), emails))
+        
+        if chunksize is None:
+            # A few chunks per worker keeps them busy without per-email IPC overhead
+            chunksize = max(1, min(256, len(emails) // (workers * 4)))
+        # Worker processes have their own registries, so count the batch here
+        EXTRACTIONS.inc(len(emails), mode="fallback")
+        with self.worker_pool(workers) as pool:
+            return list(pool.map(_fallback_worker, emails, chunksize=chunksize))
+    
+    def _extract_payload(self, email: Dict) -> List[Dict]:
+        """Run extract_tasks_from_email on an email payload dictionary."""
+        with tracing.span("extract", sender=email.get('sender', '')):
+            return self.extract_tasks_from_email(
+                email.get('subject', ''),
+                email.get('body', ''),
+                email.get('sender', ''),
+                received_at=email.get('received_at'),
+                headers=email.get('headers')
+            )
+    
+    @contextmanager
+    def worker_pool(self, workers: int):
+        """
+        Lease the fallback process pool (with self.worker_pool(n) as pool: ...),
+        creating it, or a replacement when the worker count changed. A replaced
+        pool is shut down once its last lease ends. Callers with other CPU-bound
+        work for the same batch (e.g. MIME parsing) can submit it here instead
+        of starting a second pool.
+        """
+        retired = None
+        with self._pool_lock:
+            if self._pool is not None and self._pool_workers != workers:
+                if not self._pool_users.get(self._pool):
+                    retired = self._pool
+                self._pool = None
+            if self._pool is None:
+                config = {
+                    "category_keywords": self.category_keywords,
+                    "priority_keywords": self.priority_keywords,
+                    "action_verbs": self.action_verbs,
+                }
+                # multiprocessing is only imported when a batch actually needs it
+                from concurrent.futures import ProcessPoolExecutor
+                self._pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=_init_fallback_worker,
+                    initargs=(config,)
+                )
+                self._pool_workers = workers
+            pool = self._pool
+            self._pool_users[pool] = self._pool_users.get(pool, 0) + 1
+        if retired is not None:
+            retired.shutdown()
+        try:
+            yield pool
+        finally:
+            self._release_pool(pool)
+
+    def _release_pool(self, pool) -> None:
+        with self._pool_lock:
+            self._pool_users[pool] -= 1
+            if self._pool_users[pool]:
+                return
+            del self._pool_users[pool]
+            if pool is self._pool:
+                return
+        # Replaced (or closed) while leased: this was its last user
+        pool.shutdown()
+
+    def close(self) -> None:
+        """
+        Shut down the batch worker pool, if one was started (a pool still leased
+        shuts down when its lease ends), and drop an LLM client built from
+        http_client_factory (its pool may be closed next); both are rebuilt on
+        next use. An injected client is kept.
+        """
+        with self._pool_lock:
+            pool, self._pool, self._pool_workers = self._pool, None, 0
+            if self._pool_users.get(pool):
+                pool = None
+        if pool is not None:
+            pool.shutdown()
+        if self._http_client_factory is not None:
+            with self._client_lock:
+                self._client = None
+                self._router = None
     
     def build_extraction_prompt(self, subject: str, body: str) -> str:
         """Construct LLM prompt with instructions for task extraction."""
@@ -93,6 +395,7 @@ class TaskExtractor:
 - category: One of [Work, Personal, Academic, Urgent, Low Priority]
 - priority: One of [High, Medium, Low]
 - due_date: Extract any mentioned dates in YYYY-MM-DD format, or null if none
+- confidence: Number from 0 to 1 for how sure you are this is a real task with the right details
 
 Email Subject: {subject}
 
@@ -105,7 +408,8 @@ Respond ONLY with a JSON array of tasks in this exact format:
     "description": "task description",
     "category": "Work",
     "priority": "High",
-    "due_date": "2025-12-10"
+    "due_date": "2025-12-10",
+    "confidence": 0.9
   }}
 ]
 
@@ -115,24 +419,65 @@ If no actionable tasks are found, return an empty array: []
     
     def parse_llm_response(self, response: str) -> List[Dict]:
         """Parse LLM JSON response into structured task objects."""
+        tasks = self._try_parse_tasks(response)
+        return tasks if tasks is not None else []
+    
+    def _try_parse_tasks(self, response: str) -> Optional[List[Dict]]:
+        """Parse an LLM response into a task list; None if it contains no JSON array."""
+        # Sometimes LLM adds extra text, so decode the first complete JSON array in it
+        decoder = json.JSONDecoder()
+        start = response.find('[')
+        while start != -1:
+            try:
+                tasks, _ = decoder.raw_decode(response, start)
+                if isinstance(tasks, list):
+                    return tasks
+            except json.JSONDecodeError:
+                pass
+            start = response.find('[', start + 1)
+        print("Failed to parse LLM response as JSON")
+        print(f"Response was: {response[:200]}...")
+        return None
+    
+    def parse_structured_response(self, response: str) -> Tuple[Optional[List[Dict]], List[str]]:
+        """
+        Parse and validate record_tasks output ({"tasks": [...]}), also accepting a
+        bare array or JSON embedded in text. Returns (tasks or None, schema errors).
+        Each task is validated on its own: invalid ones are normalized, or dropped
+        when unusable; the result is None only when no task in a non-empty list
+        survives (or the output has no task list at all).
+        """
         try:
-            # Try to extract JSON from response
-            # Sometimes LLM adds extra text, so we look for JSON array
-            json_match = re.search(r'\[.*\]', response, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(0)
-                tasks = json.loads(json_str)
-                return tasks if isinstance(tasks, list) else []
-            else:
-                # Try parsing the whole response
-                tasks = json.loads(response)
-                return tasks if isinstance(tasks, list) else []
-        except json.JSONDecodeError as e:
-            print(f"Failed to parse LLM response as JSON: {e}")
-            print(f"Response was: {response[:200]}...")
-            return []
+            payload = json.loads(response)
+        except json.JSONDecodeError:
+            tasks = self._try_parse_tasks(response)
+            if tasks is None:
+                return None, ["response is not valid JSON"]
+            payload = tasks
+        if isinstance(payload, list):
+            payload = {"tasks": payload}
+        
+        if not isinstance(payload, dict) or not isinstance(payload.get("tasks"), list):
+            return None, validate_task_list(payload) or ["$.tasks: expected array"]
+        
+        tasks, errors = [], []
+        for index, task in enumerate(payload["tasks"]):
+            task_errors = validate_task(task, f"$.tasks[{index}]")
+            if task_errors:
+                errors.extend(task_errors)
+                task = normalize_task(task)
+                if task is None:
+                    continue
+            tasks.append(task)
+        if payload["tasks"] and not tasks:
+            return None, errors
+        if errors:
+            print(f"Normalized LLM output ({len(errors)} schema problems, "
+                  f"{len(payload['tasks']) - len(tasks)} tasks dropped)")
+        return tasks, errors
     
-    def _enrich_task(self, task: Dict, email_subject: str, sender: str) -> Dict:
+    def _enrich_task(self, task: Dict, email_subject: str, sender: str,
+                     received: Optional[datetime] = None) -> Dict:
         """Add additional metadata and validate task fields."""
         # Ensure required fields
         enriched = {
@@ -144,13 +489,13 @@ If no actionable tasks are found, return an empty array: []
             "status": "pending",
             "source_email": {
                 "subject": email_subject,
-                "received_at": datetime.utcnow().isoformat() + "Z"
+                "received_at": self._received_at_iso(received)
             }
         }
         
         # Extract due date if not provided
         if not enriched["due_date"]:
-            enriched["due_date"] = self.extract_due_date(enriched["description"])
+            enriched["due_date"] = self.extract_due_date(enriched["description"], received)
         
         # Determine priority if not set properly
         enriched["priority"] = self.determine_priority(
@@ -165,66 +510,48 @@ If no actionable tasks are found, return an empty array: []
         Determine category: Work, Personal, Academic, Urgent, Low Priority.
         Check for urgency indicators first.
         """
-        task_lower = task_text.lower()
+        labels = self.keyword_matcher.match(task_text)
         
         # Check for urgency indicators (takes precedence)
-        urgency_keywords = ['urgent', 'asap', 'critical', 'emergency', 'immediately', 'now']
-        if any(keyword in task_lower for keyword in urgency_keywords):
+        if ("category", "Urgent") in labels:
             return "Urgent"
         
         # Use suggested category if valid
-        valid_categories = ["Work", "Personal", "Academic", "Urgent", "Low Priority"]
-        if suggested_category in valid_categories:
+        if suggested_category in VALID_CATEGORIES:
             return suggested_category
         
-        # Fallback: keyword-based classification
-        if any(word in task_lower for word in ['meeting', 'report', 'project', 'client', 'presentation', 'deadline']):
-            return "Work"
-        elif any(word in task_lower for word in ['research', 'paper', 'study', 'assignment', 'thesis', 'course']):
-            return "Academic"
-        elif any(word in task_lower for word in ['family', 'personal', 'home', 'grocery', 'appointment']):
-            return "Personal"
-        elif any(word in task_lower for word in ['later', 'sometime', 'eventually', 'when possible']):
-            return "Low Priority"
-        else:
-            return "Work"  # Default
+        # Fallback: keyword-based classification, in table order
+        for category in self.category_keywords:
+            if ("category", category) in labels:
+                return category
+        return "Work"  # Default
     
-    def extract_due_date(self, task_text: str) -> Optional[str]:
-        """Extract and normalize due date from task text."""
+    def extract_due_date(self, task_text: str, reference: Optional[datetime] = None) -> Optional[str]:
+        """
+        Extract and normalize due date from task text.
+        Relative phrases (tomorrow, next friday, in 3 days) resolve against reference.
+        """
         try:
-            # Common date patterns
-            date_patterns = [
-                r'by (\w+ \d+)',
-                r'due (\w+ \d+)',
-                r'on (\w+ \d+)',
-                r'(\d{4}-\d{2}-\d{2})',
-                r'(\d{1,2}/\d{1,2}/\d{4})',
-                r'(tomorrow|today|next week|next month)'
-            ]
-            
-            for pattern in date_patterns:
-                match = re.search(pattern, task_text, re.IGNORECASE)
-                if match:
-                    date_str = match.group(1)
-                    # Try to parse the date
-                    try:
-                        parsed_date = date_parser.parse(date_str, fuzzy=True)
-                        return parsed_date.strftime("%Y-%m-%d")
-                    except:
-                        continue
-            
-            return None
+            return self.date_resolver.resolve(task_text, reference)
         except Exception as e:
             print(f"Error extracting due date: {e}")
             return None
     
+    @staticmethod
+    def _received_at_iso(received: Optional[datetime]) -> str:
+        """Format the email received time (or now) as a UTC ISO timestamp."""
+        if received is None:
+            return datetime.utcnow().isoformat() + "Z"
+        if received.tzinfo is not None:
+            received = received.astimezone(timezone.utc).replace(tzinfo=None)
+        return received.isoformat() + "Z"
+    
     def determine_priority(self, task_text: str, category: str) -> str:
         """Determine priority level: High, Medium, Low."""
-        task_lower = task_text.lower()
+        labels = self.keyword_matcher.match(task_text)
         
         # High priority indicators
-        high_priority_keywords = ['urgent', 'asap', 'critical', 'important', 'priority', 'immediately']
-        if any(keyword in task_lower for keyword in high_priority_keywords):
+        if ("priority", "High") in labels:
             return "High"
         
         # Urgent category always gets high priority
@@ -232,14 +559,14 @@ If no actionable tasks are found, return an empty array: []
             return "High"
         
         # Low priority indicators
-        low_priority_keywords = ['later', 'sometime', 'eventually', 'when possible', 'optional']
-        if any(keyword in task_lower for keyword in low_priority_keywords):
+        if ("priority", "Low") in labels:
             return "Low"
         
         # Default to medium
         return "Medium"
     
-    def _fallback_extraction(self, subject: str, body: str, sender: str) -> List[Dict]:
+    def _fallback_extraction(self, subject: str, body: str, sender: str,
+                             received: Optional[datetime] = None) -> List[Dict]:
         """
         Basic keyword-based extraction when LLM is unavailable.
         Looks for action verbs and creates simple tasks.
@@ -249,26 +576,24 @@ If no actionable tasks are found, return an empty array: []
         # Combine subject and body
         text = f"{subject}\n{body}"
         
-        # Look for sentences with action verbs
-        action_verbs = ['complete', 'finish', 'submit', 'prepare', 'review', 'send', 'create', 
-                       'update', 'fix', 'schedule', 'call', 'email', 'meet', 'discuss']
-        
         tasks = []
         sentences = text.split('.')
+        received_at = self._received_at_iso(received)
         
         for sentence in sentences:
             sentence = sentence.strip()
-            if any(verb in sentence.lower() for verb in action_verbs) and len(sentence) > 10:
+            # Look for sentences with action verbs
+            if len(sentence) > 10 and self.action_pattern.search(sentence):
                 task = {
                     "description": sentence,
                     "category": self.classify_category(sentence),
                     "priority": self.determine_priority(sentence, ""),
-                    "due_date": self.extract_due_date(sentence),
+                    "due_date": self.extract_due_date(sentence, received),
                     "sender": sender,
                     "status": "pending",
                     "source_email": {
                         "subject": subject,
-                        "received_at": datetime.utcnow().isoformat() + "Z"
+                        "received_at": received_at
                     }
                 }
                 tasks.append(task)
@@ -276,8 +601,23 @@ If no actionable tasks are found, return an empty array: []
         return tasks[:5]  # Limit to 5 tasks in fallback mode
 
 
+# Per-process extractor used by extract_many's process pool
+_worker_extractor = None
+
+
+def _init_fallback_worker(config: Dict) -> None:
+    """Process pool initializer: build one fallback-only extractor per worker."""
+    global _worker_extractor
+    _worker_extractor = TaskExtractor(use_llm=False, **config)
+
+
+def _fallback_worker(email: Dict) -> List[Dict]:
+    """Process pool task: extract tasks from one email payload."""
+    return _worker_extractor._extract_payload(email)
+
+
 # Convenience function
 def extract_tasks(subject: str, body: str, sender: str, api_key: Optional[str] = None) -> List[Dict]:
-    """Extract tasks from email using default extractor."""
-    extractor = TaskExtractor(api_key=api_key)
-    return extractor.extract_tasks_from_email(subject, body, sender)
+    """Extract tasks from email using the shared extractor for this API key (see components)."""
+    from components import get_extractor
+    return get_extractor(api_key=api_key).extract_tasks_from_email(subject, body, sender)
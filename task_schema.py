@@ -0,0 +1,201 @@
+"""
+Task Schema Module
+JSON schema for structured LLM output, the function-calling tool built from
+it, validators compiled once from the schema, and per-task normalization so
+one malformed task does not cost the rest of the list.
+"""
+
+import re
+from typing import Any, Callable, Dict, List
+
+Validator = Callable[[Any, str], List[str]]
+
+CATEGORIES = ["Work", "Personal", "Academic", "Urgent", "Low Priority"]
+PRIORITIES = ["High", "Medium", "Low"]
+
+TASK_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "description": {"type": "string", "minLength": 1,
+                        "description": "Clear description of what needs to be done"},
+        "category": {"type": "string", "enum": CATEGORIES},
+        "priority": {"type": "string", "enum": PRIORITIES},
+        "due_date": {"type": ["string", "null"], "pattern": r"^\d{4}-\d{2}-\d{2}$",
+                     "description": "YYYY-MM-DD, or null if no date is mentioned"},
+        "confidence": {"type": "number", "minimum": 0, "maximum": 1,
+                       "description": "How sure you are this is a real task with the right details"},
+    },
+    "required": ["description", "category", "priority", "due_date"],
+}
+
+TASK_LIST_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "tasks": {"type": "array", "items": TASK_SCHEMA},
+    },
+    "required": ["tasks"],
+}
+
+RECORD_TASKS_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "record_tasks",
+        "description": "Record every actionable task found in the email (an empty list if none).",
+        "parameters": TASK_LIST_SCHEMA,
+    },
+}
+
+RECORD_TASKS_CHOICE = {"type": "function", "function": {"name": "record_tasks"}}
+
+_JSON_TYPES = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "null": lambda v: v is None,
+}
+
+
+def compile_schema(schema: Dict) -> Validator:
+    """
+    Compile the JSON Schema subset used here (type, enum, properties, required,
+    items, minLength, pattern, minimum, maximum) into a validator function.
+    The validator returns a list of error messages (empty when valid).
+    """
+    checks: List[Validator] = []
+
+    if "type" in schema:
+        type_names = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+        type_checks = [_JSON_TYPES[name] for name in type_names]
+        expected = " or ".join(type_names)
+
+        def check_type(value, path):
+            if any(check(value) for check in type_checks):
+                return []
+            return [f"{path}: expected {expected}, got {type(value).__name__}"]
+        checks.append(check_type)
+
+    if "enum" in schema:
+        allowed = set(schema["enum"])
+
+        def check_enum(value, path):
+            return [] if value in allowed else [f"{path}: {value!r} is not one of {sorted(allowed)}"]
+        checks.append(check_enum)
+
+    if "minLength" in schema:
+        min_length = schema["minLength"]
+
+        def check_min_length(value, path):
+            if isinstance(value, str) and len(value.strip()) < min_length:
+                return [f"{path}: must not be empty"]
+            return []
+        checks.append(check_min_length)
+
+    if "pattern" in schema:
+        pattern = re.compile(schema["pattern"])
+
+        def check_pattern(value, path):
+            if isinstance(value, str) and not pattern.search(value):
+                return [f"{path}: {value!r} does not match {pattern.pattern}"]
+            return []
+        checks.append(check_pattern)
+
+    if "minimum" in schema or "maximum" in schema:
+        low = schema.get("minimum", float("-inf"))
+        high = schema.get("maximum", float("inf"))
+
+        def check_range(value, path):
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and not low <= value <= high:
+                return [f"{path}: {value} is outside [{low}, {high}]"]
+            return []
+        checks.append(check_range)
+
+    if "required" in schema:
+        required = list(schema["required"])
+
+        def check_required(value, path):
+            if not isinstance(value, dict):
+                return []
+            return [f"{path}: missing required field '{name}'" for name in required if name not in value]
+        checks.append(check_required)
+
+    if "properties" in schema:
+        property_validators = {name: compile_schema(sub) for name, sub in schema["properties"].items()}
+
+        def check_properties(value, path):
+            if not isinstance(value, dict):
+                return []
+            errors = []
+            for name, validator in property_validators.items():
+                if name in value:
+                    errors.extend(validator(value[name], f"{path}.{name}"))
+            return errors
+        checks.append(check_properties)
+
+    if "items" in schema:
+        item_validator = compile_schema(schema["items"])
+
+        def check_items(value, path):
+            if not isinstance(value, list):
+                return []
+            errors = []
+            for index, item in enumerate(value):
+                errors.extend(item_validator(item, f"{path}[{index}]"))
+            return errors
+        checks.append(check_items)
+
+    def validate(value, path="$"):
+        errors = []
+        for check in checks:
+            errors.extend(check(value, path))
+        return errors
+
+    return validate
+
+
+def _enum_value(value: Any, allowed: List[str]) -> Any:
+    """The allowed value matching value case-insensitively, or None."""
+    if isinstance(value, str):
+        for option in allowed:
+            if value.strip().lower() == option.lower():
+                return option
+    return None
+
+
+def normalize_task(task: Any) -> Any:
+    """
+    Repair one task that failed validation: enum values are matched
+    case-insensitively, and fields that still don't fit (category, priority,
+    due_date, confidence) are cleared so enrichment fills them in. Returns
+    None for a task that can't be used (not an object, or no description).
+    """
+    if not isinstance(task, dict):
+        return None
+    description = task.get("description")
+    if not isinstance(description, str) or not description.strip():
+        return None
+
+    task = dict(task)
+    task["category"] = _enum_value(task.get("category"), CATEGORIES)
+    task["priority"] = _enum_value(task.get("priority"), PRIORITIES)
+    due_date = task.get("due_date")
+    if not isinstance(due_date, str) or not _DUE_DATE.match(due_date.strip()):
+        due_date = None
+    task["due_date"] = due_date.strip() if due_date else None
+    confidence = task.pop("confidence", None)
+    if isinstance(confidence, str):
+        try:
+            confidence = float(confidence)
+        except ValueError:
+            confidence = None
+    if isinstance(confidence, (int, float)) and not isinstance(confidence, bool):
+        task["confidence"] = min(1.0, max(0.0, float(confidence)))
+    return task
+
+
+# Compiled once at import
+validate_task_list = compile_schema(TASK_LIST_SCHEMA)
+validate_task = compile_schema(TASK_SCHEMA)
+_DUE_DATE = re.compile(TASK_SCHEMA["properties"]["due_date"]["pattern"])
@@ -6,9 +6,43 @@ Handles file-based JSON storage for tasks with duplicate detection and CRUD oper
 import json
 import os
 import uuid
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import shutil
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers in one process still serialize on the thread lock
+    fcntl = None
+
+import metrics
+import tracing
+from clean_tasks import clean_task
+from search_index import SearchIndex
+
+STORE_SECONDS = metrics.histogram(
+    "task_store_operation_seconds", "TaskStore file load/save duration", ["operation"]
+)
+STORE_FILE_BYTES = metrics.gauge("task_store_file_bytes", "Size of the task store file")
+STORE_TASKS = metrics.gauge("task_store_tasks", "Tasks in the store at the last load or save")
+DUPLICATES = metrics.counter("task_store_duplicates_total", "Tasks rejected as duplicates")
+
+# Bookkeeping kept in the file but not part of a task as callers see it
+INTERNAL_FIELDS = ("cleaned",)
+
+
+def public_task(task: Dict) -> Dict:
+    """Copy of a task without the store's internal fields."""
+    return {key: value for key, value in task.items() if key not in INTERNAL_FIELDS}
+
+
+def _strip_internal(task: Dict) -> Dict:
+    for field in INTERNAL_FIELDS:
+        task.pop(field, None)
+    return task
 
 
 class TaskStore:
@@ -18,6 +52,12 @@ class TaskStore:
         """Initialize the task store with specified file path."""
         self.file_path = file_path
         self.backup_path = f"{file_path}.backup"
+        self.lock_path = f"{file_path}.lock"
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+        self._lock_file = None
+        self._search_index: Optional[SearchIndex] = None
+        self._index_signature = None
         self.initialize_store()
     
     def initialize_store(self) -> None:
@@ -141,12 +181,24 @@ class TaskStore:
         ]
         return sample_tasks
     
-    def load_tasks(self) -> List[Dict]:
-        """Read and parse tasks from JSON file."""
+    def load_tasks(self, internal: bool = False) -> List[Dict]:
+        """
+        Read and parse tasks from JSON file. Internal fields (the clean marker)
+        are dropped unless internal is True, as it must be for read-modify-write.
+        """
         try:
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return data.get("tasks", [])
+            with tracing.span("store.load") as span:
+                start = time.perf_counter()
+                with open(self.file_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                tasks = data.get("tasks", [])
+                if not internal:
+                    for task in tasks:
+                        _strip_internal(task)
+                STORE_SECONDS.observe(time.perf_counter() - start, operation="load")
+                STORE_TASKS.set(len(tasks))
+                span.set_attributes(tasks=len(tasks), bytes=os.path.getsize(self.file_path))
+            return tasks
         except FileNotFoundError:
             print(f"Task file not found at {self.file_path}, initializing...")
             self.initialize_store()
@@ -157,28 +209,71 @@ class TaskStore:
             if os.path.exists(self.backup_path):
                 print("Attempting to recover from backup...")
                 shutil.copy(self.backup_path, self.file_path)
-                return self.load_tasks()
+                return self.load_tasks(internal)
             return []
     
     def save_tasks(self, tasks: List[Dict]) -> None:
         """Write tasks to JSON file with proper formatting."""
-        # Create backup before writing
-        if os.path.exists(self.file_path):
-            shutil.copy(self.file_path, self.backup_path)
-        
-        data = {
-            "tasks": tasks,
-            "metadata": {
-                "last_updated": datetime.utcnow().isoformat() + "Z",
-                "total_tasks": len(tasks)
+        with tracing.span("store.save", tasks=len(tasks)) as span, self._locked():
+            start = time.perf_counter()
+            # Create backup before writing
+            if os.path.exists(self.file_path):
+                shutil.copy(self.file_path, self.backup_path)
+            
+            data = {
+                "tasks": tasks,
+                "metadata": {
+                    "last_updated": datetime.utcnow().isoformat() + "Z",
+                    "total_tasks": len(tasks)
+                }
             }
-        }
-        self._write_json(data)
+            self._write_json(data)
+            STORE_SECONDS.observe(time.perf_counter() - start, operation="save")
+            size = os.path.getsize(self.file_path)
+            STORE_TASKS.set(len(tasks))
+            STORE_FILE_BYTES.set(size)
+            span.set_attribute("bytes", size)
     
     def _write_json(self, data: Dict) -> None:
-        """Write data to JSON file with formatting."""
-        with open(self.file_path, 'w', encoding='utf-8') as f:
+        """Write data to JSON file with formatting, atomically (readers never see a partial file)."""
+        temp_path = f"{self.file_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.file_path)
+    
+    @contextmanager
+    def _locked(self):
+        """Hold the store lock: other threads, and other processes using the same file, wait."""
+        with self._lock:
+            self._lock_depth += 1
+            try:
+                if self._lock_depth == 1 and fcntl is not None:
+                    self._lock_file = open(self.lock_path, 'a')
+                    fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+                yield
+            finally:
+                if self._lock_depth == 1 and self._lock_file is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+                    self._lock_file.close()
+                    self._lock_file = None
+                self._lock_depth -= 1
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Read-modify-write under the store lock:
+            with store.transaction() as tasks:
+                ...change tasks in place...
+        The list is saved when the block exits normally; nothing is written on an exception.
+        """
+        with self._locked():
+            tasks = self.load_tasks(internal=True)
+            yield tasks
+            self.save_tasks(tasks)
+            # Changes are arbitrary: diff the whole list into the search index
+            self._sync_index(tasks, None, full=True)
     
     def generate_task_id(self) -> str:
         """Generate unique ID using UUID."""
@@ -189,13 +284,67 @@ class TaskStore:
         Add new task with unique ID, check duplicates.
         Returns True if added, False if duplicate.
         """
-        tasks = self.load_tasks()
-        
-        # Check for duplicates
-        if self.is_duplicate(task, tasks):
-            print(f"Duplicate task detected: {task.get('description', '')[:50]}...")
-            return False
-        
+        with tracing.span("store.add_task") as span, self._locked():
+            clean_task(task)
+            tasks = self.load_tasks(internal=True)
+            
+            # Check for duplicates
+            if self.is_duplicate(task, tasks):
+                DUPLICATES.inc()
+                span.set_attribute("duplicate", True)
+                print(f"Duplicate task detected: {task.get('description', '')[:50]}...")
+                _strip_internal(task)
+                return False
+            
+            self._prepare_task(task)
+            tasks.append(task)
+            signature = self._file_signature()
+            self.save_tasks(tasks)
+            self._sync_index([task], signature, tasks)
+            # The caller (and API responses built from its dict) see the task without the marker
+            _strip_internal(task)
+            span.set_attributes(duplicate=False, task_id=task['id'])
+            print(f"Added task: {task['id']}")
+            return True
+    
+    def add_tasks(self, new_tasks: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Add many tasks with a single load and a single save.
+        Duplicates are checked against the store and within the batch.
+        Returns (added tasks, duplicate tasks).
+        """
+        with tracing.span("store.add_tasks", batch=len(new_tasks)) as span, self._locked():
+            tasks = self.load_tasks(internal=True)
+            with tracing.span("store.dedup", existing=len(tasks)):
+                seen = {self.normalize_text(t.get('description', '')) for t in tasks}
+                
+                added = []
+                duplicates = []
+                for task in new_tasks:
+                    clean_task(task)
+                    key = self.normalize_text(task.get('description', ''))
+                    if key in seen:
+                        duplicates.append(task)
+                        continue
+                    seen.add(key)
+                    self._prepare_task(task)
+                    tasks.append(task)
+                    added.append(task)
+            
+            span.set_attributes(added=len(added), duplicates=len(duplicates))
+            if duplicates:
+                DUPLICATES.inc(len(duplicates))
+            if added:
+                signature = self._file_signature()
+                self.save_tasks(tasks)
+                self._sync_index(added, signature, tasks)
+                print(f"Added {len(added)} tasks ({len(duplicates)} duplicates skipped)")
+            for task in new_tasks:
+                _strip_internal(task)
+            return added, duplicates
+    
+    def _prepare_task(self, task: Dict) -> None:
+        """Fill in ID, created_at and status defaults on a new task."""
         # Assign unique ID if not present
         if 'id' not in task:
             task['id'] = self.generate_task_id()
@@ -207,11 +356,6 @@ class TaskStore:
         # Ensure status is set
         if 'status' not in task:
             task['status'] = 'pending'
-        
-        tasks.append(task)
-        self.save_tasks(tasks)
-        print(f"Added task: {task['id']}")
-        return True
     
     def get_task_by_id(self, task_id: str) -> Optional[Dict]:
         """Retrieve specific task by ID."""
@@ -226,25 +370,73 @@ class TaskStore:
         Update task status (pending/done).
         Returns True if updated, False if task not found.
         """
-        tasks = self.load_tasks()
-        for task in tasks:
-            if task.get('id') == task_id:
-                task['status'] = status
-                self.save_tasks(tasks)
-                print(f"Updated task {task_id} status to {status}")
-                return True
+        with self._locked():
+            tasks = self.load_tasks(internal=True)
+            for task in tasks:
+                if task.get('id') == task_id:
+                    task['status'] = status
+                    signature = self._file_signature()
+                    self.save_tasks(tasks)
+                    self._sync_index([task], signature, tasks)
+                    print(f"Updated task {task_id} status to {status}")
+                    return True
         print(f"Task not found: {task_id}")
         return False
     
+    def search_tasks(self, query: str, limit: int = 20, offset: int = 0) -> Tuple[List[Dict], int]:
+        """
+        Full-text search over description, subject and sender.
+        Returns (ranked page of tasks, total number of matches).
+        """
+        with self._lock:
+            signature = self._file_signature()
+            if self._search_index is None:
+                # First search: build once
+                index = SearchIndex()
+                index.build(self.load_tasks())
+                self._search_index = index
+                self._index_signature = signature
+            elif signature != self._index_signature:
+                # Another process wrote the file: re-index only the tasks that differ
+                self._search_index.sync(self.load_tasks())
+                self._index_signature = signature
+            page, total = self._search_index.search(query, limit=limit, offset=offset)
+            return [public_task(task) for task in page], total
+    
+    def _sync_index(self, changed: List[Dict], signature_before, tasks: Optional[List[Dict]] = None,
+                    full: bool = False) -> None:
+        """
+        Apply this store's own write to the search index after a save (caller
+        holds the lock). If another process wrote the file since the index was
+        last synced, the saved list (tasks) is diffed in as well.
+        """
+        if self._search_index is None:
+            return
+        if full or signature_before != self._index_signature:
+            self._search_index.sync(tasks if tasks is not None else changed)
+        else:
+            for task in changed:
+                self._search_index.update(task)
+        self._index_signature = self._file_signature()
+    
+    def _file_signature(self):
+        """Cheap change detector for the backing file (mtime and size)."""
+        try:
+            stat = os.stat(self.file_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
     def is_duplicate(self, new_task: Dict, existing_tasks: List[Dict]) -> bool:
         """Compare normalized task descriptions to detect duplicates."""
-        new_desc = self.normalize_text(new_task.get('description', ''))
-        
-        for existing_task in existing_tasks:
-            existing_desc = self.normalize_text(existing_task.get('description', ''))
-            if new_desc == existing_desc:
-                return True
-        return False
+        with tracing.span("store.is_duplicate", existing=len(existing_tasks)):
+            new_desc = self.normalize_text(new_task.get('description', ''))
+            
+            for existing_task in existing_tasks:
+                existing_desc = self.normalize_text(existing_task.get('description', ''))
+                if new_desc == existing_desc:
+                    return True
+            return False
     
     def normalize_text(self, text: str) -> str:
         """Lowercase, strip whitespace, remove punctuation for comparison."""
@@ -258,12 +450,8 @@ class TaskStore:
         return text
 
 
-# Convenience functions for module-level access
-_default_store = None
-
+# Convenience function for module-level access
 def get_store(file_path: str = "data/tasks.json") -> TaskStore:
-    """Get or create the default task store instance."""
-    global _default_store
-    if _default_store is None:
-        _default_store = TaskStore(file_path)
-    return _default_store
+    """Shared task store for a file: one instance per path (see components)."""
+    from components import store_at
+    return store_at(file_path)
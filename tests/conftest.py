@@ -0,0 +1,71 @@
+"""Shared pytest setup: make the top-level modules importable from tests/, and common fixtures."""
+
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    """The Flask app module, with its task store and ingest index in a temporary directory."""
+    monkeypatch.chdir(tmp_path)
+    import app as app_module
+    from ingest_index import IngestIndex
+    from task_store import TaskStore
+    monkeypatch.setattr(app_module, "task_store", TaskStore(str(tmp_path / "tasks.json")))
+    monkeypatch.setattr(app_module, "ingest_index", IngestIndex(str(tmp_path / "ingest_index.jsonl")))
+    return app_module
+
+
+class FakeIngestAPI:
+    """Records POST /ingest-emails batches; `statuses` are answered (in order) before normal replies."""
+
+    def __init__(self):
+        self.batches = []
+        self.statuses = []
+        self.lock = threading.Lock()
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                with api.lock:
+                    status = api.statuses.pop(0) if api.statuses else 200
+                    if status == 200:
+                        api.batches.append(body["emails"])
+                emails = body["emails"]
+                errors = [{"index": index, "error": "Missing required fields: body"}
+                          for index, email in enumerate(emails) if email.get("body") == "reject"]
+                reply = {"success": status == 200, "emails": len(emails) - len(errors),
+                         "added": len(emails) - len(errors), "duplicates": 0, "errors": errors}
+                data = json.dumps(reply).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def emails(self):
+        return [email for batch in self.batches for email in batch]
+
+
+@pytest.fixture
+def ingest_api():
+    """A local stand-in for the task API's POST /ingest-emails."""
+    api = FakeIngestAPI()
+    yield api
+    api.server.shutdown()
+    api.server.server_close()
@@ -0,0 +1,29 @@
+"""Property: however a completion is split into chunks, the parser yields the same tasks."""
+
+import json
+
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from stream_parser import IncrementalTaskParser
+
+text = st.text(alphabet=st.characters(blacklist_categories=("Cs",)), max_size=40)
+values = st.recursive(
+    st.none() | st.booleans() | st.integers() | text,
+    lambda children: st.lists(children, max_size=3) | st.dictionaries(text, children, max_size=3),
+    max_leaves=8,
+)
+tasks = st.lists(st.dictionaries(text, values, max_size=4), max_size=5)
+
+
+@settings(max_examples=200, deadline=None)
+@given(tasks=tasks, wrap=st.booleans(), cuts=st.lists(st.integers(min_value=0), max_size=12))
+def test_chunking_does_not_change_the_result(tasks, wrap, cuts):
+    document = json.dumps({"tasks": tasks} if wrap else tasks, ensure_ascii=False)
+    points = sorted({cut % (len(document) + 1) for cut in cuts})
+    chunks = [document[start:end] for start, end in zip([0] + points, points + [len(document)])]
+
+    parser = IncrementalTaskParser()
+    parsed = [task for chunk in chunks for task in parser.feed(chunk)]
+
+    assert parsed == tasks
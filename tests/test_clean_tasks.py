@@ -0,0 +1,68 @@
+"""clean_store: cleaning unmarked tasks, the concurrent-edit conflict path and the hidden marker."""
+
+import json
+
+import pytest
+
+import clean_tasks
+from clean_tasks import CLEAN_VERSION, clean_store
+from task_store import TaskStore
+
+MESSY = "Send   the report\r\n\r\n\r\n\r\n  by Friday  "
+
+
+@pytest.fixture
+def store(tmp_path):
+    # Tasks written before cleaning existed: no marker, untidy text
+    path = tmp_path / "tasks.json"
+    tasks = [{"id": f"t{number}", "description": f"{MESSY} #{number}", "status": "pending",
+              "source_email": {"subject": "  Weekly   report  "}} for number in range(3)]
+    tasks.append({"id": "t3", "description": "Already tidy", "status": "pending"})
+    path.write_text(json.dumps({"tasks": tasks, "metadata": {}}))
+    return TaskStore(str(path))
+
+
+def test_unmarked_tasks_are_cleaned_and_marked(store):
+    stats = clean_store(store)
+
+    assert stats["tasks"] == 4 and stats["cleaned"] == 4
+    assert stats["changed"] == 3 and stats["conflicts"] == 0
+    tasks = store.load_tasks(internal=True)
+    assert tasks[0]["description"] == "Send the report\nby Friday #0"
+    assert tasks[0]["source_email"]["subject"] == "Weekly report"
+    assert all(task["cleaned"] == CLEAN_VERSION for task in tasks)
+
+    assert clean_store(store)["cleaned"] == 0
+    assert clean_store(store, force=True)["cleaned"] == 4
+
+
+def test_tasks_edited_during_cleaning_are_left_for_the_next_run(store, monkeypatch):
+    clean_chunk = clean_tasks._clean_chunk
+
+    def clean_while_user_edits(chunk):
+        # The user edits t1 after clean_store took its snapshot
+        with store.transaction() as tasks:
+            tasks[1]["description"] = "Edited   by the user"
+        return clean_chunk(chunk)
+
+    monkeypatch.setattr(clean_tasks, "_clean_chunk", clean_while_user_edits)
+    stats = clean_store(store)
+
+    assert stats["conflicts"] == 1 and stats["cleaned"] == 3
+    edited = store.load_tasks(internal=True)[1]
+    assert edited["description"] == "Edited   by the user"
+    assert "cleaned" not in edited
+
+    monkeypatch.setattr(clean_tasks, "_clean_chunk", clean_chunk)
+    stats = clean_store(store)
+    assert stats["cleaned"] == 1 and stats["conflicts"] == 0
+    assert store.load_tasks()[1]["description"] == "Edited by the user"
+
+
+def test_marker_is_internal(store):
+    clean_store(store)
+    assert not any("cleaned" in task for task in store.load_tasks())
+    assert store.add_task({"description": "  New   task  ", "status": "pending"})
+    added = store.load_tasks()[-1]
+    assert added["description"] == "New task" and "cleaned" not in added
+    assert store.load_tasks(internal=True)[-1]["cleaned"] == CLEAN_VERSION
@@ -0,0 +1,86 @@
+"""Shared component registry: one extractor per configuration, one store per file, shutdown and warm-up."""
+
+import pytest
+
+import components
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    monkeypatch.setattr(components, "_extractors", {})
+    monkeypatch.setattr(components, "_stores", {})
+    monkeypatch.setattr(components, "_store_names", {})
+    monkeypatch.setattr(components, "_http_clients", {})
+    monkeypatch.setattr(components, "_warm_up_deferred", False)
+    monkeypatch.setenv("LLM_WARMUP", "false")
+    yield
+    components.shutdown()
+
+
+@pytest.fixture
+def warm_ups(monkeypatch):
+    """Warm-ups run synchronously and are recorded instead of opening connections."""
+    started = []
+    monkeypatch.setattr(components, "_warm_up", started.append)
+    monkeypatch.setattr(components.threading.Thread, "start", lambda thread: thread.run())
+    monkeypatch.setenv("LLM_WARMUP", "true")
+    return started
+
+
+def test_one_extractor_per_configuration():
+    extractor = components.get_extractor(use_llm=False)
+    assert components.get_extractor(use_llm=False) is extractor
+    assert components.get_extractor(use_llm=False, use_triage=False) is not extractor
+
+
+def test_one_store_per_file_and_named_stores(tmp_path):
+    path = str(tmp_path / "tasks.json")
+    store = components.store_at(path)
+    assert components.store_at(str(tmp_path / "." / "tasks.json")) is store
+    assert components.get_store("main", path) is store
+    assert components.get_store("main") is store
+
+    components.get_store("archive", str(tmp_path / "archive.json"))
+    with pytest.raises(ValueError):
+        components.get_store("archive", str(tmp_path / "other.json"))
+
+
+def test_shutdown_keeps_stores_and_replaces_extractors(tmp_path):
+    store = components.get_store("main", str(tmp_path / "tasks.json"))
+    extractor = components.get_extractor(use_llm=False)
+
+    components.shutdown()
+
+    assert components.get_store("main") is store
+    assert components.get_extractor(use_llm=False) is not extractor
+
+
+def test_held_extractor_rebuilds_its_client_after_shutdown():
+    extractor = components.get_extractor(api_key="sk-test")
+    client = extractor.client
+    pool = components._http_clients["llm"]
+    assert extractor.router is not None
+
+    components.shutdown()
+
+    assert pool.is_closed
+    assert extractor.client is not client
+    assert not extractor.client._client.is_closed
+    assert extractor.router.client is extractor.client
+
+
+def test_warm_up_runs_for_llm_extractors_only(warm_ups):
+    components.get_extractor(use_llm=False)
+    extractor = components.get_extractor(api_key="sk-test")
+    assert warm_ups == [extractor]
+    components.get_extractor(api_key="sk-test")
+    assert warm_ups == [extractor]
+
+
+def test_deferred_warm_up_waits_for_the_worker(warm_ups):
+    components.defer_warm_up()
+    extractor = components.get_extractor(api_key="sk-test")
+    assert warm_ups == [] and components._http_clients == {}
+
+    components.start_warm_up()
+    assert warm_ups == [extractor]
@@ -0,0 +1,89 @@
+"""Due-date resolution: absolute dates, relative phrases, weekdays and month names."""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from date_resolver import DateResolver, parse_received_at
+
+# A Monday
+REFERENCE = datetime(2026, 10, 19, 9, 30)
+
+
+@pytest.fixture
+def resolver():
+    return DateResolver()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Submit by 2026-11-03", "2026-11-03"),
+    ("Due 12/15/2026", "2026-12-15"),
+    ("Deadline is December 15", "2026-12-15"),
+    ("Send it by Dec 15th, 2027", "2027-12-15"),
+    ("Before the 3rd of March", "2027-03-03"),       # already past this year: rolls forward
+    ("Finish it today", "2026-10-19"),
+    ("Reply by tomorrow", "2026-10-20"),
+    ("Wrap up by end of month", "2026-10-31"),
+    ("Ship in 2 weeks", "2026-11-02"),
+    ("Follow up next month", "2026-11-19"),
+])
+def test_absolute_and_relative_dates(resolver, text, expected):
+    assert resolver.resolve(text, REFERENCE) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Send the deck by Friday", "2026-10-23"),
+    ("Due: Wednesday", "2026-10-21"),
+    ("Review it before Monday", "2026-10-26"),       # today is Monday: the next one
+    ("this Monday", "2026-10-19"),
+    ("next Friday", "2026-10-30"),
+    ("the coming Tuesday", "2026-10-20"),
+])
+def test_weekdays(resolver, text, expected):
+    assert resolver.resolve(text, REFERENCE) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "Thanks for Monday's meeting",
+    "See you Friday",
+    "We may need more time",
+    "We may 2x the budget",
+    "Revenue grew 12 may be an outlier",
+])
+def test_bare_weekdays_and_may_are_not_deadlines(resolver, text):
+    assert resolver.resolve(text, REFERENCE) is None
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Report due May 5", "2027-05-05"),
+    ("May 5th review", "2027-05-05"),
+    ("15th of May", "2027-05-15"),
+    ("Launch on May 5, 2027", "2027-05-05"),
+])
+def test_may_with_a_cue_or_an_unambiguous_day(resolver, text, expected):
+    assert resolver.resolve(text, REFERENCE) == expected
+
+
+def test_first_resolvable_date_wins(resolver):
+    assert resolver.resolve("Thanks for Monday; please reply by Thursday or 2026-12-01", REFERENCE) == \
+        "2026-10-22"
+
+
+def test_invalid_dates_are_skipped(resolver):
+    assert resolver.resolve("Due 2026-02-30, or 2026-03-01", REFERENCE) == "2026-03-01"
+    assert resolver.resolve("", REFERENCE) is None
+
+
+def test_parse_received_at_formats():
+    assert parse_received_at("2026-10-19T08:00:00Z") == datetime(2026, 10, 19, 8, tzinfo=timezone.utc)
+    assert parse_received_at("Mon, 19 Oct 2026 08:00:00 +0000") == \
+        datetime(2026, 10, 19, 8, tzinfo=timezone.utc)
+    assert parse_received_at(REFERENCE) is REFERENCE
+    assert parse_received_at("yesterday-ish") is None
+    assert parse_received_at("  ") is None
+    assert parse_received_at(None) is None
+
+
+@pytest.mark.parametrize("value", [1697700000, 3.5, ["2026-10-19"], {"date": "2026-10-19"}])
+def test_parse_received_at_rejects_non_strings(value):
+    assert parse_received_at(value) is None
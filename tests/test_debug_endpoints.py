@@ -0,0 +1,67 @@
+"""The /debug/* token guard and the profiler round trip behind it."""
+
+import pytest
+
+import profiler
+
+TOKEN = "s3cret-debug-token"
+
+DEBUG_CALLS = [
+    ("get", "/debug/traces"),
+    ("get", "/debug/traces/4bf92f3577b34da6a3ce929d0e0e4736"),
+    ("get", "/debug/profile"),
+    ("post", "/debug/profile"),
+    ("delete", "/debug/profile"),
+    ("get", "/debug/profile/report"),
+    ("get", "/debug/memory"),
+    ("post", "/debug/memory"),
+]
+
+
+@pytest.fixture
+def client(app_module):
+    yield app_module.app.test_client()
+    profiler.request_profiler.cancel()
+
+
+@pytest.mark.parametrize("method, path", DEBUG_CALLS)
+def test_debug_endpoints_are_hidden_without_a_configured_token(app_module, client, monkeypatch, method, path):
+    monkeypatch.setattr(app_module, "DEBUG_TOKEN", "")
+    response = getattr(client, method)(path, headers={"X-Debug-Token": ""})
+    assert response.status_code == 404
+    assert response.get_json()["error"] == "Not found"
+
+
+@pytest.mark.parametrize("method, path", DEBUG_CALLS)
+@pytest.mark.parametrize("headers", [{}, {"X-Debug-Token": "wrong"}, {"X-Debug-Token": TOKEN + "x"}])
+def test_debug_endpoints_reject_a_missing_or_wrong_token(app_module, client, monkeypatch, method, path, headers):
+    monkeypatch.setattr(app_module, "DEBUG_TOKEN", TOKEN)
+    response = getattr(client, method)(path, headers=headers)
+    assert response.status_code == 403
+    assert response.get_json()["success"] is False
+
+
+def test_debug_endpoints_accept_the_token(app_module, client, monkeypatch):
+    monkeypatch.setattr(app_module, "DEBUG_TOKEN", TOKEN)
+    headers = {"X-Debug-Token": TOKEN}
+
+    assert client.get('/debug/traces', headers=headers).status_code == 200
+    assert client.get('/debug/memory', headers=headers).get_json() == {"success": True, "tracing": False}
+    response = client.post('/debug/profile', json={"mode": "requests", "count": 1}, headers=headers)
+    assert response.status_code == 202
+
+    # The armed profiler takes the next ordinary request, not the /debug calls
+    assert client.get('/debug/profile', headers=headers).get_json()["requests"]["profiled"] == 0
+    client.get('/health')
+    status = client.get('/debug/profile', headers=headers).get_json()["requests"]
+    assert status["profiled"] == 1 and status["done"]
+    report = client.get('/debug/profile/report', headers=headers)
+    assert report.status_code == 200 and report.mimetype == "text/plain"
+
+
+def test_invalid_profile_requests(app_module, client, monkeypatch):
+    monkeypatch.setattr(app_module, "DEBUG_TOKEN", TOKEN)
+    headers = {"X-Debug-Token": TOKEN}
+    for body in ({"mode": "requests", "count": 0}, {"mode": "window", "seconds": 1000}, {"mode": "other"}):
+        assert client.post('/debug/profile', json=body, headers=headers).status_code == 400
+    assert client.get('/debug/profile/report?sort=bogus', headers=headers).status_code == 400
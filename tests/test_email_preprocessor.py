@@ -0,0 +1,85 @@
+"""Body preprocessing: quoted history, signatures, disclaimers, footers and the token budget."""
+
+import pytest
+
+from email_preprocessor import (CHARS_PER_TOKEN, TRUNCATION_MARKER, estimate_tokens, preprocess_body,
+                                strip_noise, truncate_to_budget)
+
+REQUEST = "Hi Bo,\n\nPlease send the signed contract by Friday."
+
+
+@pytest.mark.parametrize("history", [
+    "\n\nOn Mon, Oct 19, 2026 at 9:00 AM Ana <ana@example.com> wrote:\n> Old request\n> more",
+    "\n\n-----Original Message-----\nFrom: Ana\nSent: Monday\nOld request",
+    "\n\nFrom: Ana <ana@example.com>\nSent: Monday, October 19, 2026 9:00 AM\nTo: Bo\nOld request",
+    "\n\n________________________________\nFrom: Ana\nOld request",
+])
+def test_quoted_history_is_dropped(history):
+    assert strip_noise(REQUEST + history) == "Hi Bo,\nPlease send the signed contract by Friday."
+
+
+def test_forwarded_message_headers_are_kept():
+    body = ("FYI, see below.\n\n---------- Forwarded message ---------\n"
+            "From: Ana <ana@example.com>\nDate: Mon, Oct 19, 2026\nSubject: Contract\n\nPlease sign it by Friday.")
+    assert "Please sign it by Friday." in strip_noise(body)
+
+
+def test_signature_and_disclaimer_are_dropped():
+    body = (REQUEST + "\n\n-- \nBo Smith\nHead of Sales\n+1 555 0100")
+    assert strip_noise(body).endswith("by Friday.")
+    body = REQUEST + "\n\nCONFIDENTIALITY NOTICE: This email and any attachments are confidential."
+    assert strip_noise(body).endswith("by Friday.")
+
+
+def test_footers_only_at_the_end():
+    body = REQUEST + "\n\nSent from my iPhone\nTo unsubscribe, click here."
+    assert strip_noise(body).endswith("by Friday.")
+
+    # The same words inside the message are content, not a footer
+    body = "Please unsubscribe me from the vendor list by Friday.\n" + "\n".join(
+        f"Line {number} of the request." for number in range(8))
+    assert strip_noise(body).startswith("Please unsubscribe me from the vendor list")
+
+
+def test_nothing_is_cut_to_an_empty_body():
+    assert strip_noise("On Mon, Oct 19, 2026 Ana wrote:\nPlease review") != ""
+
+
+def test_html_bodies_are_converted():
+    assert strip_noise("<html><body><p>Please <b>review</b> the draft.</p></body></html>") == \
+        "Please review the draft."
+
+
+def test_budget_keeps_head_and_tail():
+    body = "Please review the attached plan. " + "Filler sentence about context. " * 400 + \
+        "Reply by Friday, October 23."
+    text, truncated = truncate_to_budget(body, 100)
+
+    assert truncated
+    assert estimate_tokens(text) <= 100
+    assert text.startswith("Please review the attached plan.")
+    assert TRUNCATION_MARKER in text
+    assert text.endswith("Reply by Friday, October 23.")
+    assert truncate_to_budget("short", 100) == ("short", False)
+    assert truncate_to_budget(body, 0) == (body, False)
+
+
+def test_preprocess_stats():
+    body = REQUEST + "\n\nOn Mon, Ana wrote:\n" + "> quoted history line\n" * 200
+    cleaned, stats = preprocess_body(body, token_budget=1500)
+    assert cleaned == "Hi Bo,\nPlease send the signed contract by Friday."
+    assert stats["original_tokens"] == (len(body) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    assert stats["tokens"] == estimate_tokens(cleaned)
+    assert stats["tokens_saved"] == stats["original_tokens"] - stats["tokens"]
+    assert not stats["truncated"]
+    assert preprocess_body(None)[0] == ""
+
+
+def test_extractor_counts_saved_tokens():
+    from task_extractor import TOKENS_SAVED, TaskExtractor
+
+    extractor = TaskExtractor(use_llm=False, use_triage=False)
+    before = TOKENS_SAVED.value()
+    body = REQUEST + "\n\nOn Mon, Ana wrote:\n" + "> quoted history line\n" * 50
+    cleaned = extractor.preprocess_body(body)
+    assert TOKENS_SAVED.value() - before == estimate_tokens(body) - estimate_tokens(cleaned)
@@ -0,0 +1,85 @@
+"""Header-signal triage, the combined (noisy-OR) header verdict and the optional classifier."""
+
+import threading
+
+import pytest
+
+from email_triage import (EmailTriage, HEADER_SIGNAL_WEIGHTS, NaiveBayesClassifier, TRIAGE_DECISIONS,
+                          combine_signals)
+
+GITHUB = "GitHub <notifications@github.com>"
+LIST_HEADERS = {"List-Unsubscribe": "<mailto:unsubscribe@github.com>", "Precedence": "list",
+                "List-Id": "org/repo <repo.org.github.com>"}
+
+
+@pytest.fixture
+def triage(tmp_path):
+    return EmailTriage(model_path=str(tmp_path / "missing.json"), header_threshold=0.9)
+
+
+def test_review_request_from_a_notification_sender_is_actionable(triage):
+    decision = triage.triage("Please review PR #12", "Please review and approve PR #12 by Friday", GITHUB)
+    assert decision["actionable"]
+    # Even with every mailing-list header GitHub sends
+    assert triage.triage("Please review PR #12", "Please review PR #12", GITHUB, LIST_HEADERS)["actionable"]
+    assert triage.header_verdict("Invitation: Planning @ Mon", "calendar-notification@google.com", None) is None
+
+
+def test_soft_signals_combine_by_noisy_or(triage):
+    signals = triage.header_signals("Weekly digest", "noreply@news.example.com", LIST_HEADERS)
+    assert sorted(signals) == ["list_unsubscribe", "noreply_sender", "precedence_list"]
+    assert combine_signals(signals) == pytest.approx(1 - 0.5 ** 3)
+    assert combine_signals(signals) < triage.header_threshold
+
+    # Combined, they tip the verdict only with a lower threshold ...
+    lower = EmailTriage(model_path=triage.model_path, header_threshold=0.8)
+    verdict = lower.header_verdict("Weekly digest", "noreply@news.example.com", LIST_HEADERS)
+    assert verdict["confidence"] == pytest.approx(0.875)
+    # ... where a single one still does not
+    assert lower.header_verdict("Weekly digest", "noreply@news.example.com", None) is None
+
+
+def test_strong_signals_skip_on_their_own(triage):
+    verdict = triage.header_verdict("Re: budget", "ana@example.com", {"Auto-Submitted": "auto-replied"})
+    assert verdict == {"actionable": False, "confidence": HEADER_SIGNAL_WEIGHTS["auto_submitted"],
+                       "reason": "auto_submitted"}
+    assert triage.header_verdict("Out of office: back Monday", "ana@example.com")["reason"] == "auto_reply_subject"
+    assert triage.header_verdict("Sale", "shop@example.com", {"Precedence": "bulk"}) is not None
+    assert triage.header_verdict("Re: budget", "ana@example.com", {"Auto-Submitted": "no"}) is None
+
+    # A strong signal plus soft ones is more confident than the strong one alone
+    verdict = triage.header_verdict("Sale", "noreply@shop.example.com", {"Precedence": "bulk"})
+    assert verdict["confidence"] > HEADER_SIGNAL_WEIGHTS["precedence_bulk"]
+
+
+def test_classifier_decides_when_headers_are_inconclusive(triage):
+    classifier = NaiveBayesClassifier()
+    classifier.train([("please review the contract and send comments by friday", True),
+                      ("submit the budget report before the meeting", True),
+                      ("weekly newsletter top stories unsubscribe", False),
+                      ("your receipt order shipped thank you for shopping", False)] * 5)
+    triage.classifier = classifier
+    triage.classifier_threshold = 0.9
+
+    assert triage.triage("Newsletter", "top stories this week, unsubscribe", "news@example.com")["actionable"] is False
+    decision = triage.triage("Contract", "please review the contract by friday", "ana@example.com")
+    assert decision["actionable"] and decision["reason"] == "classifier"
+
+
+def test_decisions_are_counted_in_metrics_across_threads(triage):
+    skipped = TRIAGE_DECISIONS.value(result="skipped_by_headers")
+    actionable = TRIAGE_DECISIONS.value(result="actionable")
+
+    def run():
+        for _ in range(200):
+            triage.triage("Out of office", "", "ana@example.com")
+            triage.triage("Budget", "Send it by Friday", "ana@example.com")
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert TRIAGE_DECISIONS.value(result="skipped_by_headers") - skipped == 800
+    assert TRIAGE_DECISIONS.value(result="actionable") - actionable == 800
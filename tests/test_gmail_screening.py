@@ -0,0 +1,126 @@
+"""Header-first screening in the Gmail poller: only mail that passes is downloaded in full."""
+
+import pytest
+
+import gmail_integration
+
+MESSAGES = {
+    b"1": {"From": "Ana <ana@example.com>", "Subject": "Contract", "Message-ID": "<a1@example.com>"},
+    b"2": {"From": "Deals <deals@shop.example.net>", "Subject": "Weekly deals", "Message-ID": "<n1@shop>",
+           "List-Unsubscribe": "<mailto:unsubscribe@shop.example.net>", "Precedence": "bulk"},
+    b"3": {"From": "Spam <promo@ads.example.org>", "Subject": "Offer", "Message-ID": "<s1@ads>"},
+    b"4": {"From": "Bo <bo@example.com>", "Subject": "Old request", "Message-ID": "<seen@example.com>"},
+    b"5": {"From": "Ana <ana@example.com>", "Subject": "Contract", "Message-ID": "<a1@example.com>"},
+}
+
+
+class FakeIMAP:
+    """Serves MESSAGES-style dicts; records which messages were downloaded in full."""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.header_queries = []
+        self.downloaded = []
+
+    def select(self, folder):
+        return "OK", [str(len(self.messages)).encode()]
+
+    def search(self, charset, criterion):
+        return "OK", [b" ".join(self.messages)]
+
+    def raw(self, email_id, body=None):
+        headers = "".join(f"{name}: {value}\r\n" for name, value in self.messages[email_id].items())
+        return (headers + "\r\n" + (body or "")).encode()
+
+    def fetch(self, message_set, query):
+        if query == "(RFC822)":
+            self.downloaded.append(message_set)
+            return "OK", [(message_set + b" (RFC822 {1}", self.raw(message_set, "Please sign by Friday.")), b")"]
+        self.header_queries.append((message_set, query))
+        data = []
+        for email_id in message_set.encode().split(b","):
+            data += [(email_id + b" (BODY[HEADER.FIELDS (FROM)] {1}", self.raw(email_id)), b")"]
+        return "OK", data
+
+
+@pytest.fixture
+def poller(tmp_path, monkeypatch):
+    sent = []
+    monkeypatch.setattr(gmail_integration, "processed_emails", set())
+    monkeypatch.setattr(gmail_integration, "outbox", None)
+    monkeypatch.setattr(gmail_integration, "header_triage", None)
+    monkeypatch.setattr(gmail_integration, "seen_message_ids", None)
+    monkeypatch.setattr(gmail_integration, "SEEN_IDS_PATH", str(tmp_path / "seen.txt"))
+    monkeypatch.setattr(gmail_integration, "ALLOW_SENDERS", [])
+    monkeypatch.setattr(gmail_integration, "DENY_SENDERS", ["ads.example.org"])
+    monkeypatch.setattr(gmail_integration, "send_to_api",
+                        lambda subject, body, sender, *args: sent.append(subject) or True)
+    (tmp_path / "seen.txt").write_text("<seen@example.com>\n")
+    gmail_integration.sent = sent
+    yield gmail_integration
+    del gmail_integration.sent
+
+
+def screened(result):
+    return gmail_integration.SCREENED.value(result=result)
+
+
+def test_skippable_mail_is_never_downloaded(poller):
+    mail = FakeIMAP(MESSAGES)
+    before = {result: screened(result) for result in ("kept", "triage", "denied_sender", "duplicate")}
+
+    assert poller.process_emails(mail) == 1
+
+    # One header FETCH for the whole poll, with BODY.PEEK so nothing is marked read
+    assert len(mail.header_queries) == 1
+    message_set, query = mail.header_queries[0]
+    assert message_set == "1,2,3,4,5"
+    assert query.startswith("(BODY.PEEK[HEADER.FIELDS (FROM SUBJECT DATE MESSAGE-ID LIST-UNSUBSCRIBE")
+    assert mail.downloaded == [b"1"]
+    assert poller.sent == ["Contract"]
+    # Skipped mail counts as processed, so the next poll doesn't screen it again
+    assert poller.processed_emails == {b"1", b"2", b"3", b"4", b"5"}
+    assert {result: screened(result) - count for result, count in before.items()} == \
+        {"kept": 1, "triage": 1, "denied_sender": 1, "duplicate": 2}
+
+
+def test_delivered_message_ids_are_remembered(poller, tmp_path):
+    poller.process_emails(FakeIMAP({b"1": MESSAGES[b"1"]}))
+    assert (tmp_path / "seen.txt").read_text().splitlines() == ["<seen@example.com>", "<a1@example.com>"]
+
+    # The same message under a new id (copied to another label) is screened out
+    mail = FakeIMAP({b"9": MESSAGES[b"1"]})
+    assert poller.process_emails(mail) == 0
+    assert mail.downloaded == []
+
+
+def test_allow_list_wins(poller, monkeypatch):
+    monkeypatch.setattr(poller, "ALLOW_SENDERS", ["deals@shop.example.net", "*@ads.example.org"])
+    mail = FakeIMAP({email_id: MESSAGES[email_id] for email_id in (b"2", b"3")})
+    assert poller.process_emails(mail) == 2
+    assert mail.downloaded == [b"2", b"3"]
+
+
+def test_screening_can_be_disabled(poller, monkeypatch):
+    monkeypatch.setattr(poller, "HEADER_SCREENING", False)
+    mail = FakeIMAP(MESSAGES)
+    poller.process_emails(mail)
+    assert mail.header_queries == []
+    assert mail.downloaded == [b"1", b"2", b"3", b"4", b"5"]
+
+
+def test_messages_waiting_in_the_outbox_are_duplicates(poller, monkeypatch):
+    monkeypatch.setattr(poller, "outbox", {"<a1@example.com>"})
+    assert poller.screen_emails(FakeIMAP(MESSAGES), [b"1"]) == []
+
+
+@pytest.mark.parametrize("address, patterns, expected", [
+    ("ana@example.com", ["ana@example.com"], True),
+    ("ana@example.com", ["bo@example.com"], False),
+    ("ana@mail.example.com", ["example.com"], True),
+    ("ana@example.com", ["@example.com"], True),
+    ("ana@notexample.com", ["example.com"], False),
+    ("news@news.example.com", ["*@news.*"], True),
+])
+def test_sender_patterns(address, patterns, expected):
+    assert gmail_integration.sender_matches(address, patterns) is expected
@@ -0,0 +1,195 @@
+"""Ingest dedup by Message-ID / content hash and trimming of quoted thread history."""
+
+import threading
+
+from ingest_index import IngestIndex, content_hash, split_paragraphs
+
+SENDER = "Ana <ana@example.com>"
+ORIGINAL = "Hi team,\n\nPlease send the budget report by Friday.\n\nThanks, Ana"
+
+
+def ingest(index, body, headers=None, sender=SENDER, subject="Budget", received_at=None):
+    check = index.check(sender, body, headers, subject, received_at)
+    if not check["skip"]:
+        index.record(check)
+    return check
+
+
+def test_redelivered_message_id_is_skipped(tmp_path):
+    index = IngestIndex(str(tmp_path / "index.jsonl"))
+    assert ingest(index, ORIGINAL, {"Message-ID": "<1@x>"})["skip"] is None
+    again = index.check(SENDER, ORIGINAL + "\n(forwarded copy)", {"Message-ID": "<1@x>"}, "Budget")
+    assert again["skip"] == "message_id"
+
+
+def test_same_body_with_a_new_message_id_is_a_new_email(tmp_path):
+    index = IngestIndex(str(tmp_path / "index.jsonl"))
+    ingest(index, ORIGINAL, {"Message-ID": "<week1@x>"})
+    check = ingest(index, ORIGINAL, {"Message-ID": "<week2@x>"})
+    assert check["skip"] is None and check["key"] == "<week2@x>"
+
+
+def test_content_hash_without_message_id(tmp_path):
+    index = IngestIndex(str(tmp_path / "index.jsonl"))
+    first = ingest(index, ORIGINAL, received_at="2026-10-12T09:00:00Z")
+    assert first["key"] == f"#{first['hash']}"
+
+    # Same payload re-sent (whitespace and case differences do not matter)
+    resent = index.check("ANA@example.com", ORIGINAL.upper().replace(" ", "  "), None, "budget",
+                         "2026-10-12T09:00:00Z")
+    assert resent["skip"] == "content_hash"
+
+    # A recurring email differs by date; a different subject is a different email
+    assert index.check(SENDER, ORIGINAL, None, "Budget", "2026-10-19T09:00:00Z")["skip"] is None
+    assert index.check(SENDER, ORIGINAL, None, "Budget v2", "2026-10-12T09:00:00Z")["skip"] is None
+    assert content_hash(SENDER, ORIGINAL, "Budget", "a") != content_hash(SENDER, ORIGINAL, "Budget", "b")
+
+
+def test_reply_is_trimmed_to_its_new_paragraphs(tmp_path):
+    index = IngestIndex(str(tmp_path / "index.jsonl"))
+    ingest(index, ORIGINAL, {"Message-ID": "<1@x>"})
+    reply = ("Sure, and I will also book the room for Monday.\n\n"
+             "On Mon, Oct 19, 2026 at 9:00 AM Ana <ana@example.com> wrote:\n"
+             "> Hi team,\n>\n> Please send the budget\n> report by Friday.\n>\n> Thanks, Ana")
+
+    check = ingest(index, reply, {"Message-ID": "<2@x>", "In-Reply-To": "<1@x>"}, sender="bo@example.com")
+
+    assert check["skip"] is None
+    assert check["trimmed"] == 3
+    assert check["body"].startswith("Sure, and I will also book the room for Monday.")
+    assert "budget" not in check["body"]
+
+
+def test_references_chain_and_quote_only_reply(tmp_path):
+    index = IngestIndex(str(tmp_path / "index.jsonl"))
+    ingest(index, ORIGINAL, {"Message-ID": "<1@x>"})
+    ingest(index, "Booking the room too.", {"Message-ID": "<2@x>", "In-Reply-To": "<1@x>"})
+
+    quote_only = "On Tue, Bo wrote:\n> Booking the room too.\n\n>> Please send the budget report by Friday."
+    check = index.check(SENDER, quote_only, {"Message-ID": "<3@x>", "In-Reply-To": "<2@x>",
+                                             "References": "<1@x> <2@x>"}, "Re: Budget")
+    assert check["skip"] == "no_new_content"
+
+
+def test_unknown_parent_leaves_the_body_alone(tmp_path):
+    index = IngestIndex(str(tmp_path / "index.jsonl"))
+    body = "New question\n\n> quoted text we never saw"
+    check = index.check(SENDER, body, {"Message-ID": "<2@x>", "In-Reply-To": "<missing@x>"}, "Re: Q")
+    assert check["skip"] is None and check["body"] == body and check["trimmed"] == 0
+
+
+def test_quoted_paragraphs_hash_like_the_original():
+    original = split_paragraphs("Please send the budget report\nby Friday.")
+    quoted = split_paragraphs("> please send the budget\n> report by Friday.")
+    assert original[0][0] == quoted[0][0]
+
+
+def test_index_is_reloaded_from_its_log(tmp_path):
+    path = str(tmp_path / "index.jsonl")
+    index = IngestIndex(path)
+    ingest(index, ORIGINAL, {"Message-ID": "<1@x>"})
+    ingest(index, "No id here", received_at="2026-10-19T09:00:00Z")
+    with open(path, "a") as f:
+        f.write('{"key": "<torn')
+
+    reloaded = IngestIndex(path)
+    assert len(reloaded) == 2
+    assert reloaded.check(SENDER, ORIGINAL, {"Message-ID": "<1@x>"}, "Budget")["skip"] == "message_id"
+    assert reloaded.check(SENDER, "No id here", None, "Budget", "2026-10-19T09:00:00Z")["skip"] == "content_hash"
+    reply = reloaded.check(SENDER, "Done.\n\n> Please send the budget report by Friday.",
+                           {"Message-ID": "<2@x>", "In-Reply-To": "<1@x>"}, "Re: Budget")
+    assert reply["trimmed"] == 1
+
+
+def test_oldest_entries_are_evicted_and_the_log_compacted(tmp_path):
+    path = str(tmp_path / "index.jsonl")
+    index = IngestIndex(path, max_entries=3)
+    for number in range(8):
+        ingest(index, f"Body {number}", {"Message-ID": f"<{number}@x>"})
+
+    assert len(index) == 3
+    assert index.check(SENDER, "Body 0", {"Message-ID": "<0@x>"}, "Budget")["skip"] is None
+    assert index.check(SENDER, "Body 7", {"Message-ID": "<7@x>"}, "Budget")["skip"] == "message_id"
+    assert sum(1 for _ in open(path)) <= 2 * 3
+    assert len(IngestIndex(path, max_entries=3)) == 3
+
+
+def test_email_being_extracted_is_reserved_until_recorded_or_released(tmp_path):
+    index = IngestIndex(str(tmp_path / "index.jsonl"))
+    first = index.check(SENDER, ORIGINAL, {"Message-ID": "<1@x>"}, "Budget")
+    assert first["skip"] is None and first["reserved"]
+    assert index.check(SENDER, ORIGINAL, {"Message-ID": "<1@x>"}, "Budget")["skip"] == "in_progress"
+
+    index.release(first)
+    retry = index.check(SENDER, ORIGINAL, {"Message-ID": "<1@x>"}, "Budget")
+    assert retry["skip"] is None
+    index.record(retry)
+    index.release(retry)  # no-op once recorded
+    assert index.check(SENDER, ORIGINAL, {"Message-ID": "<1@x>"}, "Budget")["skip"] == "message_id"
+
+    # Mail without a Message-ID is reserved by its content hash
+    no_id = index.check(SENDER, "No id", None, "Budget", "2026-10-19T09:00:00Z")
+    assert index.check(SENDER, "No id", None, "Budget", "2026-10-19T09:00:00Z")["skip"] == "in_progress"
+    index.record(no_id)
+
+
+def test_processes_sharing_a_log_see_each_other(tmp_path):
+    path = str(tmp_path / "index.jsonl")
+    worker_a, worker_b = IngestIndex(path, max_entries=3), IngestIndex(path, max_entries=3)
+
+    reserved = worker_a.check(SENDER, ORIGINAL, {"Message-ID": "<1@x>"}, "Budget")
+    assert worker_b.check(SENDER, ORIGINAL, {"Message-ID": "<1@x>"}, "Budget")["skip"] == "in_progress"
+    worker_a.record(reserved)
+    assert worker_b.check(SENDER, ORIGINAL, {"Message-ID": "<1@x>"}, "Budget")["skip"] == "message_id"
+
+    # Worker A compacts the log; nothing worker B appended before is lost
+    ingest(worker_b, "From B", {"Message-ID": "<b@x>"})
+    for number in range(2, 5):
+        ingest(worker_a, f"Body {number}", {"Message-ID": f"<{number}@x>"})
+    assert worker_b.check(SENDER, "Body 4", {"Message-ID": "<4@x>"}, "Budget")["skip"] == "message_id"
+    assert IngestIndex(path, max_entries=3)._entries.keys() == worker_a._entries.keys() == \
+        worker_b._entries.keys() == {"<2@x>", "<3@x>", "<4@x>"}
+
+
+def test_redelivery_during_extraction_gets_409(app_module):
+    client = app_module.app.test_client()
+    email = {"subject": "Budget", "body": "Please send the budget report by Friday.",
+             "sender": "ana@example.com", "headers": {"Message-ID": "<1@x>"}}
+    responses = []
+    extract = app_module.task_extractor.extract_tasks_from_email
+
+    def extract_while_retried(*args, **kwargs):
+        # From another thread, as a server would: a nested request shares flask.g with this one
+        retry = threading.Thread(target=lambda: responses.append(client.post('/ingest-email', json=email)))
+        retry.start()
+        retry.join()
+        return extract(*args, **kwargs)
+
+    app_module.task_extractor.extract_tasks_from_email = extract_while_retried
+    try:
+        first = client.post('/ingest-email', json=email)
+    finally:
+        del app_module.task_extractor.extract_tasks_from_email
+
+    assert first.status_code == 200 and first.get_json()["added"] == 1
+    assert responses[0].status_code == 409 and responses[0].get_json()["skipped"] == "in_progress"
+    assert client.post('/ingest-email', json=email).get_json()["skipped"] == "message_id"
+    assert len(app_module.task_store.load_tasks()) == 1
+
+
+def test_failed_extraction_releases_the_email(app_module):
+    client = app_module.app.test_client()
+    email = {"subject": "Budget", "body": "Please send the budget report by Friday.",
+             "sender": "ana@example.com", "headers": {"Message-ID": "<1@x>"}}
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("LLM unavailable")
+
+    app_module.task_extractor.extract_tasks_from_email = fail
+    try:
+        assert client.post('/ingest-email', json=email).status_code == 500
+    finally:
+        del app_module.task_extractor.extract_tasks_from_email
+
+    retry = client.post('/ingest-email', json=email)
+    assert retry.status_code == 200 and retry.get_json()["added"] == 1
@@ -0,0 +1,38 @@
+"""Word-boundary keyword matching used for categories, priorities and action verbs."""
+
+from keyword_matcher import KeywordMatcher, compile_keyword_pattern
+
+
+def test_keywords_match_whole_words_only():
+    matcher = KeywordMatcher({"Urgent": ["now", "asap"], "Work": ["report"]})
+    assert matcher.match("We need it now") == {"Urgent"}
+    assert matcher.match("I know nothing about it") == frozenset()
+    assert matcher.match("It's snowing") == frozenset()
+    assert matcher.match("Quarterly reporting") == frozenset()
+
+
+def test_plural_suffix_and_case():
+    matcher = KeywordMatcher({"Work": ["report", "meeting"]})
+    assert matcher.match("Two REPORTS and three meetings") == {"Work"}
+
+
+def test_phrases_match_across_whitespace_and_win_over_prefixes():
+    matcher = KeywordMatcher({"Urgent": ["right away"], "Other": ["right"]})
+    assert matcher.match("Please do it right\n  away") == {"Urgent"}
+    assert matcher.match("Turn right") == {"Other"}
+
+
+def test_one_keyword_can_imply_several_labels():
+    matcher = KeywordMatcher({("category", "Urgent"): ["deadline"], ("priority", "High"): ["deadline"]})
+    assert matcher.match("deadline tomorrow") == {("category", "Urgent"), ("priority", "High")}
+
+
+def test_action_pattern_matches_inflections_at_word_start():
+    pattern = compile_keyword_pattern(["send", "submit"], suffix=r"\w*")
+    assert [m.group(0) for m in pattern.finditer("Submitted it; sending more; resend later")] == \
+        ["Submitted", "sending"]
+
+
+def test_empty_tables_never_match():
+    assert KeywordMatcher({}).match("anything at all") == frozenset()
+    assert KeywordMatcher({"Work": ["report"]}).match("") == frozenset()
@@ -0,0 +1,102 @@
+"""--batch replay: reading NDJSON/JSON/.eml sources and posting them to /ingest-emails in batches."""
+
+import json
+import os
+import subprocess
+import sys
+
+from kiro_email_hook import iter_records, send_batches
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+EML = """From: Ana <ana@example.com>
+To: bo@example.com
+Subject: Contract
+Date: Mon, 19 Oct 2026 09:00:00 +0000
+Message-ID: <c1@example.com>
+List-Id: <sales.example.com>
+Content-Type: text/plain; charset=utf-8
+
+Please sign the contract by Friday.
+"""
+
+
+def email(number, body=None):
+    return {"subject": f"Request {number}", "body": body or f"Please send report {number}.",
+            "sender": "ana@example.com"}
+
+
+def write_ndjson(path, lines):
+    path.write_text("\n".join(line if isinstance(line, str) else json.dumps(line) for line in lines) + "\n")
+
+
+def test_records_from_a_directory_tree(tmp_path):
+    (tmp_path / "b").mkdir()
+    (tmp_path / "a.eml").write_text(EML)
+    (tmp_path / "b" / "list.json").write_text(json.dumps([email(1), email(2)]))
+    write_ndjson(tmp_path / "b" / "stream.ndjson", [email(3), "", "{broken"])
+    (tmp_path / "notes.txt").write_text("ignored")
+
+    records = list(iter_records(str(tmp_path)))
+    labels = [label.replace(str(tmp_path), "") for label, _, _ in records]
+    assert labels == ["/a.eml", "/b/list.json[0]", "/b/list.json[1]", "/b/stream.ndjson:1", "/b/stream.ndjson:3"]
+
+    eml = records[0][1]
+    assert eml["subject"] == "Contract" and eml["sender"] == "Ana <ana@example.com>"
+    assert eml["body"].strip() == "Please sign the contract by Friday."
+    assert eml["headers"] == {"List-Id": "<sales.example.com>", "Message-ID": "<c1@example.com>"}
+    assert [payload for _, payload, _ in records[1:4]] == [email(1), email(2), email(3)]
+    assert records[4][1:] == (None, "Invalid JSON")
+
+
+def test_batches_keep_order_and_report_failures(ingest_api):
+    records = [(f"in:{number}", email(number), None) for number in range(7)]
+    records.insert(3, ("in:bad", {"subject": "No body", "sender": "ana@example.com"}, None))
+    records.append(("in:rejected", email(9, body="reject"), None))
+
+    summary = send_batches(records, api_base_url=ingest_api.url, batch_size=3, concurrency=2, retries=0)
+
+    assert summary["records"] == 9 and summary["submitted"] == 8
+    assert summary["accepted"] == 7 and summary["added"] == 7
+    assert sorted(len(batch) for batch in ingest_api.batches) == [2, 3, 3]
+    assert sorted(email["subject"] for email in ingest_api.emails()) == sorted(
+        [f"Request {number}" for number in range(7)] + ["Request 9"])
+    assert sorted(label for label, _ in summary["failures"]) == ["in:bad", "in:rejected"]
+
+
+def test_failed_batches_fail_every_record(ingest_api):
+    ingest_api.statuses = [500]
+    records = [(f"in:{number}", email(number), None) for number in range(2)]
+    summary = send_batches(records, api_base_url=ingest_api.url, batch_size=5, retries=0)
+    assert [label for label, _ in summary["failures"]] == ["in:0", "in:1"]
+    assert "status 500" in summary["failures"][0][1]
+
+
+def test_draining_server_is_retried(ingest_api):
+    ingest_api.statuses = [503]
+    summary = send_batches([("in:0", email(0), None)], api_base_url=ingest_api.url, retries=2)
+    assert summary["failures"] == [] and summary["accepted"] == 1
+
+
+def run_cli(args, ingest_api, stdin=""):
+    env = dict(os.environ, KIRO_API_URL=ingest_api.url, KIRO_HOOK_RETRIES="0")
+    return subprocess.run([sys.executable, os.path.join(REPO_ROOT, "kiro_email_hook.py"), *args],
+                          input=stdin, env=env, capture_output=True, text=True, timeout=60)
+
+
+def test_cli_replays_stdin(ingest_api):
+    stdin = "\n".join(json.dumps(email(number)) for number in range(5))
+    result = run_cli(["--batch", "--batch-size", "2"], ingest_api, stdin)
+    assert result.returncode == 0, result.stdout
+    assert "Tasks added:   5" in result.stdout
+    assert len(ingest_api.emails()) == 5
+
+
+def test_cli_exit_code(tmp_path, ingest_api):
+    path = tmp_path / "emails.ndjson"
+    write_ndjson(path, [email(1), {"subject": "No sender", "body": "x"}])
+    result = run_cli(["--batch", str(path)], ingest_api)
+    assert result.returncode == 1
+    assert f"✗ {path}:2: Missing required field 'sender'" in result.stdout
+
+    assert run_cli(["--batch", str(tmp_path / "missing")], ingest_api).returncode == 1
@@ -0,0 +1,120 @@
+"""Hook daemon: socket hand-off, batching into /ingest-emails, failure capture and shutdown flush."""
+
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import kiro_email_hook
+from kiro_email_hook import HookDaemon, send_to_daemon
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def email(number):
+    return {"subject": f"Request {number}", "body": f"Please send report {number}.", "sender": "ana@example.com"}
+
+
+@pytest.fixture
+def daemon(tmp_path, ingest_api):
+    """A daemon serving on a socket in tmp_path, without serve_forever's signal handling."""
+    daemon = HookDaemon(address=str(tmp_path / "hook.sock"), api_base_url=ingest_api.url, batch_size=3,
+                        batch_window=0.3, retries=0, failed_path=str(tmp_path / "failed.jsonl"))
+    daemon.server = daemon._make_server()
+    threading.Thread(target=daemon.server.serve_forever, daemon=True).start()
+    daemon.batcher = threading.Thread(target=daemon._run_batcher, daemon=True)
+    daemon.batcher.start()
+    yield daemon
+    daemon.server.shutdown()
+    daemon.server.server_close()
+    stop(daemon)
+    daemon.session.close()
+
+
+def stop(daemon):
+    """Stop the batcher once it has forwarded everything queued so far."""
+    daemon.queue.put(None)
+    daemon.batcher.join(10)
+
+
+def test_emails_are_batched_in_order(daemon, ingest_api):
+    for number in range(5):
+        assert send_to_daemon(email(number), daemon.address)
+    stop(daemon)
+    assert [len(batch) for batch in ingest_api.batches] == [3, 2]
+    assert ingest_api.emails() == [email(number) for number in range(5)]
+
+
+def test_invalid_emails_are_refused(daemon):
+    assert not send_to_daemon({"subject": "No body", "sender": "ana@example.com"}, daemon.address)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.connect(daemon.address)
+        conn.sendall(b'not json\n\n' + json.dumps(email(1)).encode() + b'\n')
+        conn.shutdown(socket.SHUT_WR)
+        replies = [json.loads(line) for line in conn.makefile('rb')]
+    assert replies == [{"success": False, "error": "Invalid JSON"}, {"success": True, "queued": 1}]
+
+
+def test_failed_batches_are_kept(daemon, ingest_api):
+    ingest_api.statuses = [500]
+    assert send_to_daemon(email(1), daemon.address)
+    stop(daemon)
+    with open(daemon.failed_path, encoding='utf-8') as f:
+        assert [json.loads(line) for line in f] == [email(1)]
+    assert ingest_api.batches == []
+
+
+def test_socket_is_owner_only_and_single_instance(daemon, tmp_path):
+    assert os.stat(daemon.address).st_mode & 0o777 == 0o600
+    with pytest.raises(RuntimeError):
+        HookDaemon._remove_stale_socket(daemon.address)
+
+    # A socket file left by a killed daemon is cleaned up
+    stale = str(tmp_path / "stale.sock")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as orphan:
+        orphan.bind(stale)
+    HookDaemon._remove_stale_socket(stale)
+    assert not os.path.exists(stale)
+
+
+def test_no_daemon_falls_back_to_a_direct_post(tmp_path, monkeypatch):
+    assert not send_to_daemon(email(1), str(tmp_path / "missing.sock"))
+    posted = []
+    monkeypatch.setattr(kiro_email_hook, "send_to_daemon", lambda payload: False)
+    monkeypatch.setattr(kiro_email_hook, "send_to_ingestion_endpoint",
+                        lambda payload: posted.append(payload) or {"success": True})
+    assert kiro_email_hook.on_email_received(email(1))
+    assert posted == [email(1)]
+
+
+def test_sigterm_forwards_queued_emails(tmp_path, ingest_api):
+    address = str(tmp_path / "hook.sock")
+    env = dict(os.environ, KIRO_HOOK_SOCKET=address, KIRO_API_URL=ingest_api.url,
+               KIRO_HOOK_BATCH_WINDOW="30", KIRO_HOOK_FAILED_PATH=str(tmp_path / "failed.jsonl"))
+    process = subprocess.Popen([sys.executable, os.path.join(REPO_ROOT, "kiro_email_hook.py"), "--daemon"],
+                               env=env, stdout=subprocess.PIPE, text=True)
+    try:
+        deadline = time.monotonic() + 10
+        while not send_to_daemon(email(0), address):
+            assert time.monotonic() < deadline and process.poll() is None
+            time.sleep(0.05)
+        assert send_to_daemon(email(1), address)
+
+        # Still inside the 30s batch window: nothing forwarded until the daemon stops
+        assert ingest_api.batches == []
+        process.send_signal(signal.SIGTERM)
+        output, _ = process.communicate(timeout=10)
+    finally:
+        process.kill()
+
+    assert process.returncode == 0, output
+    assert ingest_api.batches == [[email(0), email(1)]]
+    assert not os.path.exists(address)
@@ -0,0 +1,100 @@
+"""Streaming mbox reading, ">From" unescaping and checkpointed, resumable imports."""
+
+import json
+
+import pytest
+
+from mailbox_import import MailboxImporter, iter_mbox, parse_message
+from task_extractor import TaskExtractor
+from task_store import TaskStore
+
+
+def mbox_message(index, body):
+    return (f"From sender{index}@example.com Mon Oct 19 09:00:00 2026\n"
+            f"From: Sender {index} <sender{index}@example.com>\n"
+            f"Subject: Message {index}\n"
+            f"Message-ID: <m{index}@example.com>\n"
+            f"\n{body}\n\n")
+
+
+@pytest.fixture
+def mbox(tmp_path):
+    path = tmp_path / "archive.mbox"
+    path.write_text("".join(mbox_message(i, f"Please send report {i} by Friday.") for i in range(7)))
+    return str(path)
+
+
+def test_messages_are_split_on_from_lines_after_a_blank_line(tmp_path):
+    path = tmp_path / "box.mbox"
+    path.write_text(mbox_message(1, "First line\nFrom the team: hello") + mbox_message(2, "Second"))
+    messages = [raw for _, raw in iter_mbox(str(path))]
+    assert len(messages) == 2
+    assert b"From the team: hello" in messages[0]
+
+
+def test_escaped_from_lines_are_unescaped(tmp_path):
+    path = tmp_path / "box.mbox"
+    path.write_text(mbox_message(1, "Hello\n\n>From now on, use the new form.\n>>From quoted reply"))
+    (_, raw), = iter_mbox(str(path))
+    body = parse_message(raw)["body"]
+    assert "\nFrom now on, use the new form." in body
+    assert ">From quoted reply" in body
+
+
+def test_offsets_resume_at_the_next_message(mbox):
+    everything = list(iter_mbox(mbox))
+    offset = everything[2][0]
+    resumed = list(iter_mbox(mbox, offset))
+    assert [raw for _, raw in resumed] == [raw for _, raw in everything[3:]]
+    assert resumed[-1][0] == everything[-1][0]
+
+
+def test_parse_message_payload(mbox):
+    _, raw = next(iter_mbox(mbox))
+    payload = parse_message(raw)
+    assert payload["subject"] == "Message 0"
+    assert payload["sender"] == "Sender 0 <sender0@example.com>"
+    assert payload["headers"]["Message-ID"] == "<m0@example.com>"
+    assert parse_message(b"Subject: empty\n\n") is None
+
+
+class FailingStore:
+    """Stores the first batch, then fails as if the process were killed."""
+
+    def __init__(self, store):
+        self.store = store
+        self.calls = 0
+
+    def add_tasks(self, tasks):
+        self.calls += 1
+        if self.calls > 1:
+            raise KeyboardInterrupt
+        return self.store.add_tasks(tasks)
+
+
+def test_interrupted_import_resumes_from_the_checkpoint(mbox, tmp_path):
+    store = TaskStore(str(tmp_path / "tasks.json"))
+    extractor = TaskExtractor(use_llm=False, use_triage=False)
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+
+    try:
+        importer = MailboxImporter(mbox, task_store=FailingStore(store), task_extractor=extractor,
+                                   batch_size=3, workers=1, checkpoint_path=checkpoint_path)
+        with pytest.raises(KeyboardInterrupt):
+            importer.run()
+        checkpoint = json.load(open(checkpoint_path))
+        assert checkpoint["messages"] == 3 and not checkpoint["completed"]
+        assert len(store.load_tasks()) == 3
+
+        importer = MailboxImporter(mbox, task_store=store, task_extractor=extractor,
+                                   batch_size=3, workers=1, checkpoint_path=checkpoint_path)
+        checkpoint = importer.run()
+    finally:
+        extractor.close()
+
+    assert checkpoint["completed"]
+    assert checkpoint["messages"] == 7
+    assert checkpoint["tasks_added"] == 7
+    assert checkpoint["duplicates"] == 0
+    assert sorted(task["source_email"]["subject"] for task in store.load_tasks()) == \
+        [f"Message {i}" for i in range(7)]
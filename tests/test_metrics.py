@@ -0,0 +1,84 @@
+"""Prometheus text rendering of counters, gauges and histograms, and the /metrics endpoint."""
+
+import urllib.request
+
+import pytest
+
+import metrics
+from metrics import MetricsRegistry
+
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry()
+
+
+def test_counter_and_gauge_render(registry):
+    requests = registry.counter("requests_total", "Requests", ["route"])
+    requests.inc(route="/a")
+    requests.inc(2, route='/b"\n')
+    backlog = registry.gauge("backlog", "Queued items")
+    backlog.set(5)
+    backlog.dec(2)
+
+    assert registry.render() == (
+        "# HELP backlog Queued items\n"
+        "# TYPE backlog gauge\n"
+        "backlog 3\n"
+        "# HELP requests_total Requests\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{route="/a"} 1\n'
+        'requests_total{route="/b\\"\\n"} 2\n'
+    )
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    latency = registry.histogram("latency_seconds", "Latency", ["tier"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        latency.observe(value, tier="fast")
+
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{tier="fast",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{tier="fast",le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{tier="fast",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{tier="fast"} 4.25' in lines
+    assert 'latency_seconds_count{tier="fast"} 4' in lines
+    assert latency.count(tier="fast") == 4
+
+
+def test_registry_is_get_or_create(registry):
+    first = registry.counter("events_total", "Events", ["kind"])
+    assert registry.counter("events_total", "Events", ["kind"]) is first
+    with pytest.raises(ValueError):
+        registry.gauge("events_total", "Events", ["kind"])
+    with pytest.raises(ValueError):
+        registry.counter("events_total", "Events", ["other"])
+    with pytest.raises(ValueError):
+        first.inc(kind="a", extra="b")
+
+
+def test_metrics_endpoint_after_an_ingest(app_module):
+    client = app_module.app.test_client()
+    email = {"subject": "Report", "body": "Please send the budget report by Friday.", "sender": "ana@example.com"}
+    assert client.post('/ingest-email', json=email).status_code == 200
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type == metrics.CONTENT_TYPE
+    text = response.get_data(as_text=True)
+    assert 'http_request_duration_seconds_count{method="POST",route="/ingest-email",status="200"}' in text
+    assert 'extractions_total{mode="fallback"}' in text
+    assert 'task_store_operation_seconds_count{operation="save"}' in text
+    assert "# TYPE task_store_tasks gauge" in text
+
+
+def test_standalone_metrics_server(registry):
+    registry.counter("polls_total", "Polls").inc()
+    server = metrics.start_metrics_server(0, host="127.0.0.1", metrics_registry=registry)
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            assert response.headers["Content-Type"] == metrics.CONTENT_TYPE
+            assert "polls_total 1" in response.read().decode()
+    finally:
+        server.shutdown()
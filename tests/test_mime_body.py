@@ -0,0 +1,84 @@
+"""Body extraction from MIME messages: part selection, size cap and charset fallback."""
+
+from email import message_from_bytes, policy
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+import pytest
+
+from mime_body import decode_text, extract_body, html_to_text
+
+
+def raw_message(body: bytes, charset: str, encoding: str = "8bit") -> bytes:
+    return (f"From: a@example.com\nSubject: test\nMIME-Version: 1.0\n"
+            f"Content-Type: text/plain; charset=\"{charset}\"\n"
+            f"Content-Transfer-Encoding: {encoding}\n\n").encode("ascii") + body
+
+
+@pytest.mark.parametrize("data, charset, expected", [
+    ("Café – résumé".encode("utf-8"), "utf-8", "Café – résumé"),
+    # Mail labelled latin-1 is usually Windows-1252 (curly quotes, euro sign)
+    ("“Price”: 5 €".encode("cp1252"), "iso-8859-1", "“Price”: 5 €"),
+    # Mislabelled UTF-8 and unknown labels fall back instead of producing mojibake
+    ("naïve".encode("utf-8"), "us-ascii", "naïve"),
+    ("Grüße".encode("utf-8"), "x-unknown-charset", "Grüße"),
+    ("Grüße".encode("cp1252"), "utf-8", "Grüße"),
+    ("Grüße".encode("cp1252"), None, "Grüße"),
+])
+def test_decode_text_charset_fallback(data, charset, expected):
+    assert decode_text(data, charset) == expected
+
+
+def test_multibyte_character_cut_by_the_cap_is_dropped():
+    data = "price: 5 €".encode("utf-8")
+    assert decode_text(data[:-1], "utf-8") == "price: 5 "
+
+
+@pytest.mark.parametrize("message_policy", [policy.compat32, policy.default])
+def test_plain_body_with_wrong_label(message_policy):
+    msg = message_from_bytes(raw_message("Überweisung bis Freitag".encode("utf-8"), "us-ascii"),
+                             policy=message_policy)
+    assert extract_body(msg) == "Überweisung bis Freitag"
+
+
+def test_base64_body_is_capped_without_decoding_everything():
+    msg = MIMEText("Ünïcödé line of text\n" * 5000, "plain", "utf-8")
+    body = extract_body(message_from_bytes(msg.as_bytes()), max_chars=100)
+    assert len(body) <= 100
+    assert body.startswith("Ünïcödé line of text")
+
+
+def test_html_only_message_is_converted_to_text():
+    msg = MIMEText("<html><head><style>p {color: red}</style></head>"
+                   "<body><p>Please <b>review</b> the&nbsp;draft.</p><script>x()</script></body></html>",
+                   "html", "utf-8")
+    assert extract_body(message_from_bytes(msg.as_bytes())) == "Please review the draft."
+
+
+def test_plain_part_wins_and_attachments_are_skipped():
+    msg = MIMEMultipart("mixed")
+    attachment = MIMEApplication(b"%PDF-1.4 binary", Name="report.pdf")
+    attachment["Content-Disposition"] = 'attachment; filename="report.pdf"'
+    text_attachment = MIMEText("attached notes, not the body", "plain", "utf-8")
+    text_attachment["Content-Disposition"] = 'attachment; filename="notes.txt"'
+    alternative = MIMEMultipart("alternative")
+    alternative.attach(MIMEText("Plain body", "plain", "utf-8"))
+    alternative.attach(MIMEText("<p>HTML body</p>", "html", "utf-8"))
+    for part in (text_attachment, attachment, alternative):
+        msg.attach(part)
+
+    assert extract_body(message_from_bytes(msg.as_bytes())) == "Plain body"
+
+
+def test_empty_plain_part_falls_back_to_html():
+    msg = MIMEMultipart("alternative")
+    msg.attach(MIMEText("  \n", "plain", "utf-8"))
+    msg.attach(MIMEText("<div>Only in HTML</div>", "html", "utf-8"))
+    assert extract_body(message_from_bytes(msg.as_bytes())) == "Only in HTML"
+
+
+def test_html_to_text_stops_at_the_cap():
+    markup = "<p>" + "word " * 100000 + "</p>"
+    text = html_to_text(markup, max_chars=50)
+    assert 0 < len(text) <= 50
@@ -0,0 +1,147 @@
+"""Two-tier routing: fast-tier acceptance, escalation rules, repair calls and accounting."""
+
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from model_router import ModelRouter, estimate_cost
+from task_extractor import TaskExtractor
+
+GOOD = json.dumps({"tasks": [{"description": "Send the report", "category": "Work", "priority": "High",
+                              "due_date": None, "confidence": 0.9}]})
+UNSURE = json.dumps({"tasks": [{"description": "Maybe call Bo", "category": "Work", "priority": "Low",
+                                "due_date": None, "confidence": 0.3}]})
+
+
+class FakeClient:
+    """OpenAI-style client answering from a per-model script (a list, or a callable for every call)."""
+
+    def __init__(self, **scripts):
+        self.scripts = scripts
+        self.calls = []
+        self.lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, **options):
+        with self.lock:
+            self.calls.append(model)
+            script = self.scripts[model.replace("-", "_").replace(".", "_")]
+            output = script(messages[-1]["content"]) if callable(script) else script.pop(0)
+        if isinstance(output, Exception):
+            raise output
+        if isinstance(output, tuple):
+            message = SimpleNamespace(content=None, tool_calls=[
+                SimpleNamespace(function=SimpleNamespace(arguments=output[0]))])
+        else:
+            message = SimpleNamespace(content=output, tool_calls=None)
+        usage = SimpleNamespace(prompt_tokens=1000, completion_tokens=200)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+@pytest.fixture
+def parse():
+    return TaskExtractor(use_llm=False, use_triage=False).parse_structured_response
+
+
+def router_for(client, **options):
+    return ModelRouter(client, "gpt-4", fast_model="gpt-4o-mini", **options)
+
+
+def test_fast_tier_output_is_accepted(parse):
+    client = FakeClient(gpt_4o_mini=[GOOD])
+    router = router_for(client)
+    tasks, decision = router.route("prompt", parse)
+    assert tasks[0]["description"] == "Send the report"
+    assert decision == {"tier": "fast", "reason": "accepted"}
+    assert client.calls == ["gpt-4o-mini"]
+
+
+@pytest.mark.parametrize("body_tokens, action_count, reason", [
+    (5000, 0, "long_email"),
+    (100, 20, "complex_email"),
+])
+def test_long_or_complex_email_goes_straight_to_the_large_model(parse, body_tokens, action_count, reason):
+    client = FakeClient(gpt_4=[GOOD])
+    tasks, decision = router_for(client).route("prompt", parse, body_tokens=body_tokens, action_count=action_count)
+    assert decision == {"tier": "large", "reason": reason}
+    assert client.calls == ["gpt-4"] and tasks
+
+
+def test_low_confidence_escalates(parse):
+    client = FakeClient(gpt_4o_mini=[UNSURE], gpt_4=[GOOD])
+    tasks, decision = router_for(client).route("prompt", parse)
+    assert decision == {"tier": "large", "reason": "escalated:low_confidence"}
+    assert tasks[0]["description"] == "Send the report"
+    assert client.calls == ["gpt-4o-mini", "gpt-4"]
+
+
+def test_fast_error_escalates(parse):
+    client = FakeClient(gpt_4o_mini=[TimeoutError("slow")], gpt_4=[GOOD])
+    router = router_for(client)
+    tasks, decision = router.route("prompt", parse)
+    assert decision["reason"] == "escalated:fast_error" and tasks
+    assert router.stats_snapshot()["tiers"]["fast"]["errors"] == 1
+
+
+def test_invalid_output_is_repaired_on_the_fast_tier(parse):
+    client = FakeClient(gpt_4o_mini=["Sure! Here you go", (GOOD,)])
+    router = router_for(client)
+    tasks, decision = router.route("prompt", parse)
+    assert decision == {"tier": "fast", "reason": "accepted"}
+    assert tasks[0]["description"] == "Send the report"
+    assert router.stats_snapshot()["repairs"] == {"attempted": 1, "succeeded": 1}
+
+
+def test_unrepairable_fast_output_escalates_then_repairs_on_large(parse):
+    client = FakeClient(gpt_4o_mini=["nope", "still nope", "no tasks here either"],
+                        gpt_4=['{"tasks": "wrong"}'])
+    router = router_for(client)
+    tasks, decision = router.route("prompt", parse)
+    assert decision == {"tier": "large", "reason": "escalated:invalid_output"}
+    # The large tier's own repair call goes to the fast model
+    assert client.calls == ["gpt-4o-mini", "gpt-4o-mini", "gpt-4", "gpt-4o-mini"]
+    assert router.stats_snapshot()["repairs"] == {"attempted": 2, "succeeded": 0}
+    assert tasks is None
+
+
+def test_single_tier_and_accounting(parse):
+    client = FakeClient(gpt_4=[GOOD])
+    router = ModelRouter(client, "gpt-4", fast_model="gpt-4")
+    _, decision = router.route("prompt", parse)
+    assert decision == {"tier": "large", "reason": "single_tier"}
+
+    large = router.stats_snapshot()["tiers"]["large"]
+    assert large["calls"] == 1 and large["prompt_tokens"] == 1000 and large["completion_tokens"] == 200
+    assert large["cost_usd"] == pytest.approx(estimate_cost("gpt-4", 1000, 200))
+
+
+def test_cost_uses_the_longest_model_prefix():
+    assert estimate_cost("gpt-4o-mini-2024-07-18", 1000, 1000) == pytest.approx(0.00075)
+    assert estimate_cost("gpt-4o-2024-08-06", 1000, 1000) == pytest.approx(0.02)
+    assert estimate_cost("gpt-4-0613", 1000, 1000) == pytest.approx(0.09)
+    assert estimate_cost("local-llama", 1000, 1000) == 0.0
+
+
+def test_concurrent_routes_return_their_own_decisions(parse):
+    client = FakeClient(gpt_4o_mini=lambda prompt: UNSURE if "unsure" in prompt else GOOD,
+                        gpt_4=lambda prompt: GOOD)
+    router = router_for(client)
+    decisions = {}
+
+    def route(number):
+        prompt = f"unsure {number}" if number % 2 else f"clear {number}"
+        decisions[number] = router.route(prompt, parse)[1]["reason"]
+
+    threads = [threading.Thread(target=route, args=(number,)) for number in range(40)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(decisions[number] == ("escalated:low_confidence" if number % 2 else "accepted")
+               for number in range(40))
+    stats = router.stats_snapshot()
+    assert stats["routes"] == {"accepted": 20, "escalated:low_confidence": 20}
+    assert stats["tiers"]["fast"]["calls"] == 40 and stats["tiers"]["large"]["calls"] == 20
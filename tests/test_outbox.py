@@ -0,0 +1,111 @@
+"""Outbox persistence, retry backoff, dead-lettering and the delivery hook."""
+
+import json
+import os
+import threading
+import time
+
+import pytest
+
+import outbox as outbox_module
+from outbox import Outbox, REJECTED, RETRY, SENT
+
+
+@pytest.fixture(autouse=True)
+def no_jitter(monkeypatch):
+    monkeypatch.setattr(outbox_module.random, "uniform", lambda low, high: 1.0)
+
+
+def only_entry(box):
+    (entry,) = box._entries.values()
+    return entry
+
+
+def test_enqueue_persists_and_deduplicates_by_key(tmp_path):
+    box = Outbox(str(tmp_path), lambda payload, headers: (SENT, None))
+    assert box.enqueue("<a@x>", {"body": "hi"}, {"traceparent": "t"})
+    assert not box.enqueue("<a@x>", {"body": "hi again"})
+    assert "<a@x>" in box and len(box) == 1
+
+    reloaded = Outbox(str(tmp_path), lambda payload, headers: (SENT, None))
+    assert len(reloaded) == 1
+    assert only_entry(reloaded)["headers"] == {"traceparent": "t"}
+
+
+def test_retry_delay_doubles_up_to_the_cap(tmp_path, monkeypatch):
+    monkeypatch.setattr(outbox_module.time, "time", lambda: 1000.0)
+    box = Outbox(str(tmp_path), None, max_attempts=5, base_delay=10, max_delay=25)
+    box.enqueue("<a@x>", {"body": "hi"})
+    entry = only_entry(box)
+
+    delays = []
+    for _ in range(3):
+        box._complete(entry, RETRY, "HTTP 503")
+        delays.append(entry["next_attempt_at"] - 1000.0)
+
+    assert delays == [10, 20, 25]
+    on_disk = json.load(open(box._path(entry["id"])))
+    assert on_disk["attempts"] == 3 and on_disk["last_error"] == "HTTP 503"
+
+
+def test_dead_letter_after_max_attempts(tmp_path):
+    box = Outbox(str(tmp_path), None, max_attempts=2, base_delay=0)
+    box.enqueue("<a@x>", {"body": "hi"})
+    entry = only_entry(box)
+
+    box._complete(entry, RETRY, "timeout")
+    assert len(box) == 1
+    box._complete(entry, RETRY, "timeout")
+
+    assert len(box) == 0 and "<a@x>" not in box
+    assert os.listdir(box.pending_dir) == []
+    (dead,) = os.listdir(box.dead_dir)
+    assert json.load(open(os.path.join(box.dead_dir, dead)))["attempts"] == 2
+
+
+def test_rejected_entries_are_dead_lettered_immediately(tmp_path):
+    box = Outbox(str(tmp_path), None, max_attempts=8)
+    box.enqueue("<a@x>", {"body": "hi"})
+    box._complete(only_entry(box), REJECTED, "HTTP 400")
+    assert len(box) == 0
+    assert len(os.listdir(box.dead_dir)) == 1
+
+
+def test_senders_deliver_and_call_the_hook_outside_the_lock(tmp_path):
+    delivered = []
+    attempts = {}
+
+    def send(payload, headers):
+        attempts[payload["body"]] = attempts.get(payload["body"], 0) + 1
+        if payload["body"] == "flaky" and attempts["flaky"] == 1:
+            raise ConnectionError("reset")
+        return (SENT, None) if payload["body"] != "bad" else (REJECTED, "HTTP 422")
+
+    def on_sent(entry):
+        # Another thread can take the outbox lock only if the hook runs without it
+        acquired = []
+
+        def probe():
+            if box._cond.acquire(timeout=1):
+                acquired.append(True)
+                box._cond.release()
+        thread = threading.Thread(target=probe)
+        thread.start()
+        thread.join()
+        delivered.append((entry["key"], bool(acquired)))
+
+    box = Outbox(str(tmp_path), send, base_delay=0.01, concurrency=2, on_sent=on_sent)
+    for key, body in (("<1@x>", "ok"), ("<2@x>", "flaky"), ("<3@x>", "bad")):
+        box.enqueue(key, {"body": body})
+    box.start()
+    try:
+        # flush() does not wait for entries that are backing off, so poll for the retry
+        deadline = time.monotonic() + 5
+        while (len(box) or len(delivered) < 2) and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        box.stop(timeout=1)
+
+    assert sorted(delivered) == [("<1@x>", True), ("<2@x>", True)]
+    assert attempts == {"ok": 1, "flaky": 2, "bad": 1}
+    assert len(box) == 0
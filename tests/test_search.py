@@ -0,0 +1,102 @@
+"""Search index ranking and pagination, and TaskStore's incremental index upkeep."""
+
+import search_index
+from search_index import SearchIndex
+from task_store import TaskStore
+
+
+def make_task(task_id, description, subject="", sender="someone@example.com"):
+    return {"id": task_id, "description": description, "sender": sender,
+            "source_email": {"subject": subject}}
+
+
+def test_all_terms_must_match():
+    index = SearchIndex()
+    index.build([
+        make_task("a", "Send the quarterly report"),
+        make_task("b", "Send the invoice"),
+    ])
+    tasks, total = index.search("send report")
+    assert [task["id"] for task in tasks] == ["a"]
+    assert total == 1
+    assert index.search("send nothing") == ([], 0)
+    assert index.search("   ") == ([], 0)
+
+
+def test_description_outranks_subject_and_sender():
+    index = SearchIndex()
+    index.build([
+        make_task("sender", "Call back", sender="budget@example.com"),
+        make_task("subject", "Call back", subject="Budget"),
+        make_task("description", "Review the budget"),
+    ])
+    tasks, _ = index.search("budget")
+    assert [task["id"] for task in tasks] == ["description", "subject", "sender"]
+
+
+def test_newer_tasks_win_ties_and_pages_do_not_overlap():
+    index = SearchIndex()
+    index.build([make_task(str(i), f"Book room {i}") for i in range(25)])
+
+    first, total = index.search("book room", limit=10)
+    second, _ = index.search("book room", limit=10, offset=10)
+    third, _ = index.search("book room", limit=10, offset=20)
+
+    assert total == 25
+    assert [task["id"] for task in first] == [str(i) for i in range(24, 14, -1)]
+    ids = [task["id"] for task in first + second + third]
+    assert len(ids) == len(set(ids)) == 25
+
+
+def test_update_and_remove_keep_postings_consistent():
+    index = SearchIndex()
+    index.build([make_task("a", "Draft the agenda")])
+    index.update(make_task("a", "Draft the minutes"))
+    assert index.search("agenda") == ([], 0)
+    assert index.search("minutes")[1] == 1
+
+    index.remove("a")
+    assert len(index) == 0
+    assert index.postings == {}
+
+
+def test_sync_applies_only_the_differences():
+    index = SearchIndex()
+    index.build([make_task("a", "Old text"), make_task("b", "Keep me")])
+    order_of_b = index.order["b"]
+
+    index.sync([make_task("b", "Keep me"), make_task("c", "New task")])
+
+    assert "a" not in index.tasks
+    assert index.order["b"] == order_of_b
+    assert index.search("new")[1] == 1
+    assert index.search("old") == ([], 0)
+
+
+def test_store_syncs_other_writers_without_rebuilding(tmp_path, monkeypatch):
+    path = str(tmp_path / "tasks.json")
+    writer = TaskStore(path)
+    reader = TaskStore(path)   # a second worker process, as far as the index is concerned
+    writer.add_tasks([{"description": f"Send report {i}"} for i in range(5)])
+    assert reader.search_tasks("report")[1] == 5
+
+    builds = []
+    original_build = search_index.SearchIndex.build
+    monkeypatch.setattr(search_index.SearchIndex, "build",
+                        lambda self, tasks: builds.append(1) or original_build(self, tasks))
+
+    writer.add_task({"description": "Book the budget room"})
+    assert reader.search_tasks("budget")[1] == 1
+    reader.add_task({"description": "Approve the budget"})
+    assert reader.search_tasks("budget")[1] == 2
+    with reader.transaction() as tasks:
+        del tasks[:2]
+    assert reader.search_tasks("report")[1] == 3
+    assert builds == []
+
+
+def test_search_results_leave_out_internal_fields(tmp_path):
+    store = TaskStore(str(tmp_path / "tasks.json"))
+    store.add_task({"description": "Renew the passport"})
+    tasks, _ = store.search_tasks("passport")
+    assert "cleaned" not in tasks[0]
@@ -0,0 +1,93 @@
+"""Graceful shutdown: draining refuses new ingests and waits for the ones in flight."""
+
+import threading
+
+import pytest
+
+EMAIL = {"subject": "Report", "body": "Please send the budget report by Friday.", "sender": "ana@example.com"}
+
+
+@pytest.fixture
+def app_module(app_module, monkeypatch):
+    closed = []
+    monkeypatch.setattr(app_module.components, "shutdown", lambda: closed.append(True))
+    app_module.closed_components = closed
+    yield app_module
+    app_module.draining.clear()
+    del app_module.closed_components
+
+
+@pytest.fixture
+def blocked_ingest(app_module, monkeypatch):
+    """Start an /ingest-email request that stays in extraction until the returned event is set."""
+    extractor = app_module.task_extractor
+    extract = extractor.extract_tasks_from_email
+    entered, release = threading.Event(), threading.Event()
+    responses = []
+
+    def slow_extract(*args, **kwargs):
+        entered.set()
+        release.wait(10)
+        return extract(*args, **kwargs)
+
+    monkeypatch.setattr(extractor, "extract_tasks_from_email", slow_extract)
+    thread = threading.Thread(target=lambda: responses.append(app_module.app.test_client().post(
+        '/ingest-email', json=EMAIL)))
+    thread.start()
+    assert entered.wait(10)
+    yield release, responses
+    release.set()
+    thread.join(10)
+
+
+def test_draining_fails_health_and_refuses_ingests(app_module):
+    client = app_module.app.test_client()
+    assert client.get('/health').status_code == 200
+
+    app_module.begin_drain()
+    health = client.get('/health')
+    assert health.status_code == 503 and health.get_json()["status"] == "draining"
+    ingests = [('/ingest-email', EMAIL), ('/ingest-email/stream', EMAIL), ('/ingest-emails', {"emails": [EMAIL]})]
+    for path, body in ingests:
+        response = client.post(path, json=body)
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "5"
+    # Reads keep working while the in-flight work finishes
+    assert client.get('/tasks').status_code == 200
+    assert app_module.task_store.load_tasks() == []
+
+
+def test_shutdown_waits_for_in_flight_ingests(app_module, blocked_ingest):
+    release, responses = blocked_ingest
+    result = []
+    stopper = threading.Thread(target=lambda: result.append(app_module.shutdown(timeout=10)))
+    stopper.start()
+
+    stopper.join(0.3)
+    assert stopper.is_alive() and app_module.draining.is_set()
+    assert not app_module.closed_components
+
+    release.set()
+    stopper.join(10)
+    assert result == [True]
+    assert app_module.closed_components == [True]
+    # The in-flight request finished normally and its tasks were written
+    assert responses[0].status_code == 200
+    assert len(app_module.task_store.load_tasks()) == 1
+
+
+def test_shutdown_gives_up_after_the_timeout(app_module, blocked_ingest):
+    assert app_module.shutdown(timeout=0.2) is False
+    # Shared components are closed anyway so the worker can exit
+    assert app_module.closed_components == [True]
+
+
+def test_event_streams_close_when_draining(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "SSE_DRAIN_CHECK_SECONDS", 0.05)
+    response = app_module.app.test_client().get('/tasks/events', buffered=False)
+    chunks = response.iter_encoded()
+    assert next(chunks) == b": connected\n\n"
+
+    app_module.begin_drain()
+    assert list(chunks) == []
+    response.close()
@@ -0,0 +1,61 @@
+"""Startup import budget: heavy dependencies stay off the import path until first use."""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "benchmarks"))
+
+import bench_startup  # noqa: E402
+
+
+def run_python(code, workdir, **env):
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=workdir, capture_output=True, text=True,
+        env=dict(os.environ, PYTHONPATH=REPO_ROOT, **env)
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout.split()
+
+
+@pytest.mark.parametrize("module, forbidden", sorted(bench_startup.FORBIDDEN_EAGER_IMPORTS.items()))
+def test_no_eager_heavy_imports(tmp_path, module, forbidden):
+    imported, _ = bench_startup.run_importtime(module, str(tmp_path))
+    assert module in imported
+    assert [name for name in forbidden if name in imported] == []
+
+
+def test_openai_is_imported_on_first_client_use(tmp_path):
+    pytest.importorskip("openai")
+    code = (
+        "import contextlib, io, sys\n"
+        "from task_extractor import TaskExtractor\n"
+        "with contextlib.redirect_stdout(io.StringIO()):\n"
+        "    extractor = TaskExtractor()\n"
+        "    before = extractor.llm_enabled, 'openai' in sys.modules\n"
+        "    extractor.client\n"
+        "print(*before, 'openai' in sys.modules)\n"
+    )
+    assert run_python(code, str(tmp_path), OPENAI_API_KEY="sk-test") == ["True", "False", "True"]
+
+
+def test_observability_servers_are_imported_on_use(tmp_path):
+    code = (
+        "import sys, metrics, tracing\n"
+        "print(any(name in sys.modules for name in ('http.server', 'urllib.request')))\n"
+    )
+    assert run_python(code, str(tmp_path)) == ["False"]
+
+
+def test_budget_violation_exits_1(tmp_path):
+    result = subprocess.run(
+        [sys.executable, os.path.join(REPO_ROOT, "benchmarks", "bench_startup.py"),
+         "--runs", "1", "--scale", "0.001", "--output", str(tmp_path / "startup.json")],
+        capture_output=True, text=True
+    )
+    assert result.returncode == 1
+    assert "✗ Startup budget exceeded" in result.stdout
+    assert (tmp_path / "startup.json").exists()
@@ -0,0 +1,67 @@
+"""Incremental parsing of task objects out of a streamed JSON completion."""
+
+import json
+
+from stream_parser import IncrementalTaskParser
+
+TASKS = [
+    {"description": "Send the {draft} to \"Ana\"", "category": "Work", "due_date": None},
+    {"description": "Book room [B2]", "meta": {"tags": ["a", "b"]}, "due_date": "2026-10-23"},
+]
+
+
+def feed_all(chunks):
+    parser = IncrementalTaskParser()
+    tasks = []
+    for chunk in chunks:
+        tasks.extend(parser.feed(chunk))
+    return parser, tasks
+
+
+def test_tasks_in_a_top_level_array():
+    _, tasks = feed_all([json.dumps(TASKS)])
+    assert tasks == TASKS
+
+
+def test_tasks_inside_the_record_tasks_object():
+    _, tasks = feed_all([json.dumps({"tasks": TASKS})])
+    assert tasks == TASKS
+
+
+def test_each_task_is_emitted_as_soon_as_it_closes():
+    text = json.dumps({"tasks": TASKS})
+    first_end = len('{"tasks": [') + len(json.dumps(TASKS[0]))
+    parser = IncrementalTaskParser()
+    assert parser.feed(text[:first_end - 1]) == []
+    assert parser.feed(text[first_end - 1:first_end]) == [TASKS[0]]
+    assert parser.feed(text[first_end:]) == [TASKS[1]]
+
+
+def test_one_character_at_a_time():
+    text = json.dumps({"tasks": TASKS})
+    _, tasks = feed_all(list(text))
+    assert tasks == TASKS
+
+
+def test_braces_and_quotes_inside_strings_are_ignored():
+    text = '[{"description": "Use \\"}\\" and \\\\ carefully ]"}]'
+    _, tasks = feed_all([text[:20], text[20:]])
+    assert tasks == [{"description": 'Use "}" and \\ carefully ]'}]
+
+
+def test_nested_objects_are_not_emitted_on_their_own():
+    _, tasks = feed_all([json.dumps([{"description": "x", "owner": {"name": "Bo"}}])])
+    assert tasks == [{"description": "x", "owner": {"name": "Bo"}}]
+
+
+def test_prose_around_the_json_and_truncated_output():
+    _, tasks = feed_all(["Sure! Here are the tasks:\n", json.dumps(TASKS)[:-40]])
+    assert tasks == [TASKS[0]]
+
+
+def test_buffer_is_compacted_between_tasks():
+    parser = IncrementalTaskParser()
+    parser.feed("[")
+    for index in range(200):
+        parser.feed(json.dumps({"description": f"task {index}"}) + ",")
+    assert len(parser.buffer) < 50
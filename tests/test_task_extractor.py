@@ -0,0 +1,78 @@
+"""Batch extraction: result order, process pool reuse and pool leasing across threads."""
+
+import threading
+
+import pytest
+
+from task_extractor import TaskExtractor
+
+EMAILS = [{"subject": f"Request {number}", "body": f"Please send report {number} by Friday.",
+           "sender": f"person{number}@example.com", "received_at": "2026-10-19T09:00:00Z"}
+          for number in range(24)]
+
+
+@pytest.fixture
+def extractor():
+    extractor = TaskExtractor(use_llm=False, use_triage=False)
+    yield extractor
+    extractor.close()
+
+
+def descriptions(results):
+    return [[task["description"] for task in tasks] for tasks in results]
+
+
+def test_extract_many_keeps_input_order(extractor):
+    sequential = extractor.extract_many(EMAILS, workers=1)
+    parallel = extractor.extract_many(EMAILS, workers=2, chunksize=5)
+    assert descriptions(parallel) == descriptions(sequential)
+    assert [tasks[0]["source_email"]["subject"] for tasks in parallel] == [email["subject"] for email in EMAILS]
+    assert extractor.extract_many([]) == []
+
+
+def test_pool_is_reused_between_batches(extractor):
+    extractor.extract_many(EMAILS, workers=2)
+    pool = extractor._pool
+    extractor.extract_many(EMAILS[:5], workers=2)
+    assert extractor._pool is pool
+    assert extractor._pool_users == {}
+
+
+def test_concurrent_leases_share_one_pool(extractor):
+    barrier = threading.Barrier(8)
+    pools = []
+
+    def lease():
+        barrier.wait()
+        with extractor.worker_pool(2) as pool:
+            pools.append(pool)
+            assert pool.submit(sum, [1, 2]).result() == 3
+
+    threads = [threading.Thread(target=lease) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(pools) == 8 and len({id(pool) for pool in pools}) == 1
+
+
+def test_resize_waits_for_the_leased_pool(extractor):
+    with extractor.worker_pool(2) as old:
+        with extractor.worker_pool(3) as new:
+            assert new is not old
+            # The replaced pool keeps working for its current user
+            assert old.submit(sum, [1, 2]).result() == 3
+        assert new.submit(sum, [3, 4]).result() == 7
+    with pytest.raises(RuntimeError):
+        old.submit(sum, [1])
+    assert extractor._pool is new
+
+
+def test_close_while_leased_shuts_down_after_the_lease(extractor):
+    with extractor.worker_pool(2) as pool:
+        extractor.close()
+        assert pool.submit(sum, [1, 2]).result() == 3
+    with pytest.raises(RuntimeError):
+        pool.submit(sum, [1])
+    assert extractor._pool is None
@@ -0,0 +1,121 @@
+"""Structured-output validation, per-task normalization and the repair/fallback path."""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from model_router import ModelRouter
+from task_extractor import TaskExtractor
+from task_schema import normalize_task, validate_task, validate_task_list
+
+VALID_TASK = {"description": "Send the report", "category": "Work", "priority": "High",
+              "due_date": "2026-10-23", "confidence": 0.9}
+
+
+class ScriptedClient:
+    """Fake OpenAI client answering each chat completion with the next scripted output."""
+
+    def __init__(self, outputs):
+        self.outputs = list(outputs)
+        self.prompts = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, **options):
+        self.prompts.append(messages[-1]["content"])
+        message = SimpleNamespace(content=self.outputs.pop(0), tool_calls=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+@pytest.fixture
+def extractor():
+    return TaskExtractor(use_llm=False, use_triage=False)
+
+
+def test_valid_list_has_no_errors():
+    assert validate_task_list({"tasks": [VALID_TASK]}) == []
+    assert validate_task_list({"tasks": []}) == []
+
+
+@pytest.mark.parametrize("change, message", [
+    ({"category": "Chores"}, "is not one of"),
+    ({"priority": "Critical"}, "is not one of"),
+    ({"confidence": "high"}, "expected number"),
+    ({"due_date": "Friday"}, "does not match"),
+    ({"confidence": 1.5}, "is outside"),
+    ({"description": "  "}, "must not be empty"),
+])
+def test_each_schema_rule_reports_its_path(change, message):
+    errors = validate_task({**VALID_TASK, **change}, "$.tasks[0]")
+    assert len(errors) == 1
+    assert errors[0].startswith(f"$.tasks[0].{next(iter(change))}")
+    assert message in errors[0]
+
+
+def test_missing_required_fields():
+    errors = validate_task_list({"tasks": [{"description": "x"}]})
+    assert {"$.tasks[0]: missing required field 'category'",
+            "$.tasks[0]: missing required field 'priority'",
+            "$.tasks[0]: missing required field 'due_date'"} <= set(errors)
+    assert validate_task_list([]) == ["$: expected object, got list"]
+
+
+def test_normalize_task_repairs_what_it_can():
+    task = normalize_task({"description": "Book room", "category": "work", "priority": "URGENT",
+                           "due_date": " 2026-10-23 ", "confidence": "1.7"})
+    assert task == {"description": "Book room", "category": "Work", "priority": None,
+                    "due_date": "2026-10-23", "confidence": 1.0}
+    assert normalize_task({"description": "x", "due_date": "next week", "confidence": True})["due_date"] is None
+    assert "confidence" not in normalize_task({"description": "x", "confidence": True})
+
+
+@pytest.mark.parametrize("task", [None, "Send report", 5, {"description": ""}, {"category": "Work"}])
+def test_normalize_task_drops_unusable_tasks(task):
+    assert normalize_task(task) is None
+
+
+def test_one_bad_task_does_not_reject_the_list(extractor):
+    response = json.dumps({"tasks": [VALID_TASK, {"description": ""}, {**VALID_TASK, "description": "Call Bo",
+                                                                        "category": "nonsense"}]})
+    tasks, errors = extractor.parse_structured_response(response)
+    assert [task["description"] for task in tasks] == ["Send the report", "Call Bo"]
+    assert tasks[1]["category"] is None
+    assert "$.tasks[1].description: must not be empty" in errors
+    assert any(error.startswith("$.tasks[2].category") for error in errors)
+    assert not any(error.startswith("$.tasks[0]") for error in errors)
+
+
+def test_unusable_output_is_none(extractor):
+    assert extractor.parse_structured_response("not json")[0] is None
+    assert extractor.parse_structured_response('{"tasks": [{"description": ""}]}')[0] is None
+    assert extractor.parse_structured_response('{"items": []}')[0] is None
+    assert extractor.parse_structured_response('{"tasks": []}') == ([], [])
+
+
+def test_bare_arrays_and_embedded_json_are_accepted(extractor):
+    tasks, errors = extractor.parse_structured_response(f"Here you go: {json.dumps([VALID_TASK])} Thanks!")
+    assert tasks == [VALID_TASK] and errors == []
+
+
+def test_router_repairs_invalid_output_once(extractor):
+    client = ScriptedClient(["no json here", json.dumps({"tasks": [VALID_TASK]})])
+    router = ModelRouter(client, "large-model", fast_model="")
+
+    tasks, decision = router.route("prompt", extractor.parse_structured_response)
+
+    assert tasks == [VALID_TASK]
+    assert decision == {"tier": "large", "reason": "single_tier"}
+    assert "response is not valid JSON" in client.prompts[1]
+    assert router.stats_snapshot()["repairs"] == {"attempted": 1, "succeeded": 1}
+
+
+def test_extraction_falls_back_to_keywords_when_repair_fails():
+    client = ScriptedClient(["garbage", "still garbage"])
+    extractor = TaskExtractor(use_triage=False, client=client)
+    extractor._router = ModelRouter(client, "large-model", fast_model="")
+
+    tasks = extractor.extract_tasks_from_email("Report", "Please send the budget report by Friday.",
+                                               "boss@example.com", received_at="2026-10-19T09:00:00Z")
+
+    assert client.outputs == []
+    assert [task["due_date"] for task in tasks] == ["2026-10-23"]
@@ -0,0 +1,124 @@
+"""Span nesting, W3C traceparent propagation, thread hand-off and trace export."""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import tracing
+from tracing import Tracer, current_traceparent, to_otlp
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@pytest.fixture
+def tracer():
+    return Tracer(sample_rate=1.0, buffer_size=10, jsonl_path="", otlp_endpoint="")
+
+
+def by_name(spans):
+    return {span["name"]: span for span in spans}
+
+
+def test_child_spans_nest_under_the_current_span(tracer):
+    with tracer.trace("ingest", sender="ana") as root:
+        with tracer.span("extract") as extract:
+            with tracer.span("llm.call", tier="fast"):
+                pass
+        with tracer.span("store.save"):
+            pass
+
+    spans = by_name(tracer.get_trace(root.trace_id))
+    assert spans["ingest"]["parent_id"] is None
+    assert spans["extract"]["parent_id"] == spans["ingest"]["span_id"]
+    assert spans["llm.call"]["parent_id"] == extract.span_id
+    assert spans["store.save"]["parent_id"] == root.span_id
+    assert spans["llm.call"]["attributes"] == {"tier": "fast"}
+    assert {span["trace_id"] for span in spans.values()} == {root.trace_id}
+
+
+def test_incoming_traceparent_is_continued(tracer):
+    with tracer.trace("ingest", f"00-{TRACE_ID}-{PARENT_ID}-01") as root:
+        with tracer.span("extract") as child:
+            assert current_traceparent() == f"00-{TRACE_ID}-{child.span_id}-01"
+    assert root.trace_id == TRACE_ID
+    assert tracer.get_trace(TRACE_ID)[0]["parent_id"] == PARENT_ID
+
+
+def test_sampling_decisions(tracer):
+    # The caller's "not sampled" flag wins over the local sample rate
+    with tracer.trace("ingest", f"00-{TRACE_ID}-{PARENT_ID}-00") as root:
+        with tracer.span("extract") as child:
+            assert current_traceparent() is None
+    assert root is tracing.NOOP_SPAN and child is tracing.NOOP_SPAN
+
+    never = Tracer(sample_rate=0, jsonl_path="", otlp_endpoint="")
+    with never.trace("ingest") as root:
+        assert root.trace_id is None
+    # A malformed header starts a new trace
+    with tracer.trace("ingest", "00-short-id-01") as root:
+        assert root.trace_id != "short"
+    # Outside any trace, spans are no-ops
+    with tracer.span("orphan") as span:
+        assert span is tracing.NOOP_SPAN
+
+
+def test_bind_carries_the_span_into_worker_threads(tracer):
+    def work(number):
+        with tracer.span("work", number=number) as span:
+            return span
+
+    with tracer.trace("batch") as root:
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            parents = list(pool.map(tracing.bind(work), range(6)))
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            unbound = pool.submit(work, 0).result()
+
+    assert [span.parent_id for span in parents] == [root.span_id] * 6
+    # Without bind the worker thread sees no current span
+    assert unbound is tracing.NOOP_SPAN
+    assert len(tracer.get_trace(root.trace_id)) == 7
+
+
+def test_errors_mark_the_span(tracer):
+    with pytest.raises(ValueError):
+        with tracer.trace("ingest") as root:
+            with tracer.span("extract"):
+                raise ValueError("bad payload")
+    spans = by_name(tracer.get_trace(root.trace_id))
+    assert spans["extract"]["status"] == "error"
+    assert spans["extract"]["attributes"]["error"] == "ValueError: bad payload"
+    assert tracer.recent_traces()[0]["status"] == "error"
+
+
+def test_finished_traces_are_exported(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(sample_rate=1.0, jsonl_path=str(path), otlp_endpoint="")
+    with tracer.trace("ingest", retries=2) as root:
+        with tracer.span("extract"):
+            pass
+    assert tracer.flush(timeout=5)
+
+    exported = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [span["name"] for span in exported] == ["ingest", "extract"]
+
+    otlp = to_otlp(exported, "svc")["resourceSpans"][0]
+    assert otlp["resource"]["attributes"][0]["value"] == {"stringValue": "svc"}
+    root_span = otlp["scopeSpans"][0]["spans"][0]
+    assert root_span["traceId"] == root.trace_id and root_span["parentSpanId"] == ""
+    assert root_span["attributes"] == [{"key": "retries", "value": {"intValue": "2"}}]
+
+
+def test_ingest_joins_the_callers_trace(app_module):
+    client = app_module.app.test_client()
+    email = {"subject": "Report", "body": "Please send the budget report by Friday.", "sender": "ana@example.com"}
+    response = client.post('/ingest-email', json=email, headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+
+    assert response.headers["X-Trace-Id"] == TRACE_ID
+    spans = tracing.tracer.get_trace(TRACE_ID)
+    root = spans[0]
+    assert root["name"] == "ingest_email" and root["parent_id"] == PARENT_ID
+    names = {span["name"] for span in spans}
+    assert {"extract.triage", "extract.preprocess", "store.save"} <= names
+    assert all(span["parent_id"] for span in spans)
@@ -0,0 +1,391 @@
+"""
+Tracing Module
+Lightweight request tracing: a root span per ingest, child spans for triage,
+LLM calls, duplicate checks and store reads/writes, carried through the call
+stack with contextvars. Finished sampled traces are kept in memory for
+GET /debug/traces and exported to a JSONL file and/or an OTLP/HTTP (JSON)
+collector.
+
+Run a local stand-in collector: python tracing.py collector [--port 4318] [--output traces.jsonl]
+"""
+
+import collections
+import contextvars
+import json
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+
+class Span:
+    """One timed operation with attributes; children share the root's trace."""
+
+    __slots__ = ("name", "trace", "span_id", "parent_id", "start_time", "start", "end",
+                 "attributes", "status")
+
+    def __init__(self, name: str, trace: "_Trace", parent_id: Optional[str], attributes: Dict):
+        self.name = name
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.start_time = time.time()
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.attributes = attributes
+        self.status = "ok"
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": datetime.fromtimestamp(self.start_time, timezone.utc).isoformat(),
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Returned when nothing is being traced; every call is a cheap no-op."""
+
+    trace_id = None
+    span_id = None
+
+    def set_attribute(self, key: str, value) -> None:
+        pass
+
+    def set_attributes(self, **attributes) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _Trace:
+    """Spans of one sampled request, exported together when the root span ends."""
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: List[Span] = []
+        self.lock = threading.Lock()
+
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """Sampling, span bookkeeping, the recent-trace buffer and exporters."""
+
+    def __init__(self, sample_rate: Optional[float] = None, buffer_size: Optional[int] = None,
+                 jsonl_path: Optional[str] = None, otlp_endpoint: Optional[str] = None,
+                 service_name: str = "email-task-automation"):
+        """Defaults come from TRACE_SAMPLE_RATE, TRACE_BUFFER_SIZE, TRACE_JSONL_PATH and TRACE_OTLP_ENDPOINT."""
+        self.sample_rate = sample_rate if sample_rate is not None else float(os.getenv("TRACE_SAMPLE_RATE", 0.1))
+        self.service_name = service_name
+        self.recent = collections.deque(maxlen=buffer_size or int(os.getenv("TRACE_BUFFER_SIZE", 100)))
+        self.exporters: List[Callable[[List[Dict]], None]] = []
+        jsonl_path = jsonl_path if jsonl_path is not None else os.getenv("TRACE_JSONL_PATH", "")
+        otlp_endpoint = otlp_endpoint if otlp_endpoint is not None else os.getenv("TRACE_OTLP_ENDPOINT", "")
+        if jsonl_path:
+            self.exporters.append(JSONLExporter(jsonl_path))
+        if otlp_endpoint:
+            self.exporters.append(OTLPExporter(otlp_endpoint, service_name))
+        self._export_queue: Optional[queue.Queue] = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def trace(self, name: str, traceparent: Optional[str] = None, **attributes):
+        """
+        Start a root span (or continue the caller's trace from a W3C traceparent
+        header). Unsampled requests get the no-op span and pay almost nothing.
+        """
+        parent = _parse_traceparent(traceparent)
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id, sampled = f"{random.getrandbits(128):032x}", None, None
+        if sampled is None:
+            sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        if not sampled:
+            yield NOOP_SPAN
+            return
+
+        root = Span(name, _Trace(trace_id), parent_id, attributes)
+        try:
+            with self._activate(root):
+                yield root
+        finally:
+            self._finish_trace(root.trace)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Child of the current span, or a no-op when no sampled trace is active."""
+        parent = _current_span.get()
+        if parent is None:
+            yield NOOP_SPAN
+            return
+        span = Span(name, parent.trace, parent.span_id, attributes)
+        with self._activate(span):
+            yield span
+
+    @contextmanager
+    def _activate(self, span: Span):
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.attributes.setdefault("error", f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            span.end = time.perf_counter()
+            _current_span.reset(token)
+            with span.trace.lock:
+                span.trace.spans.append(span)
+
+    def _finish_trace(self, trace: _Trace) -> None:
+        with trace.lock:
+            spans = [span.to_dict() for span in sorted(trace.spans, key=lambda s: s.start)]
+        self.recent.append(spans)
+        if self.exporters:
+            try:
+                self._exporter_queue().put_nowait(spans)
+            except queue.Full:
+                print("✗ Trace export queue full, dropping trace")
+
+    def _exporter_queue(self) -> queue.Queue:
+        """Exports run on one background thread so slow collectors never delay requests."""
+        with self._lock:
+            if self._export_queue is None:
+                self._export_queue = queue.Queue(maxsize=1000)
+                threading.Thread(target=self._export_loop, daemon=True).start()
+        return self._export_queue
+
+    def _export_loop(self) -> None:
+        while True:
+            spans = self._export_queue.get()
+            try:
+                for exporter in self.exporters:
+                    try:
+                        exporter(spans)
+                    except Exception as e:
+                        print(f"✗ Trace export failed: {e}")
+            finally:
+                self._export_queue.task_done()
+
+    def flush(self, timeout: float = 5) -> bool:
+        """Wait for queued traces to be exported (used on shutdown); False on timeout."""
+        export_queue = self._export_queue
+        if export_queue is None:
+            return True
+        deadline = time.monotonic() + timeout
+        while export_queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def recent_traces(self) -> List[Dict]:
+        """Summaries of buffered traces, newest first."""
+        summaries = []
+        for spans in reversed(self.recent):
+            root = spans[0]
+            summaries.append({
+                "trace_id": root["trace_id"],
+                "name": root["name"],
+                "start": root["start"],
+                "duration_ms": max(span["duration_ms"] for span in spans),
+                "spans": len(spans),
+                "status": "error" if any(span["status"] == "error" for span in spans) else "ok",
+            })
+        return summaries
+
+    def get_trace(self, trace_id: str) -> Optional[List[Dict]]:
+        for spans in self.recent:
+            if spans and spans[0]["trace_id"] == trace_id:
+                return spans
+        return None
+
+
+def _parse_traceparent(header: Optional[str]):
+    """(trace_id, parent span_id, sampled) from a W3C traceparent header, or None."""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+
+def current_traceparent() -> Optional[str]:
+    """W3C traceparent for the current span, to propagate the trace over HTTP."""
+    span = _current_span.get()
+    if span is None:
+        return None
+    return f"00-{span.trace_id}-{span.span_id}-01"
+
+
+def bind(func: Callable) -> Callable:
+    """Wrap func so it runs under the caller's current span (for thread pools)."""
+    parent = _current_span.get()
+    if parent is None:
+        return func
+
+    def bound(*args, **kwargs):
+        token = _current_span.set(parent)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current_span.reset(token)
+    return bound
+
+
+class JSONLExporter:
+    """Append one JSON object per span to a local file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def __call__(self, spans: List[Dict]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span, ensure_ascii=False, default=str) + "\n")
+
+
+def _otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans: List[Dict], service_name: str) -> Dict:
+    """OTLP/JSON ExportTraceServiceRequest body for one trace."""
+    otlp_spans = []
+    for span in spans:
+        start_ns = int(datetime.fromisoformat(span["start"]).timestamp() * 1e9)
+        otlp_spans.append({
+            "traceId": span["trace_id"],
+            "spanId": span["span_id"],
+            "parentSpanId": span["parent_id"] or "",
+            "name": span["name"],
+            "kind": 1,
+            "startTimeUnixNano": str(start_ns),
+            "endTimeUnixNano": str(start_ns + int(span["duration_ms"] * 1e6)),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span["attributes"].items()],
+            "status": {"code": 2 if span["status"] == "error" else 1},
+        })
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+        "scopeSpans": [{"scope": {"name": "tracing"}, "spans": otlp_spans}],
+    }]}
+
+
+class OTLPExporter:
+    """POST traces as OTLP/JSON to a collector (e.g. http://localhost:4318/v1/traces)."""
+
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 5):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+
+    def __call__(self, spans: List[Dict]) -> None:
+        import urllib.request
+        body = json.dumps(to_otlp(spans, self.service_name), default=str).encode("utf-8")
+        request = urllib.request.Request(self.endpoint, data=body, method="POST",
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+# Process-wide tracer configured from the environment
+tracer = Tracer()
+
+
+def trace(name: str, traceparent: Optional[str] = None, **attributes):
+    return tracer.trace(name, traceparent, **attributes)
+
+
+def span(name: str, **attributes):
+    return tracer.span(name, **attributes)
+
+
+def run_collector(port: int, output: str) -> None:
+    """Minimal OTLP/HTTP JSON receiver that appends every span to a JSONL file."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    lock = threading.Lock()
+
+    class CollectorHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                count = 0
+                with lock, open(output, "a", encoding="utf-8") as f:
+                    for resource in payload.get("resourceSpans", []):
+                        for scope in resource.get("scopeSpans", []):
+                            for otlp_span in scope.get("spans", []):
+                                f.write(json.dumps(otlp_span) + "\n")
+                                count += 1
+                print(f"✓ Received {count} spans")
+                self.send_response(200)
+            except ValueError:
+                self.send_response(400)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), CollectorHandler)
+    print(f"Collecting OTLP/JSON traces on http://localhost:{port}/v1/traces -> {output}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n✓ Collector stopped")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Tracing utilities")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+    collector = commands.add_parser("collector", help="run a local OTLP/JSON collector stand-in")
+    collector.add_argument("--port", type=int, default=4318)
+    collector.add_argument("--output", default="data/traces.jsonl")
+    args = arg_parser.parse_args()
+    run_collector(args.port, args.output)
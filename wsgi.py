@@ -0,0 +1,9 @@
+"""
+WSGI Entry Point
+Import target for production servers (gunicorn wsgi:app, waitress-serve wsgi:app).
+Importing it builds the TaskStore and TaskExtractor singletons in app.py.
+"""
+
+from app import app
+
+application = app